@@ -113,3 +113,71 @@ class GhettoBitStream:
         copy: List[int] = data[:]
         copy.reverse()
         return sum(x << n * 8 for n, x in enumerate(copy))
+
+
+class BitReader:
+    """
+    Reads bits from binary data stored in a memoryview. In contrast to GhettoBitStream
+    bits are not converted to characters, but more bits can be read at once as an unsigned
+    int. It is used for decoding of Huffman codes using lookup tables.
+    """
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        """
+        :param data:    binary data
+        """
+        self.data = memoryview(data).cast("B")
+        self._size = len(self.data)
+        # position of the next bit
+        self.position = 0
+        self.length = self._size * 8
+
+    @property
+    def remaining(self) -> int:
+        """
+        :return:    number of bits, which were not read yet
+        """
+        return self.length - self.position
+
+    def peek(self, count: int) -> int:
+        """
+        Get next bits without moving the position in the stream. When there are
+        not enough bits in the stream, then missing bits are zeros.
+
+        :param count:   number of bits
+        :return:        bits as big-endian unsigned int
+        """
+        position = self.position
+        start = position >> 3
+        end = (position + count + 7) >> 3
+        chunk = int.from_bytes(self.data[start:end], "big")
+        if end > self._size:
+            # pad missing bytes at the end of data with zeros
+            chunk <<= 8 * (end - max(start, self._size))
+        return (chunk >> (8 * (end - start) - (position & 7) - count)) & ((1 << count) - 1)
+
+    def skip(self, count: int) -> None:
+        """
+        Move position in the stream
+        :param count:   number of bits
+        """
+        self.position = min(self.position + count, self.length)
+
+    def read(self, count: int) -> int:
+        """
+        :param count:   number of bits
+        :return:        next bits as big-endian unsigned int
+        """
+        if count > self.remaining:
+            raise IndexError("not enough bits in the stream")
+        bits = self.peek(count)
+        self.position += count
+        return bits
+
+    def pop_byte(self) -> int:
+        """
+        :return:    next entire byte in the stream, as an int
+        """
+        return self.read(8)
+
+    combine_bytes = staticmethod(GhettoBitStream.combine_bytes)
@@ -0,0 +1,259 @@
+# Copyright (c) 2026 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+"""
+Store of cache files, e.g. in /var/lib/rhsm/cache. Files are written atomically:
+data are written to a temporary file in the same directory, which is renamed to
+the cache file, so readers never see a partially written file. Metadata of cache
+files (time of writing, version of schema, UUID of consumer, validators of the
+response) are kept in one small index file shared by all caches of the directory.
+"""
+
+import errno
+import fcntl
+import json
+import logging
+import os
+import stat
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+
+log = logging.getLogger(__name__)
+
+# Name of the index file in the directory of cache files
+INDEX_FILE_NAME = "cache_index.json"
+
+# Mode of new files
+DEFAULT_MODE = 0o644
+
+# Version of format of the index file
+INDEX_VERSION = 1
+
+
+def _fsync_directory(directory: str) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_in_place(path: str, data: bytes, fsync: bool) -> None:
+    with open(path, "wb") as output:
+        output.write(data)
+        if fsync:
+            output.flush()
+            os.fsync(output.fileno())
+
+
+def write_atomically(
+    path: str, data: Union[str, bytes], fsync: bool = False, mode: Optional[int] = None
+) -> None:
+    """
+    Write data to the file atomically. When fsync is True, then data are flushed to
+    the disk before the file is renamed and the directory is flushed after the rename,
+    so the file survives a crash of the system. The mode of existing file is kept.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    directory = os.path.dirname(path) or "."
+    if mode is None:
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = DEFAULT_MODE
+    fd, temp_path = tempfile.mkstemp(prefix=".%s." % os.path.basename(path), dir=directory)
+    try:
+        try:
+            os.fchmod(fd, mode)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view) :]
+            if fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        try:
+            os.replace(temp_path, path)
+        except OSError as err:
+            # The file cannot be replaced, when it is a mount point (e.g. a file
+            # mounted to a container). It is possible to write it only in place.
+            if err.errno not in (errno.EBUSY, errno.EXDEV):
+                raise
+            _write_in_place(path, data, fsync)
+            os.unlink(temp_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    if fsync:
+        _fsync_directory(directory)
+
+
+def _file_identity(path: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Identity of the file used for detection of changes done without the store
+    """
+    try:
+        file_stat = os.stat(path)
+    except OSError:
+        return None
+    return file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns
+
+
+class CacheStore:
+    """
+    Store of cache files in one directory with the index of their metadata. Metadata
+    of a file are returned only when the file was not changed since it was written
+    by the store, so metadata of the old content are never used with the new content.
+    """
+
+    def __init__(self, directory: str):
+        self.directory: str = directory
+        self.index_path: str = os.path.join(directory, INDEX_FILE_NAME)
+        self._lock = threading.Lock()
+        # Parsed index and identity of the index file it was read from
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._index_identity: Optional[Tuple[int, int, int]] = None
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return entries of the index. The index file is parsed only when it was changed.
+        """
+        identity = _file_identity(self.index_path)
+        if identity is None:
+            return {}
+        with self._lock:
+            if identity != self._index_identity:
+                try:
+                    with open(self.index_path) as index_file:
+                        index: Dict = json.load(index_file)
+                    entries: Dict = index["entries"] if index.get("version") == INDEX_VERSION else {}
+                    if not isinstance(entries, dict):
+                        entries = {}
+                except (OSError, ValueError, AttributeError, KeyError):
+                    entries = {}
+                self._index = entries
+                self._index_identity = identity
+            return self._index
+
+    def _update_index(self, name: str, entry: Optional[Dict[str, Any]]) -> None:
+        """
+        Set or remove (when entry is None) the entry of the index. Other processes
+        are locked out of the index, while it is updated.
+        """
+        directory_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            fcntl.flock(directory_fd, fcntl.LOCK_EX)
+            entries = dict(self._read_index())
+            if entry is None:
+                if entries.pop(name, None) is None:
+                    return
+            else:
+                entries[name] = entry
+            index = {"version": INDEX_VERSION, "entries": entries}
+            write_atomically(self.index_path, json.dumps(index, separators=(",", ":")))
+        finally:
+            os.close(directory_fd)
+
+    def write(
+        self,
+        path: str,
+        data: Union[str, bytes],
+        fsync: bool = False,
+        schema: int = 1,
+        uuid: Optional[str] = None,
+        validators: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Write the cache file atomically and store its metadata to the index. Failure
+        of writing the index is only logged, because metadata are never required.
+        """
+        write_atomically(path, data, fsync=fsync)
+        entry = {
+            "written_at": time.time(),
+            "schema": schema,
+            "uuid": uuid,
+            "validators": validators,
+            "file": _file_identity(path),
+        }
+        try:
+            self._update_index(os.path.basename(path), entry)
+        except OSError as err:
+            log.debug("Unable to write index of cache files %s: %s" % (self.index_path, err))
+
+    def metadata(self, path: str) -> Optional[Dict[str, Any]]:
+        """
+        Return metadata of the cache file. None is returned, when the file does not
+        exist, it was not written by the store or it was changed since then.
+        """
+        entry: Optional[Dict] = self._read_index().get(os.path.basename(path))
+        if entry is None or entry.get("file") is None:
+            return None
+        if tuple(entry["file"]) != _file_identity(path):
+            return None
+        return entry
+
+    def remove(self, path: str) -> None:
+        """
+        Remove the cache file and its metadata
+        """
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        try:
+            self._update_index(os.path.basename(path), None)
+        except OSError as err:
+            log.debug("Unable to write index of cache files %s: %s" % (self.index_path, err))
+
+
+_stores: Dict[str, CacheStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str) -> CacheStore:
+    """
+    Return the store of the directory of the cache file
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    with _stores_lock:
+        store = _stores.get(directory)
+        if store is None:
+            store = _stores[directory] = CacheStore(directory)
+        return store
+
+
+def write(path: str, data: Union[str, bytes], **kwargs: Any) -> None:
+    """
+    Write the cache file using the store of its directory. See CacheStore.write().
+    """
+    get_store(path).write(path, data, **kwargs)
+
+
+def metadata(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Return metadata of the cache file stored in the index of its directory
+    """
+    return get_store(path).metadata(path)
+
+
+def remove(path: str) -> None:
+    """
+    Remove the cache file and its metadata from the index of its directory
+    """
+    get_store(path).remove(path)
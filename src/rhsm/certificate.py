@@ -24,7 +24,7 @@ Eventually the deprecated classes below will be removed, and the new classes
 will be relocated into this module.
 """
 
-from typing import List, Any, Callable, Optional, Union, Tuple, Dict
+from typing import List, Any, Callable, Optional, Sequence, Union, Tuple, Dict
 
 import dateutil
 import os
@@ -655,6 +655,8 @@ class Extensions(dict):
     Represents x.509 (v3) custom extensions.
     """
 
+    __slots__ = ()
+
     def __init__(self, x509: Union[dict, _certificate.X509]):
         if isinstance(x509, dict):
             self.update(x509)
@@ -711,6 +713,12 @@ class Extensions(dict):
         if isinstance(oid, str):
             oid = OID(oid)
 
+        # OID without wildcards matches only one extension
+        if oid.is_exact():
+            if oid in self:
+                ext.append((oid, self[oid]))
+            return ext
+
         # Only order the keys if we want more than a single return value
         keyset: List["OID"]
         if ignoreOrder:
@@ -762,11 +770,15 @@ class Extensions(dict):
 
 class OID:
     """
-    The Object Identifier object
+    The Object Identifier object. OIDs are immutable, the hash is
+    computed only once and it is equal to the hash of the OID string,
+    so an OID can be looked up in Extensions using its string.
     :ivar part: The oid parts
     :cvar WILDCARD: The wildcard character
     """
 
+    __slots__ = ("part", "_str", "_hash")
+
     WILDCARD: str = "*"
 
     @classmethod
@@ -783,18 +795,28 @@ class OID:
         """
         return s.split(".")
 
-    def __init__(self, oid: Union[str, List[str]]):
+    def __init__(self, oid: Union[str, Sequence[str]]):
         """
         :param oid: The OID value.
         """
+        self.part: Tuple[str, ...]
+        self._str: str
         if isinstance(oid, str):
-            self.part = self.split(oid)
+            self.part = tuple(self.split(oid))
+            self._str = oid
         else:
-            self.part = oid
+            self.part = tuple(oid)
+            self._str = ".".join(self.part)
+        self._hash: int = hash(self._str)
 
-        self._len: Optional[int] = None
-        self._str: Optional[str] = None
-        self._hash: Optional[str] = None
+    def is_exact(self) -> bool:
+        """
+        Return True, when the OID does not contain wildcards and it is not
+        matched only on the beginning or the end (see match()).
+        """
+        return (
+            bool(self.part) and bool(self.part[0]) and bool(self.part[-1]) and self.WILDCARD not in self.part
+        )
 
     def parent(self) -> Optional["OID"]:
         """
@@ -802,7 +824,7 @@ class OID:
 
         :return: The parent OID.
         """
-        p: List[str] = self.part[:-1]
+        p: Tuple[str, ...] = self.part[:-1]
         if p:
             return OID(p)
 
@@ -833,7 +855,7 @@ class OID:
         """
         if isinstance(oid, str):
             oid = OID(oid)
-        part: List[str] = self.part + oid.part
+        part: Tuple[str, ...] = self.part + oid.part
         return OID(part)
 
     def match(self, oid: "OID") -> bool:
@@ -849,38 +871,35 @@ class OID:
         :param oid: An OID string or object.
         :return: True if matched
         """
-        i: int = 0
+        pattern: Tuple[str, ...] = oid.part if isinstance(oid, OID) else tuple(oid)
 
         # Matching the end
-        if not oid[0]:
-            oid = oid[1:]
-            parts = self.part[-len(oid) :]
+        if not pattern[0]:
+            pattern = pattern[1:]
+            parts = self.part[-len(pattern) :]
         # Matching the beginning
-        elif not oid[-1]:
-            oid = oid[:-1]
-            parts = self.part[: len(oid)]
+        elif not pattern[-1]:
+            pattern = pattern[:-1]
+            parts = self.part[: len(pattern)]
         # Full on match
         else:
             parts = self.part
 
         # The lengths do not match, fail.
-        if len(parts) != len(oid):
+        if len(parts) != len(pattern):
             return False
 
-        for x in parts:
-            val: str = oid[i]
-            if x == val or val == self.WILDCARD:
-                i += 1
-            else:
+        if self.WILDCARD not in pattern:
+            return parts == pattern
+
+        for x, val in zip(parts, pattern):
+            if x != val and val != self.WILDCARD:
                 return False
 
         return True
 
     def __len__(self) -> int:
-        if not self._len:
-            self._len = len(self.part)
-
-        return self._len
+        return len(self.part)
 
     def __getitem__(self, index: int) -> str:
         return self.part[index]
@@ -888,22 +907,18 @@ class OID:
     def __repr__(self) -> str:
         return str(self)
 
-    def __hash__(self) -> str:
-        if not self._hash:
-            self._hash = hash(str(self))
-
+    def __hash__(self) -> int:
         return self._hash
 
     def __eq__(self, other) -> bool:
-        return str(self) == str(other)
+        if isinstance(other, OID):
+            return self._hash == other._hash and self._str == other._str
+        return self._str == str(other)
 
     def __lt__(self, other) -> bool:
-        return str(self) < str(other)
+        return self._str < str(other)
 
     def __str__(self) -> str:
-        if not self._str:
-            self._str = ".".join(self.part)
-
         return self._str
 
 
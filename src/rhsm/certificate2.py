@@ -16,10 +16,11 @@ import logging
 import os
 import posixpath
 import re
+import sys
 import zlib
 
 import datetime
-from typing import Optional, List, Dict, Union, Tuple
+from typing import Any, Optional, List, Dict, Union, Tuple
 
 from rhsm import _certificate
 
@@ -33,7 +34,7 @@ from rhsm.certificate import (
     parse_tags,
     CertificateException,
 )
-from rhsm.pathtree import PathTree
+from rhsm.pathtree import PathMatcher, PathTree
 from rhsm import ourjson as json
 
 log = logging.getLogger(__name__)
@@ -53,6 +54,26 @@ IDENTITY_CERT = 3
 
 CONTENT_ACCESS_CERT_TYPE = "OrgLevel"
 
+BEGIN_ENTITLEMENT_DATA = "-----BEGIN ENTITLEMENT DATA-----"
+END_ENTITLEMENT_DATA = "-----END ENTITLEMENT DATA-----"
+
+# Characters of base64 encoded entitlement data with optional padding at the end
+BASE64_DATA = re.compile(r"[A-Za-z0-9+/\s]*(?:=\s*){0,2}")
+# The first characters of base64 encoded entitlement data
+BASE64_PREFIX = re.compile(r"\s*([A-Za-z0-9+/]{4})")
+
+
+def _intern(value: Any) -> Any:
+    """
+    Intern string values, which are repeated in many certificates (content type,
+    arches, GPG URLs, etc.), so every distinct value is held in memory only once.
+    """
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return [sys.intern(item) if isinstance(item, str) else item for item in value]
+    return value
+
 
 class CertificateLoadingError(Exception):
     """
@@ -99,11 +120,13 @@ class _CertFactory:
         Create appropriate certificate object from a PEM file on disk.
         """
         try:
-            pem: str = open(path, "r").read()
+            with open(path, "r") as pem_file:
+                pem: str = pem_file.read()
         except IOError as err:
             raise CertificateException("Error loading certificate: %s" % err)
+        # The file is read only once, X509 certificate is loaded from the same buffer
         try:
-            cert = _certificate.load(path)
+            cert = _certificate.load(pem=pem)
         except _certificate.OpenSSLCertificateLoadingError as exc:
             raise CertificateLoadingError(exc.args[0], exc.args[1], path=path)
         else:
@@ -322,29 +345,18 @@ class _CertFactory:
         self, version: int, extensions: Extensions, x509: _certificate.X509, path: str, pem: str
     ) -> "EntitlementCertificate":
         # At this time, we only support v3 entitlement certificates
-        entitlement_data: Optional[str]
-        try:
-            # this is only expected to be available on the client side
-            entitlement_data = pem.split("-----BEGIN ENTITLEMENT DATA-----")[1]
-            entitlement_data = entitlement_data.split("-----END ENTITLEMENT DATA-----")[0].strip()
-        except IndexError:
-            entitlement_data = None
-
-        order: Optional[Order]
-        content: Optional[List[Content]]
-        products: Optional[List[Product]]
-        pool: Optional[Pool]
-        if entitlement_data:
-            payload: dict = self._decompress_payload(base64.b64decode(entitlement_data))
-            order = self._parse_v3_order(payload)
-            content = self._parse_v3_content(payload)
-            products = self._parse_v3_products(payload)
-            pool = self._parse_v3_pool(payload)
-        else:
-            order = None
-            content = None
-            products = None
-            pool = None
+        # The payload is decoded and parsed, when some of its sections is needed
+        payload: Optional[_EntitlementPayload] = None
+        # this is only expected to be available on the client side
+        begin: int = pem.find(BEGIN_ENTITLEMENT_DATA)
+        if begin != -1:
+            begin += len(BEGIN_ENTITLEMENT_DATA)
+            end: int = pem.find(END_ENTITLEMENT_DATA, begin)
+            if end == -1:
+                end = len(pem)
+            if pem[begin:end].strip():
+                payload = _EntitlementPayload(self, pem, begin, end)
+                payload.check()
 
         cert = EntitlementCertificate(
             x509=x509,
@@ -355,10 +367,7 @@ class _CertFactory:
             start=get_datetime_from_x509(x509.get_not_before()),
             end=get_datetime_from_x509(x509.get_not_after()),
             subject=self._read_subject(x509),
-            order=order,
-            content=content,
-            products=products,
-            pool=pool,
+            payload=payload,
             pem=pem,
             issuer=self._read_issuer(x509),
         )
@@ -460,6 +469,63 @@ class _CertFactory:
             raise CertificateException("Error decompressing/parsing certificate payload.")
 
 
+class _EntitlementPayload:
+    """
+    Entitlement data of v3 entitlement certificate. The data are decompressed and
+    parsed, when some of its sections (order, content, products or pool) is needed
+    for the first time. The data are not copied from the PEM text of certificate
+    until they are decoded.
+    """
+
+    __slots__ = ("_factory", "_pem", "_begin", "_end", "_payload")
+
+    SECTIONS = ("order", "content", "products", "pool")
+
+    def __init__(self, factory: _CertFactory, pem: str, begin: int, end: int):
+        self._factory: _CertFactory = factory
+        # Base64 encoded data are pem[begin:end]
+        self._pem: Optional[str] = pem
+        self._begin: int = begin
+        self._end: int = end
+        self._payload: Optional[dict] = None
+
+    def check(self) -> None:
+        """
+        Check that the data are base64 encoded and zlib compressed without decoding
+        all the data. Raises CertificateException, when the data are corrupted.
+        """
+        pem: str = self._pem
+        if BASE64_DATA.fullmatch(pem, self._begin, self._end) is None:
+            raise CertificateException("Certificate payload is not base64 encoded.")
+        whitespaces: int = sum(pem.count(char, self._begin, self._end) for char in " \t\r\n")
+        if (self._end - self._begin - whitespaces) % 4 != 0:
+            raise CertificateException("Certificate payload has incorrect padding.")
+        prefix = BASE64_PREFIX.match(pem, self._begin, self._end)
+        if prefix is None:
+            raise CertificateException("Certificate payload is too short.")
+        header: bytes = base64.b64decode(prefix.group(1))
+        # Compression method deflate and check bits of zlib header (RFC 1950)
+        if header[0] & 0x0F != 8 or (header[0] << 8 | header[1]) % 31 != 0:
+            raise CertificateException("Certificate payload is not zlib compressed.")
+
+    def parse(self, section: str) -> Any:
+        """
+        Create the section of entitlement data. The data are decoded only once.
+        """
+        try:
+            if self._payload is None:
+                data: str = self._pem[self._begin : self._end]
+                self._payload = self._factory._decompress_payload(base64.b64decode(data))
+                self._pem = None
+            parse = getattr(self._factory, "_parse_v3_%s" % section)
+            return parse(self._payload)
+        except CertificateException:
+            raise
+        except Exception as e:
+            log.exception(e)
+            raise CertificateException("Error parsing %s of certificate payload: %s" % (section, e))
+
+
 class Version:
     """Small wrapper for version string comparisons."""
 
@@ -495,6 +561,19 @@ class _Extensions2(Extensions):
 class Certificate:
     """Parent class of all x509 certificate types."""
 
+    __slots__ = (
+        "x509",
+        "path",
+        "version",
+        "serial",
+        "start",
+        "end",
+        "valid_range",
+        "pem",
+        "subject",
+        "issuer",
+    )
+
     def __init__(
         self,
         x509: Optional[_certificate.X509] = None,
@@ -594,12 +673,16 @@ class Certificate:
 
 
 class IdentityCertificate(Certificate):
+    __slots__ = ("alt_name",)
+
     def __init__(self, alt_name: Optional[str] = None, **kwargs):
         Certificate.__init__(self, **kwargs)
         self.alt_name: Optional[str] = alt_name
 
 
 class ProductCertificate(Certificate):
+    __slots__ = ("products",)
+
     def __init__(self, products: List["Product"] = None, **kwargs):
         Certificate.__init__(self, **kwargs)
 
@@ -611,20 +694,76 @@ class ProductCertificate(Certificate):
 
 
 class EntitlementCertificate(ProductCertificate):
+    __slots__ = ("_payload", "_sections", "extensions", "_path_tree_object", "_path_matcher_object")
+
     def __init__(
         self,
         order: Optional["Order"] = None,
         content: Optional[List["Content"]] = None,
         pool: Optional["Pool"] = None,
         extensions: Optional[Extensions] = None,
+        payload: Optional[_EntitlementPayload] = None,
         **kwargs,
     ):
-        ProductCertificate.__init__(self, **kwargs)
-        self.order: Optional[Order] = order
-        self.content: Optional[List[Content]] = content
-        self.pool: Optional[Pool] = pool
+        # When the payload of v3 certificate is given, then order, content, products
+        # and pool are created from the payload, when they are needed.
+        self._payload: Optional[_EntitlementPayload] = payload
+        self._sections: Dict[str, Any] = {}
+        if payload is None:
+            ProductCertificate.__init__(self, **kwargs)
+            self.order = order
+            self.content = content
+            self.pool = pool
+        else:
+            # ProductCertificate.__init__() would set empty list of products instead
+            # of products parsed from the payload
+            Certificate.__init__(self, **kwargs)
         self.extensions: Optional[Extensions] = extensions
         self._path_tree_object = None
+        self._path_matcher_object = None
+
+    def _get_section(self, section: str) -> Any:
+        if section not in self._sections:
+            if self._payload is None:
+                self._sections[section] = None
+            else:
+                self._sections[section] = self._payload.parse(section)
+                if len(self._sections) == len(_EntitlementPayload.SECTIONS):
+                    # Decoded entitlement data are not needed anymore
+                    self._payload = None
+        return self._sections[section]
+
+    @property
+    def order(self) -> Optional["Order"]:
+        return self._get_section("order")
+
+    @order.setter
+    def order(self, order: Optional["Order"]) -> None:
+        self._sections["order"] = order
+
+    @property
+    def content(self) -> Optional[List["Content"]]:
+        return self._get_section("content")
+
+    @content.setter
+    def content(self, content: Optional[List["Content"]]) -> None:
+        self._sections["content"] = content
+
+    @property
+    def products(self) -> List["Product"]:
+        return self._get_section("products")
+
+    @products.setter
+    def products(self, products: List["Product"]) -> None:
+        self._sections["products"] = products
+
+    @property
+    def pool(self) -> Optional["Pool"]:
+        return self._get_section("pool")
+
+    @pool.setter
+    def pool(self, pool: Optional["Pool"]) -> None:
+        self._sections["pool"] = pool
 
     @property
     def entitlement_type(self) -> str:
@@ -651,10 +790,26 @@ class EntitlementCertificate(ProductCertificate):
             self._path_tree_object = PathTree(data)
         return self._path_tree_object
 
+    @property
+    def _path_matcher(self) -> PathMatcher:
+        """
+        :return:    PathMatcher object compiled from this cert's extensions
+
+        :raise: AttributeError if self.version.major < 3
+        """
+        if self.version.major < 3:
+            raise AttributeError("path matcher not used for v%d certs" % self.version.major)
+        if not self._path_matcher_object:
+            data: Extensions = self.extensions[EXT_ENT_PAYLOAD]
+            if not data:
+                raise AttributeError("Certificate has empty entitlement data extension")
+            self._path_matcher_object = PathMatcher.for_payload(data, self.serial)
+        return self._path_matcher_object
+
     @property
     def provided_paths(self):
         paths = []
-        self._path_tree.build_path_list(paths)
+        self._path_matcher.build_path_list(paths)
         return paths
 
     def is_expiring(self, on_date=None):
@@ -686,7 +841,20 @@ class EntitlementCertificate(ProductCertificate):
         if self.version.major < 3:
             return self._check_v1_path(path)
         else:
-            return self._path_tree.match_path(path)
+            return self._path_matcher.match_path(path)
+
+    def check_paths(self, paths):
+        """
+        Checks more paths at once. See check_path().
+
+        :param paths:   paths to which access is being requested
+        :return:    list of results in the same order as given paths
+        """
+        paths = [posixpath.normpath(path) for path in paths]
+        if self.version.major < 3:
+            return [self._check_v1_path(path) for path in paths]
+        else:
+            return self._path_matcher.match_paths(paths)
 
     def _check_v1_path(self, path: str) -> bool:
         """
@@ -763,6 +931,8 @@ class Product:
     Represents the product information from a certificate.
     """
 
+    __slots__ = ("id", "name", "version", "architectures", "provided_tags", "brand_type", "brand_name")
+
     def __init__(
         self,
         id: Optional[str] = None,
@@ -778,24 +948,24 @@ class Product:
         if id is None:
             raise CertificateException("Product missing ID")
 
-        self.id: Optional[str] = id
-        self.name: Optional[str] = name
-        self.version: Optional[str] = version
+        self.id: Optional[str] = _intern(id)
+        self.name: Optional[str] = _intern(name)
+        self.version: Optional[str] = _intern(version)
 
-        self.architectures: List[str] = architectures
+        self.architectures: List[str] = _intern(architectures)
         # If this is sent in as a string split it, as the field
         # can technically be multi-valued:
         if isinstance(architectures, str):
-            self.architectures = parse_tags(architectures)
+            self.architectures = _intern(parse_tags(architectures))
         if self.architectures is None:
             self.architectures = []
 
-        self.provided_tags: List[str] = provided_tags
+        self.provided_tags: List[str] = _intern(provided_tags)
         if self.provided_tags is None:
             self.provided_tags = []
 
-        self.brand_type: Optional[str] = brand_type
-        self.brand_name: Optional[str] = brand_name
+        self.brand_type: Optional[str] = _intern(brand_type)
+        self.brand_name: Optional[str] = _intern(brand_name)
 
     def __eq__(self, other: "Product") -> bool:
         return self.id == other.id
@@ -807,6 +977,30 @@ class Order:
     originated from.
     """
 
+    __slots__ = (
+        "name",
+        "number",
+        "sku",
+        "subscription",
+        "quantity",
+        "quantity_used",
+        "virt_limit",
+        "stacking_id",
+        "socket_limit",
+        "warning_period",
+        "contract",
+        "account",
+        "provides_management",
+        "service_level",
+        "service_type",
+        "usage",
+        "roles",
+        "addons",
+        "virt_only",
+        "ram_limit",
+        "core_limit",
+    )
+
     def __init__(
         self,
         name=None,
@@ -831,9 +1025,9 @@ class Order:
         usage=None,
         addons=None,
     ):
-        self.name = name
+        self.name = _intern(name)
         self.number = number  # order number
-        self.sku = sku  # aka the marketing product
+        self.sku = _intern(sku)  # aka the marketing product
 
         self.subscription = subscription  # seems to be unused
 
@@ -855,11 +1049,11 @@ class Order:
 
         self.provides_management = provides_management or False
 
-        self.service_level = service_level
-        self.service_type = service_type
-        self.usage = usage
-        self.roles = roles
-        self.addons = addons
+        self.service_level = _intern(service_level)
+        self.service_type = _intern(service_type)
+        self.usage = _intern(usage)
+        self.roles = _intern(roles)
+        self.addons = _intern(addons)
 
         self.virt_only = virt_only or False
 
@@ -871,6 +1065,19 @@ class Order:
 
 
 class Content:
+    __slots__ = (
+        "content_type",
+        "name",
+        "label",
+        "vendor",
+        "url",
+        "gpg",
+        "enabled",
+        "metadata_expire",
+        "required_tags",
+        "arches",
+    )
+
     def __init__(
         self,
         content_type=None,
@@ -887,12 +1094,12 @@ class Content:
         if (name is None) or (label is None):
             raise CertificateException("Content missing name/label")
 
-        self.content_type = content_type
-        self.name = name
-        self.label = label
-        self.vendor = vendor
-        self.url = url
-        self.gpg = gpg
+        self.content_type = _intern(content_type)
+        self.name = _intern(name)
+        self.label = _intern(label)
+        self.vendor = _intern(vendor)
+        self.url = _intern(url)
+        self.gpg = _intern(gpg)
 
         if not content_type:
             raise CertificateException("Content does not have a type set.")
@@ -907,9 +1114,9 @@ class Content:
             self.enabled = True
 
         self.metadata_expire = metadata_expire
-        self.required_tags = required_tags or []
+        self.required_tags = _intern(required_tags) or []
 
-        self.arches = arches or []
+        self.arches = _intern(arches) or []
 
     def __eq__(self, other):
         return isinstance(other, self.__class__) and (self.label == other.label)
@@ -931,6 +1138,8 @@ class Pool:
     Represents the pool an entitlement originates from.
     """
 
+    __slots__ = ("id",)
+
     def __init__(self, id=None):
         if id is None:
             raise CertificateException("Pool is missing ID")
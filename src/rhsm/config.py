@@ -60,6 +60,7 @@ SERVER_DEFAULTS = {
     "proxy_port": "",
     "proxy_password": "",
     "no_proxy": "",
+    "compression": "0",
 }
 RHSM_DEFAULTS = {
     "baseurl": "https://" + DEFAULT_CDN_HOSTNAME,
@@ -77,6 +78,7 @@ RHSM_DEFAULTS = {
     "auto_enable_yum_plugins": "1",
     "package_profile_on_trans": "0",
     "inotify": "1",
+    "inotify_debounce": "500",
     "progress_messages": "1",
     "certificate_algorithms": "legacy",
 }
@@ -15,17 +15,22 @@
 #
 
 import base64
+import codecs
 from rhsm import certificate
 import datetime
 import dateutil.parser
+import gzip
+import io
 import locale
 import logging
 import os
 import socket
 import sys
+import threading
 import time
 import traceback
-from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from pathlib import Path
 import re
 import enum
@@ -40,6 +45,7 @@ from urllib.parse import urlencode, urlparse, quote, quote_plus
 from rhsm.config import get_config_parser
 from rhsm import ourjson as json
 from rhsm import utils
+from rhsm import timing
 
 try:
     import subscription_manager.version
@@ -164,6 +170,18 @@ class BadCertificateException(ConnectionException):
         return "Bad certificate at %s" % self.cert_path
 
 
+class _ReusedConnectionClosed(ConnectionError):
+    """
+    Raised, when the server closed reused keep-alive connection (e.g. idle connection
+    from the pool) before the request was sent or the response was received. The request
+    is sent once again using new connection. The original error is in exc.
+    """
+
+    def __init__(self, exc: OSError):
+        super(_ReusedConnectionClosed, self).__init__(str(exc))
+        self.exc = exc
+
+
 class ConnectionOSErrorException(ConnectionException):
     """
     Thrown in case of OSError during the connect() of HTTPSConnection,
@@ -223,12 +241,16 @@ class BaseConnection:
         correlation_id: Optional[str] = None,
         timeout: Optional[int] = None,
         auth_type: Optional[ConnectionType] = None,
+        compression: Optional[bool] = None,
         **kwargs,
     ) -> None:
         self.host = host or config.get("server", "hostname")
         self.handler = handler or config.get("server", "prefix")
         self.ssl_port = ssl_port or safe_int(config.get("server", "port"))
         self.timeout = timeout or safe_int(config.get("server", "server_timeout"))
+        if compression is None:
+            compression = bool(safe_int(config.get("server", "compression")))
+        self.compression = compression
 
         # allow specifying no_proxy via api or config
         no_proxy_override = no_proxy or config.get("server", "no_proxy")
@@ -338,6 +360,7 @@ class BaseConnection:
             correlation_id=correlation_id,
             user_agent=user_agent,
             auth_type=auth_type,
+            compression=self.compression,
         )
 
         if using_keycloak_auth:
@@ -541,6 +564,100 @@ def _encode_auth(username, password):
 # Give server one second to close the connection
 CLOSE_CONNECTION_TIMEOUT = 1
 
+# Capability of server, which can accept gzip compressed body of requests
+REQUEST_COMPRESSION_CAPABILITY = "request_compression"
+
+
+# Size of chunk read from socket, when response is decoded incrementally
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def iter_json_array(stream: Any, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Incrementally decode JSON document read from stream (e.g. HTTP response). When the document
+    is JSON array, then items of the array are yielded one by one and only the current item and
+    undecoded data of similar size are held in memory. Any other JSON document is yielded as one item.
+    Empty document does not yield anything.
+    :param stream: object with read() method returning bytes
+    :param chunk_size: number of bytes read from stream at once
+    :return: iterator of decoded items
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    # Decoded text and offset of the first character, which was not consumed yet
+    buf = ""
+    pos = 0
+    eof = False
+
+    def read_more(size: int = 0) -> bool:
+        """
+        Read at least one chunk and at least size characters from the stream. The consumed
+        prefix of the buffer is trimmed. Return False, when the stream is at the end.
+        """
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        pieces = [buf[pos:]]
+        read = 0
+        while True:
+            data = stream.read(chunk_size)
+            if not data:
+                eof = True
+                pieces.append(text_decoder.decode(b"", final=True))
+                break
+            pieces.append(text_decoder.decode(data))
+            read += len(pieces[-1])
+            if read >= size:
+                break
+        buf = "".join(pieces)
+        pos = 0
+        return True
+
+    def skip_whitespace() -> Optional[str]:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\n\r":
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not read_more():
+                return None
+
+    first = skip_whitespace()
+    if first is None:
+        return
+    if first != "[":
+        while read_more(len(buf) - pos):
+            pass
+        yield json.loads(buf[pos:])
+        return
+
+    pos += 1
+    if skip_whitespace() == "]":
+        return
+    while True:
+        if skip_whitespace() is None:
+            raise json.JSONDecodeError("Unterminated JSON array", buf, pos)
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            # The item is incomplete. The buffered part of the item is at least doubled,
+            # before it is decoded again, so large items are not decoded for every chunk.
+            if read_more(len(buf) - pos):
+                continue
+            raise
+        # Number at the end of buffer could be truncated (e.g. "-1.5" of "-1.5e3")
+        if (end == len(buf) or buf[end] not in " \t\n\r,]") and read_more():
+            continue
+        pos = end
+        yield item
+        separator = skip_whitespace()
+        if separator == "]":
+            return
+        if separator != ",":
+            raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos)
+        pos += 1
+
 
 # FIXME: this is terrible, we need to refactor
 # Restlib to be Restlib based on a https client class
@@ -572,6 +689,63 @@ class ContentConnection(BaseConnection):
         pass
 
 
+# Encodings of HTTP body, which can be decoded
+CONTENT_ENCODINGS = ("gzip", "deflate")
+
+# Request body smaller than this number of bytes is not worth compressing
+COMPRESSION_THRESHOLD = 1024
+
+
+class _DecompressingReader:
+    """
+    File-like object decompressing gzip or deflate encoded body of HTTP response,
+    while the body is read from the stream
+    """
+
+    def __init__(self, stream: Any) -> None:
+        self.stream = stream
+        # Detect zlib or gzip header automatically
+        self._decompressor = zlib.decompressobj(zlib.MAX_WBITS | 32)
+        self._started = False
+        self._eof = False
+
+    def _decompress(self, data: bytes) -> bytes:
+        try:
+            decompressed = self._decompressor.decompress(data)
+        except zlib.error:
+            if self._started:
+                raise
+            # Some servers send raw deflate data without zlib header
+            self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            decompressed = self._decompressor.decompress(data)
+        self._started = True
+        return decompressed
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof:
+            data = self.stream.read(size) if size is not None and size > 0 else self.stream.read()
+            if not data:
+                self._eof = True
+                return self._decompressor.flush()
+            decompressed = self._decompress(data)
+            if decompressed:
+                return decompressed
+        return b""
+
+
+def decode_content(content: bytes, content_encoding: Optional[str]) -> bytes:
+    """
+    Decode body of HTTP response according to HTTP header Content-Encoding
+    :param content: raw body of response
+    :param content_encoding: value of Content-Encoding header
+    :return: decoded body
+    """
+    if not content_encoding or content_encoding.strip().lower() not in CONTENT_ENCODINGS:
+        return content
+    reader = _DecompressingReader(io.BytesIO(content))
+    return b"".join(iter(lambda: reader.read(STREAM_CHUNK_SIZE), b""))
+
+
 def _get_locale() -> Union[None, str]:
     new_locale = None
     try:
@@ -590,6 +764,280 @@ def _get_locale() -> Union[None, str]:
     return None
 
 
+class _ResumableSSLContext(ssl.SSLContext):
+    """
+    SSL context remembering the latest TLS session negotiated with the server. The session
+    is offered for resumption, when new connection is created using this context, and
+    abbreviated TLS handshake can be used instead of full TLS handshake.
+    """
+
+    tls_session: Optional[ssl.SSLSession] = None
+
+    def wrap_socket(self, sock, *args, **kwargs):
+        if kwargs.get("session") is None and self.tls_session is not None:
+            kwargs["session"] = self.tls_session
+        return super().wrap_socket(sock, *args, **kwargs)
+
+
+def _close_https_connection(conn: httplib.HTTPSConnection) -> None:
+    """
+    Try to do proper TLS shutdown handshake and close TCP connection
+    :param conn: HTTPS connection
+    :return: None
+    """
+    # Do proper TLS shutdown handshake (TLS tear down) first
+    if conn.sock is not None:
+        log.debug(f"Closing HTTPS connection {conn.sock}")
+        try:
+            # Wait for 1 second to allow graceful shutdown of TLS connection
+            conn.sock.settimeout(CLOSE_CONNECTION_TIMEOUT)
+            conn.sock.unwrap()
+        except Exception as err:
+            log.debug(f"Unable to close TLS connection: {err}")
+        else:
+            log.debug("TLS connection closed")
+    # Then it is possible to close TCP connection
+    try:
+        log.debug("Closing TCP connection")
+        conn.close()
+    except Exception as err:
+        log.info(f"Unable to close TCP connection: {err}")
+    else:
+        log.debug("TCP connection closed")
+
+
+def _is_connection_reusable(conn: httplib.HTTPSConnection, now: Optional[float] = None) -> bool:
+    """
+    Check if it is still possible to use existing connection (connection is still open,
+    keep-alive timeout has not been reached and maximal number of requests has not been reached)
+    """
+    if conn.sock is None:
+        log.debug("Connection is not opened")
+        return False
+    if getattr(conn, "streamed_response", None) is not None:
+        log.debug("Response has not been read from connection yet")
+        return False
+    if now is None:
+        now = time.time()
+    if now - conn.last_request_time > conn.keep_alive_timeout:
+        log.debug(f"Connection timeout {conn.keep_alive_timeout} reached")
+        return False
+    if conn.max_requests_num is not None and conn.requests_num >= conn.max_requests_num:
+        log.debug(f"Maximal number of requests ({conn.max_requests_num}) reached")
+        return False
+    return True
+
+
+class ConnectionPool:
+    """
+    Pool of idle HTTPS connections shared by all instances of BaseRestLib. Connections are
+    keyed by server, proxy and client certificate. Instance of BaseRestLib checks out
+    connection from the pool for the time of request and it returns the connection back
+    to the pool, when the server wants to keep the connection. Connections idle for longer
+    time than keep-alive timeout of the server are evicted from the pool.
+
+    The pool also caches SSL contexts. It is not necessary to load all CA certificates
+    and client certificate for every new connection, and TLS session stored in the SSL
+    context can be resumed.
+
+    The pool is thread-safe. More idle connections with the same key can be kept in the
+    pool, so more threads (e.g. handlers of D-Bus methods) can use connections to the same
+    server at the same time. Every connection is used only by one thread at the time.
+    """
+
+    # Maximal number of idle connections in the pool
+    MAX_IDLE_CONNECTIONS: int = 8
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._idle: Dict[tuple, List[httplib.HTTPSConnection]] = {}
+        self._contexts: Dict[tuple, ssl.SSLContext] = {}
+
+    def get_context(self, context_key: tuple) -> Optional[ssl.SSLContext]:
+        """
+        Try to get cached SSL context
+        """
+        with self._lock:
+            return self._contexts.get(context_key)
+
+    def set_context(self, context_key: tuple, context: ssl.SSLContext) -> None:
+        """
+        Cache SSL context. SSL contexts created for the same server and client certificate,
+        but for older versions of certificates, are dropped from the cache.
+        """
+        with self._lock:
+            for key in [key for key in self._contexts if key[0] == context_key[0]]:
+                del self._contexts[key]
+            self._contexts[context_key] = context
+
+    def checkout(self, key: tuple) -> Optional[httplib.HTTPSConnection]:
+        """
+        Try to get idle connection for given key. Returned connection is removed from the pool
+        and the caller is responsible for returning it back using checkin().
+        """
+        to_close = []
+        conn = None
+        with self._lock:
+            connections = self._idle.get(key, [])
+            # The most recently used connection is the least likely to be closed by the server
+            while connections and conn is None:
+                conn = connections.pop()
+                if not _is_connection_reusable(conn):
+                    to_close.append(conn)
+                    conn = None
+            if not connections:
+                self._idle.pop(key, None)
+        for idle_conn in to_close:
+            _close_https_connection(idle_conn)
+        return conn
+
+    def checkin(self, conn: httplib.HTTPSConnection) -> None:
+        """
+        Return connection back to the pool. When the pool is full, then the connection
+        idle for the longest time is closed.
+        """
+        to_close = self._evict_idle()
+        with self._lock:
+            connections = self._idle.setdefault(conn.pool_key, [])
+            if conn not in connections:
+                connections.append(conn)
+            while self._idle_count() > self.MAX_IDLE_CONNECTIONS:
+                oldest_key = min(self._idle, key=lambda key: self._idle[key][0].last_request_time)
+                to_close.append(self._idle[oldest_key].pop(0))
+                if not self._idle[oldest_key]:
+                    del self._idle[oldest_key]
+        for idle_conn in to_close:
+            _close_https_connection(idle_conn)
+
+    def idle_count(self) -> int:
+        """
+        Number of idle connections in the pool
+        """
+        with self._lock:
+            return self._idle_count()
+
+    def _idle_count(self) -> int:
+        return sum(len(connections) for connections in self._idle.values())
+
+    def _evict_idle(self) -> List[httplib.HTTPSConnection]:
+        """
+        Remove connections, which cannot be used anymore, from the pool
+        :return: list of removed connections
+        """
+        now = time.time()
+        expired = []
+        with self._lock:
+            for key in list(self._idle):
+                connections = self._idle[key]
+                expired.extend(conn for conn in connections if not _is_connection_reusable(conn, now))
+                connections[:] = [conn for conn in connections if conn not in expired]
+                if not connections:
+                    del self._idle[key]
+        return expired
+
+    def close_all(self) -> None:
+        """
+        Close all idle connections and drop cached SSL contexts
+        """
+        with self._lock:
+            connections = [conn for key_connections in self._idle.values() for conn in key_connections]
+            self._idle.clear()
+            self._contexts.clear()
+        for conn in connections:
+            _close_https_connection(conn)
+
+
+connection_pool = ConnectionPool()
+
+
+class ResponseValidators:
+    """
+    Validators (ETag and Last-Modified headers) of previous response of GET request.
+    When they are passed to the request, then conditional headers are sent and the
+    server can respond with 304 Not Modified. In that case not_modified is set to True
+    and the previous response can be used. Otherwise, the validators are updated
+    from the headers of the new response.
+    """
+
+    def __init__(self, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        self.etag: Optional[str] = etag
+        self.last_modified: Optional[str] = last_modified
+        self.not_modified: bool = False
+
+    def __bool__(self) -> bool:
+        return self.etag is not None or self.last_modified is not None
+
+    def to_headers(self) -> Dict[str, str]:
+        """
+        Return conditional HTTP headers of request
+        """
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def update(self, status: int, headers: Dict[str, str]) -> None:
+        """
+        Update the validators from the status and the headers of the response
+        """
+        self.not_modified = status == 304
+        if self.not_modified:
+            return
+        headers = {name.lower(): value for name, value in headers.items()}
+        self.etag = headers.get("etag")
+        self.last_modified = headers.get("last-modified")
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        return {"etag": self.etag, "last_modified": self.last_modified}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Optional[str]]) -> "ResponseValidators":
+        return cls(etag=data.get("etag"), last_modified=data.get("last_modified"))
+
+
+class ResponsePaging:
+    """
+    Paging of the response of GET request, which requested one page of items. Server
+    advertises paging using X-Total-Count header with the number of all items and Link
+    header with links to other pages. When the server does not advertise paging, then
+    it is not possible to say, whether the page and the number of items per page were
+    respected by the server.
+    """
+
+    def __init__(self):
+        self.total_count: Optional[int] = None
+        self.links: Dict[str, str] = {}
+
+    @property
+    def advertised(self) -> bool:
+        return self.total_count is not None or bool(self.links)
+
+    @property
+    def has_next(self) -> bool:
+        return "next" in self.links
+
+    def update(self, headers: Dict[str, str]) -> None:
+        """
+        Update the paging from the headers of the response
+        """
+        headers = {name.lower(): value for name, value in headers.items()}
+        try:
+            self.total_count = int(headers["x-total-count"])
+        except (KeyError, ValueError):
+            self.total_count = None
+        self.links = {}
+        # Link: <url>; rel="next", <url>; rel="last"
+        for link in headers.get("link", "").split(","):
+            url, _sep, params = link.partition(";")
+            for param in params.split(";"):
+                name, _sep, value = param.partition("=")
+                if name.strip().lower() == "rel":
+                    for rel in value.strip().strip('"').split():
+                        self.links[rel.lower()] = url.strip().strip("<>")
+
+
 class BaseRestLib:
     """
     A low-level wrapper around httplib
@@ -597,7 +1045,7 @@ class BaseRestLib:
     responses
     """
 
-    __conn = None
+    _thread_local = None
 
     # The latest time drift (time difference between host and candlepin
     # server) of the latest connection(s) to candlepin server.
@@ -610,6 +1058,8 @@ class BaseRestLib:
     # tomcat 60 seconds)
     KEEP_ALIVE_TIMEOUT: int = 50
 
+    STREAM_CHUNK_SIZE: int = STREAM_CHUNK_SIZE
+
     def __init__(
         self,
         host: str,
@@ -631,8 +1081,11 @@ class BaseRestLib:
         token: Optional[str] = None,
         user_agent: Optional[str] = None,
         auth_type: Optional[ConnectionType] = None,
+        compression: Optional[bool] = False,
     ) -> None:
         log.debug("Creating new BaseRestLib instance")
+        # Connection used by this instance is not shared between threads
+        self._thread_local = threading.local()
         self.host = host
         self.ssl_port = ssl_port
         self.apihandler = apihandler
@@ -664,6 +1117,9 @@ class BaseRestLib:
         self.smoothed_rt = None
         self.token = token
         self.auth_type = auth_type
+        # When compression is allowed, then compressed responses are accepted and
+        # request bodies can be compressed
+        self.compression = compression
         # We set this to None, because we don't know the truth unless we get
         # first response from the server using cert/key connection
         self.is_consumer_cert_key_valid = None
@@ -674,33 +1130,112 @@ class BaseRestLib:
         elif token:
             self.headers["Authorization"] = "Bearer " + token
 
+    @property
+    def __conn(self) -> Optional[httplib.HTTPSConnection]:
+        """
+        Connection used by the current thread
+        """
+        if self._thread_local is None:
+            return None
+        return getattr(self._thread_local, "conn", None)
+
+    @__conn.setter
+    def __conn(self, conn: Optional[httplib.HTTPSConnection]) -> None:
+        if self._thread_local is None:
+            self._thread_local = threading.local()
+        self._thread_local.conn = conn
+
     def close_connection(self) -> None:
         """
         Try to close connection to server
         :return: None
         """
         if self.__conn is not None:
-            # Do proper TLS shutdown handshake (TLS tear down) first
-            if self.__conn.sock is not None:
-                log.debug(f"Closing HTTPS connection {self.__conn.sock}")
-                try:
-                    # Wait for 1 second to allow graceful shutdown of TLS connection
-                    self.__conn.sock.settimeout(CLOSE_CONNECTION_TIMEOUT)
-                    self.__conn.sock.unwrap()
-                except Exception as err:
-                    log.debug(f"Unable to close TLS connection: {err}")
-                else:
-                    log.debug("TLS connection closed")
-            # Then it is possible to close TCP connection
-            try:
-                log.debug("Closing TCP connection")
-                self.__conn.close()
-            except Exception as err:
-                log.info(f"Unable to close TCP connection: {err}")
-            else:
-                log.debug("TCP connection closed")
+            _close_https_connection(self.__conn)
         self.__conn = None
 
+    def _release_connection(self) -> None:
+        """
+        Return connection used by this instance back to the pool of connections, when
+        it is allowed to reuse connections. Otherwise, the connection is kept only by this instance.
+        :return: None
+        """
+        if self.__conn is not None and REUSE_CONNECTION is True:
+            connection_pool.checkin(self.__conn)
+            self.__conn = None
+
+    def _connection_key(self, cert_file: Optional[str], key_file: Optional[str]) -> tuple:
+        """
+        Key of connection in the pool of connections. Connection can be shared only by
+        instances using the same server, proxy server and the same client certificate.
+        """
+        return (
+            self.host,
+            safe_int(self.ssl_port),
+            self.proxy_hostname,
+            safe_int(self.proxy_port),
+            self.proxy_user,
+            self.proxy_password,
+            cert_file,
+            key_file,
+            self.ca_dir,
+            bool(self.insecure),
+        )
+
+    def _ssl_context_key(self, cert_file: Optional[str], key_file: Optional[str]) -> tuple:
+        """
+        Key of cached SSL context. The key contains modification times of all certificates
+        loaded to SSL context, because SSL context has to be created again, when some certificate
+        has been changed (e.g. the consumer certificate was regenerated).
+        """
+        mtimes = []
+        for path in (cert_file, key_file):
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns if path else None)
+            except OSError:
+                mtimes.append(None)
+        ca_certs = []
+        if not self.insecure and self.ca_dir is not None:
+            try:
+                for ca_file in sorted(os.listdir(self.ca_dir)):
+                    if ca_file.endswith(".pem"):
+                        ca_certs.append((ca_file, os.stat(os.path.join(self.ca_dir, ca_file)).st_mtime_ns))
+            except OSError:
+                pass
+        return (
+            (self.host, safe_int(self.ssl_port), cert_file, key_file, self.ca_dir, bool(self.insecure)),
+            tuple(mtimes),
+            tuple(ca_certs),
+        )
+
+    def _create_ssl_context(self, cert_file: Optional[str], key_file: Optional[str]) -> ssl.SSLContext:
+        """
+        Try to get cached SSL context. When there is no cached SSL context for given
+        client certificate, then create new one and load all CA certificates into it.
+        """
+        context_key = self._ssl_context_key(cert_file, key_file)
+        context = connection_pool.get_context(context_key)
+        if context is not None:
+            log.debug("Using cached SSL context")
+            return context
+
+        # Select the highest TLS version supported by both the client and the server.
+        context = _ResumableSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+
+        if self.insecure:
+            # Allow clients to connect to servers with missing or invalid certificates.
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        else:
+            context.verify_mode = ssl.CERT_REQUIRED
+            if self.ca_dir is not None:
+                self._load_ca_certificates(context)
+        if cert_file and os.path.exists(cert_file):
+            context.load_cert_chain(cert_file, keyfile=key_file)
+
+        connection_pool.set_context(context_key, context)
+        return context
+
     def _get_cert_key_list(self) -> List[Tuple[str, str]]:
         """
         Create list of cert-key pairs to be used with the connection
@@ -785,47 +1320,48 @@ class BaseRestLib:
             # Don't fail the connection if we can't log handshake info
             log.debug(f"Error logging TLS handshake information: {e}")
 
-    def _create_connection(self, cert_file: str = None, key_file: str = None) -> httplib.HTTPSConnection:
+    def _create_connection(
+        self, cert_file: str = None, key_file: str = None, fresh: bool = False
+    ) -> httplib.HTTPSConnection:
         """
-        This method tries to return existing connection, when connection exists and limit of connection
-        has not been reached (timeout, max number of requests). When no connection exists, then this
-        method creates new TCP and TLS connection.
+        This method tries to return existing connection (used by this instance or idle connection
+        from the pool of connections), when connection exists and limit of connection has not been
+        reached (timeout, max number of requests). When no connection exists, then this method creates
+        new TCP and TLS connection using cached SSL context. When fresh is True, then new connection
+        is always created (e.g. when the server closed connections, which are idle in the pool).
         """
 
-        if self.__conn is not None:
-            # Check if it is still possible to use existing connection
-            now = time.time()
-            if now - self.__conn.last_request_time > self.__conn.keep_alive_timeout:
-                log.debug(f"Connection timeout {self.__conn.keep_alive_timeout}. Closing connection...")
-                self.close_connection()
-            elif (
-                self.__conn.max_requests_num is not None
-                and self.__conn.requests_num > self.__conn.max_requests_num
-            ):
-                log.debug(
-                    f"Maximal number of requests ({self.__conn.max_requests_num}) reached. "
-                    "Closing connection..."
-                )
-                self.close_connection()
-            else:
-                log.debug("Reusing connection: %s", self.__conn.sock)
-                return self.__conn
+        pool_key = self._connection_key(cert_file, key_file)
+        if self.proxy_hostname and self.proxy_port:
+            self.headers["Host"] = "%s:%s" % (normalized_host(self.host), safe_int(self.ssl_port))
 
-        log.debug("Creating new connection")
+        if self.__conn is not None and getattr(self.__conn, "streamed_response", None) is not None:
+            # Connection is still used by streamed response, which will close or release it
+            self.__conn = None
 
-        # Select the highest TLS version supported by both the client and the server.
-        context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        if self.__conn is not None and self.__conn.pool_key != pool_key:
+            # Connection with different client certificate is not used by this request
+            self._release_connection()
 
-        if self.insecure:
-            # Allow clients to connect to servers with missing or invalid certificates.
-            context.check_hostname = False
-            context.verify_mode = ssl.CERT_NONE
-        else:
-            context.verify_mode = ssl.CERT_REQUIRED
-            if self.ca_dir is not None:
-                self._load_ca_certificates(context)
-        if cert_file and os.path.exists(cert_file):
-            context.load_cert_chain(cert_file, keyfile=key_file)
+        if fresh and self.__conn is not None:
+            self.close_connection()
+
+        conn = self.__conn
+        if conn is None and REUSE_CONNECTION is True and not fresh:
+            conn = connection_pool.checkout(pool_key)
+
+        if conn is not None:
+            if _is_connection_reusable(conn):
+                log.debug("Reusing connection: %s", conn.sock)
+                self.__conn = conn
+                return conn
+            log.debug("Closing connection...")
+            _close_https_connection(conn)
+            self.__conn = None
+
+        log.debug("Creating new connection")
+
+        context = self._create_ssl_context(cert_file, key_file)
 
         if self.proxy_hostname and self.proxy_port:
             log.debug(
@@ -845,7 +1381,6 @@ class BaseRestLib:
                 self.proxy_hostname, self.proxy_port, context=context, timeout=self.timeout
             )
             conn.set_tunnel(self.host, safe_int(self.ssl_port), proxy_headers)
-            self.headers["Host"] = "%s:%s" % (normalized_host(self.host), safe_int(self.ssl_port))
         else:
             conn = httplib.HTTPSConnection(self.host, self.ssl_port, context=context, timeout=self.timeout)
 
@@ -856,6 +1391,8 @@ class BaseRestLib:
         conn.requests_num = 0
         # Maximal number of requests. None means no limits, when server does not
         conn.max_requests_num = None
+        conn.last_request_time = time.time()
+        conn.pool_key = pool_key
 
         # Do TCP and TLS handshake here before we make any request
         try:
@@ -869,6 +1406,8 @@ class BaseRestLib:
                 raise ConnectionOSErrorException(self.host, self.ssl_port, self.apihandler, e)
             raise
         log.debug(f"Created connection: {conn.sock}")
+        if conn.sock is not None and getattr(conn.sock, "session_reused", False):
+            log.debug("TLS session resumed")
 
         # Store connection object only in the case, when it is not forbidden
         if REUSE_CONNECTION is True:
@@ -1081,6 +1620,8 @@ class BaseRestLib:
         body: str,
         cert_key_pairs: List[Tuple[str, str]],
         description: Optional[str] = None,
+        stream: bool = False,
+        fresh: bool = False,
     ) -> Tuple[Union[Dict[str, Any], None], Union[httplib.HTTPResponse, None]]:
         """
         Try to do HTTP request
@@ -1090,6 +1631,9 @@ class BaseRestLib:
         :param body: body of request if any
         :param cert_key_pairs: list of tuples. Tuple contain cert and key
         :param description: description of request
+        :param stream: when True, then body of successful response is not read. The connection
+            is stored in result and response has to be read using _iter_streamed_response()
+        :param fresh: when True, then new connections are used (see _create_connection())
         :return: tuple of two items. First is dictionary (content, status and header) of response.
             Second item is response from server.
         """
@@ -1097,31 +1641,62 @@ class BaseRestLib:
         result = None
         with utils.LiveStatusMessage(description):
             for cert_file, key_file in cert_key_pairs:
+                connection_reused = False
                 try:
-                    conn = self._create_connection(cert_file=cert_file, key_file=key_file)
-                    log.debug("TLS handshake: %s", self._get_tls_handshake_info())
-                    self._print_debug_info_about_request(request_type, handler, final_headers, body)
-
-                    ts_start = time.time()
-                    conn.last_request_time = ts_start
-                    conn.request(request_type, handler, body=body, headers=final_headers)
-                    ts_end = time.time()
-                    response = conn.getresponse()
-                    self._update_smoothed_response_time(ts_end - ts_start)
-
-                    result = {
-                        "content": response.read().decode("utf-8"),
-                        "status": response.status,
-                        "headers": dict(response.getheaders()),
-                    }
-                    if response.status == 200:
-                        self.is_consumer_cert_key_valid = True
-                        break  # this client cert worked, no need to try more
-                    elif self.cert_dir:
-                        log.debug(
-                            "Unable to get valid response: %s from CDN: %s"
-                            % (result, normalized_host(self.host))
+                    with timing.span(
+                        "rest", f"{request_type} {handler}", method=request_type, handler=handler
+                    ) as span_attributes:
+                        conn = self._create_connection(cert_file=cert_file, key_file=key_file, fresh=fresh)
+                        connection_reused = conn.requests_num > 0
+                        span_attributes["connection_reused"] = connection_reused
+                        span_attributes["tls_session_reused"] = bool(
+                            conn.sock is not None and getattr(conn.sock, "session_reused", False)
                         )
+                        span_attributes["request_bytes"] = len(body) if body else 0
+                        log.debug("TLS handshake: %s", self._get_tls_handshake_info())
+                        self._print_debug_info_about_request(request_type, handler, final_headers, body)
+
+                        ts_start = time.time()
+                        conn.last_request_time = ts_start
+                        conn.request(request_type, handler, body=body, headers=final_headers)
+                        ts_end = time.time()
+                        response = conn.getresponse()
+                        self._update_smoothed_response_time(ts_end - ts_start)
+                        span_attributes["status"] = response.status
+
+                        conn.requests_num += 1
+                        if stream and response.status == 200:
+                            conn.streamed_response = response
+                            # Body of streamed response is read after the span
+                            span_attributes["streamed"] = True
+                            result = {
+                                "content": "",
+                                "status": response.status,
+                                "headers": dict(response.getheaders()),
+                                "connection": conn,
+                            }
+                            self.is_consumer_cert_key_valid = True
+                            break
+                        raw_content = response.read()
+                        span_attributes["response_bytes"] = len(raw_content)
+                        content = decode_content(raw_content, response.getheader("Content-Encoding"))
+                        result = {
+                            "content": content.decode("utf-8"),
+                            "status": response.status,
+                            "headers": dict(response.getheaders()),
+                        }
+                        # TLS 1.3 session ticket is received after the handshake, so store
+                        # the TLS session, when response was read
+                        if conn.sock is not None and isinstance(conn.sock.context, _ResumableSSLContext):
+                            conn.sock.context.tls_session = conn.sock.session
+                        if response.status == 200:
+                            self.is_consumer_cert_key_valid = True
+                            break  # this client cert worked, no need to try more
+                        elif self.cert_dir:
+                            log.debug(
+                                "Unable to get valid response: %s from CDN: %s"
+                                % (result, normalized_host(self.host))
+                            )
                 except ssl.SSLError:
                     if self.cert_file and not self.cert_dir:
                         id_cert = certificate.create_from_file(self.cert_file)
@@ -1135,6 +1710,9 @@ class BaseRestLib:
                         raise ProxyException(hostname=self.proxy_hostname, port=self.proxy_port, exc=err)
                     raise
                 except (socket.error, OSError) as err:
+                    # Server could close the idle connection, while it was in the pool
+                    if connection_reused and isinstance(err, (BrokenPipeError, ConnectionResetError)):
+                        raise _ReusedConnectionClosed(err) from err
                     # If we get a ConnectionError here and we are using a proxy,
                     # then the issue was the connection to the proxy, not to the
                     # destination host.
@@ -1160,6 +1738,10 @@ class BaseRestLib:
         headers: dict = None,
         cert_key_pairs: Optional[List[Tuple[str, str]]] = None,
         description: Optional[str] = None,
+        stream: bool = False,
+        compress: bool = False,
+        validators: Optional[ResponseValidators] = None,
+        paging: Optional[ResponsePaging] = None,
     ) -> Dict[str, Any]:
         """
         Make HTTP request to candlepin server
@@ -1169,6 +1751,12 @@ class BaseRestLib:
         :param headers: dictionary with HTTP headers
         :param cert_key_pairs: list of tuples. Tuple contain cert and key
         :param description: description of request
+        :param stream: do not read body of successful response (see _make_request())
+        :param compress: compress body of request using gzip, when compression is allowed
+            and the body is big enough. Caller has to check that server supports it.
+        :param validators: validators of previous response. Conditional headers are sent
+            and the validators are updated from the response (see ResponseValidators).
+        :param paging: paging updated from the response (see ResponsePaging)
         :return: Dictionary (content, status and headers) of response.
         """
         handler = self.apihandler + method
@@ -1193,7 +1781,7 @@ class BaseRestLib:
         else:
             body = None
 
-        if self.__conn is not None:
+        if REUSE_CONNECTION is True:
             self.headers["Connection"] = "keep-alive"
 
         log.debug("Making request: %s %s" % (request_type, handler))
@@ -1204,21 +1792,33 @@ class BaseRestLib:
         final_headers = self.headers.copy()
         if body is None:
             final_headers["Content-Length"] = "0"
+        if self.compression:
+            final_headers["Accept-Encoding"] = ", ".join(CONTENT_ENCODINGS)
+            if compress and body is not None and len(body) >= COMPRESSION_THRESHOLD:
+                if isinstance(body, str):
+                    body = body.encode("utf-8")
+                compressed_body = gzip.compress(body)
+                log.debug(f"Request body compressed from {len(body)} to {len(compressed_body)} bytes")
+                body = compressed_body
+                final_headers["Content-Encoding"] = "gzip"
         if headers:
             final_headers.update(headers)
+        if validators is not None:
+            final_headers.update(validators.to_headers())
 
         # Try to do request, when it wasn't possible, because server closed connection,
         # then close existing connection and try it once again
         try:
             result, response = self._make_request(
-                request_type, handler, final_headers, body, cert_key_pairs, description
+                request_type, handler, final_headers, body, cert_key_pairs, description, stream
             )
-        except httplib.RemoteDisconnected:
-            log.debug("Connection closed by server")
+        except (httplib.RemoteDisconnected, _ReusedConnectionClosed) as err:
+            log.debug(f"Connection closed by server: {err}")
             self.close_connection()
-            log.debug("Trying request once again")
+            log.debug("Trying request once again using new connection")
+            # Other idle connections in the pool could be closed by the server too
             result, response = self._make_request(
-                request_type, handler, final_headers, body, cert_key_pairs, description
+                request_type, handler, final_headers, body, cert_key_pairs, description, stream, fresh=True
             )
 
         self._print_debug_info_about_response(result)
@@ -1236,8 +1836,12 @@ class BaseRestLib:
         if connection_http_header == "keep-alive":
             log.debug("Server wants to keep connection")
         elif connection_http_header == "close":
-            log.debug("Server wants to close connection. Closing HTTP connection")
-            self.close_connection()
+            if "connection" in result:
+                # Connection will be closed, when streamed response is read
+                log.debug("Server wants to close connection")
+            else:
+                log.debug("Server wants to close connection. Closing HTTP connection")
+                self.close_connection()
         elif connection_http_header == "":
             log.debug("HTTP header 'Connection' not included in response")
         else:
@@ -1252,9 +1856,14 @@ class BaseRestLib:
                 self.__conn.keep_alive_timeout = keep_alive_timeout
                 log.debug(f"Connection timeout: {keep_alive_timeout} is used from 'Keep-Alive' HTTP header")
             if max_requests_num is not None:
-                self.__conn.max_request_num = max_requests_num
+                self.__conn.max_requests_num = max_requests_num
                 log.debug(f"Max number of requests: {max_requests_num} is used from 'Keep-Alive' HTTP header")
 
+        # Connection is not used by this instance until next request. Connection of streamed
+        # response is released, when the whole response is read.
+        if "connection" not in result:
+            self._release_connection()
+
         # Look for a time drift and log if the system is significantly different from server clock
         response_sent_at: Optional[str] = response.getheader("date")
         if response_sent_at is not None:
@@ -1278,6 +1887,13 @@ class BaseRestLib:
 
         self.validateResult(result, request_type, handler)
 
+        if validators is not None:
+            validators.update(result["status"], result["headers"])
+            if validators.not_modified:
+                log.debug(f"Response of {request_type} {handler} not modified")
+        if paging is not None:
+            paging.update(result["headers"])
+
         return result
 
     @classmethod
@@ -1436,17 +2052,88 @@ class BaseRestLib:
         headers: dict = None,
         cert_key_pairs: List[Tuple[str, str]] = None,
         description: Optional[str] = None,
+        validators: Optional[ResponseValidators] = None,
     ) -> Any:
+        """
+        Make GET request. When validators are given and the server responds with
+        304 Not Modified, then None is returned and validators.not_modified is True.
+        """
         result: Dict[str, Any] = self._request(
-            "GET", method, headers=headers, cert_key_pairs=cert_key_pairs, description=description
+            "GET",
+            method,
+            headers=headers,
+            cert_key_pairs=cert_key_pairs,
+            description=description,
+            validators=validators,
         )
         return self._extract_content_from_response(result)
 
+    def request_get_stream(
+        self,
+        method: str,
+        headers: dict = None,
+        cert_key_pairs: List[Tuple[str, str]] = None,
+        description: Optional[str] = None,
+        validators: Optional[ResponseValidators] = None,
+        paging: Optional[ResponsePaging] = None,
+    ) -> Iterator[Any]:
+        """
+        Similar to request_get(), but the JSON response is decoded incrementally, while it is read
+        from the connection. When the response is JSON array, then items of the array are yielded
+        one by one. Whole body of response is not held in memory. The request is sent, when the
+        first item is requested, and the iterator should be consumed before next request is sent.
+        """
+        result: Dict[str, Any] = self._request(
+            "GET",
+            method,
+            headers=headers,
+            cert_key_pairs=cert_key_pairs,
+            description=description,
+            stream=True,
+            validators=validators,
+            paging=paging,
+        )
+        if "connection" not in result:
+            content = self._extract_content_from_response(result)
+            if isinstance(content, list):
+                yield from content
+            elif content is not None:
+                yield content
+            return
+        yield from self._iter_streamed_response(result["connection"])
+
+    def _iter_streamed_response(self, conn: httplib.HTTPSConnection) -> Iterator[Any]:
+        """
+        Decode items of response, which has not been read yet. When the response is read,
+        then the connection is released, or it is closed, when the response was not read completely.
+        """
+        response = conn.streamed_response
+        reader = response
+        if (response.getheader("Content-Encoding") or "").strip().lower() in CONTENT_ENCODINGS:
+            reader = _DecompressingReader(response)
+        try:
+            yield from iter_json_array(reader, self.STREAM_CHUNK_SIZE)
+            # Read trailing whitespaces (and end of compressed data)
+            response.read()
+        finally:
+            conn.streamed_response = None
+            if self.__conn is conn:
+                self.__conn = None
+            if response.isclosed() and REUSE_CONNECTION is True and _is_connection_reusable(conn):
+                connection_pool.checkin(conn)
+            else:
+                _close_https_connection(conn)
+
     def request_post(
-        self, method: str, params: Any = None, headers: dict = None, description: Optional[str] = None
+        self,
+        method: str,
+        params: Any = None,
+        headers: dict = None,
+        description: Optional[str] = None,
+        compress: bool = False,
     ) -> Any:
         result: Dict[str, Any] = self._request(
-            "POST", method, params, headers=headers, description=description
+            "POST", method, params, headers=headers, description=description, compress=compress
         )
         return self._extract_content_from_response(result)
 
@@ -1455,10 +2142,15 @@ class BaseRestLib:
         return self._extract_content_from_response(result)
 
     def request_put(
-        self, method: str, params: Any = None, headers: dict = None, description: Optional[str] = None
+        self,
+        method: str,
+        params: Any = None,
+        headers: dict = None,
+        description: Optional[str] = None,
+        compress: bool = False,
     ) -> Any:
         result: Dict[str, Any] = self._request(
-            "PUT", method, params, headers=headers, description=description
+            "PUT", method, params, headers=headers, description=description, compress=compress
         )
         return self._extract_content_from_response(result)
 
@@ -1565,6 +2257,13 @@ class UEPConnection(BaseConnection):
             self.capabilities = self._load_manager_capabilities()
         return capability in self.capabilities
 
+    def _compress_request_body(self) -> bool:
+        """
+        Check if it is possible to send compressed body of request to the server. It has to be
+        allowed in rhsm.conf and the server has to support it.
+        """
+        return bool(self.compression) and self.has_capability(REQUEST_COMPRESSION_CAPABILITY)
+
     def ping(self, *args, **kwargs) -> Any:
         return self.conn.request_get("/status/", description=_("Checking connection status"))
 
@@ -1814,7 +2513,12 @@ class UEPConnection(BaseConnection):
             params["cryptographicCapabilities"] = cryptographic_capabilities
 
         method = "/consumers/%s" % self.sanitize(uuid)
-        ret = self.conn.request_put(method, params, description=_("Updating consumer information"))
+        ret = self.conn.request_put(
+            method,
+            params,
+            description=_("Updating consumer information"),
+            compress=self._compress_request_body(),
+        )
         return ret
 
     def getGuestIds(self, uuid: str) -> dict:
@@ -1857,7 +2561,12 @@ class UEPConnection(BaseConnection):
         package headers we're interested in. See profile.py.
         """
         method = "/consumers/%s/packages" % self.sanitize(consumer_uuid)
-        return self.conn.request_put(method, pkg_dicts, description=_("Updating profile information"))
+        return self.conn.request_put(
+            method,
+            pkg_dicts,
+            description=_("Updating profile information"),
+            compress=self._compress_request_body(),
+        )
 
     def updateCombinedProfile(self, consumer_uuid: str, profile: List[Dict]) -> dict:
         """
@@ -1868,15 +2577,38 @@ class UEPConnection(BaseConnection):
         :return: Dict containing response from HTTP server
         """
         method = "/consumers/%s/profiles" % self.sanitize(consumer_uuid)
-        return self.conn.request_put(method, profile, description=_("Updating profile information"))
+        return self.conn.request_put(
+            method,
+            profile,
+            description=_("Updating profile information"),
+            compress=self._compress_request_body(),
+        )
 
-    def getConsumer(self, uuid: str) -> dict:
+    def updateCombinedProfileDelta(self, consumer_uuid: str, profile_delta: List[Dict]) -> dict:
+        """
+        Updates the costumers' combined profile using only changes made since
+        the last upload of the profile. The server has to support the capability
+        "combined_reporting_delta".
+        :param consumer_uuid: UUID of consumer
+        :param profile_delta: List of changes of profile; one item for every content type
+        :return: Dict containing response from HTTP server
+        """
+        method = "/consumers/%s/profiles/delta" % self.sanitize(consumer_uuid)
+        return self.conn.request_put(
+            method,
+            profile_delta,
+            description=_("Updating profile information"),
+            compress=self._compress_request_body(),
+        )
+
+    def getConsumer(self, uuid: str, validators: Optional[ResponseValidators] = None) -> Optional[dict]:
         """
         Returns a consumer object with pem/key for existing consumers
         :param uuid: UUID of consumer (part of installed consumer cert, when system is registered)
+        :param validators: If present, conditional request is sent (see BaseRestLib.request_get())
         """
         method = "/consumers/%s" % self.sanitize(uuid)
-        return self.conn.request_get(method, description=_("Fetching consumer keys"))
+        return self.conn.request_get(method, description=_("Fetching consumer keys"), validators=validators)
 
     def getOwnerSyspurposeValidFields(self, owner_key: str) -> dict:
         """
@@ -1935,7 +2667,10 @@ class UEPConnection(BaseConnection):
         if jwt:
             headers["Authorization"] = f"Bearer {jwt}"
 
-        return self.conn.request_get(method, headers=headers, description=_("Fetching certificates"))
+        # Bundles of certificates can be huge, so they are decoded while the response is read
+        return list(
+            self.conn.request_get_stream(method, headers=headers, description=_("Fetching certificates"))
+        )
 
     def getCertificateSerials(self, consumerId: str) -> List[dict]:
         """
@@ -1974,12 +2709,15 @@ class UEPConnection(BaseConnection):
         after_date: datetime.datetime = None,
         page: int = 0,
         items_per_page: int = 0,
+        paging: Optional[ResponsePaging] = None,
     ) -> List[dict]:
         """
         List pools for a given consumer or owner.
 
         Ideally, try to always pass the owner key argument. The old method is deprecated
         and may eventually be removed.
+
+        When a page is requested and paging is given, then it is updated from the response.
         """
 
         if owner:
@@ -2010,18 +2748,21 @@ class UEPConnection(BaseConnection):
         if items_per_page != 0:
             method = "%s&per_page=%s" % (method, self.sanitize(items_per_page))
 
-        results = self.conn.request_get(method, description=_("Fetching pools"))
+        results = list(self.conn.request_get_stream(method, description=_("Fetching pools"), paging=paging))
         return results
 
-    def getRelease(self, consumerId: str) -> dict:
+    def getRelease(self, consumerId: str, validators: Optional[ResponseValidators] = None) -> Optional[dict]:
         """
         Try to get current release for given consumer
         :param consumerId: consumer UUID
+        :param validators: If present, conditional request is sent (see BaseRestLib.request_get())
         :return: Dictionary with current release. It returns dictionary even no release is set.
             Like {'releaseVer': None}
         """
         method = "/consumers/%s/release" % self.sanitize(consumerId)
-        results = self.conn.request_get(method, description=_("Fetching release information"))
+        results = self.conn.request_get(
+            method, description=_("Fetching release information"), validators=validators
+        )
         return results
 
     def getAvailableReleases(self, consumerId: str) -> List[dict]:
@@ -2037,11 +2778,18 @@ class UEPConnection(BaseConnection):
         method = "/consumers/%s/available_releases" % self.sanitize(consumerId)
         return self.conn.request_get(method, description=_("Fetching available releases"))
 
-    def getEntitlementList(self, consumerId: str, request_certs: bool = False) -> List[dict]:
+    def getEntitlementList(
+        self,
+        consumerId: str,
+        request_certs: bool = False,
+        validators: Optional[ResponseValidators] = None,
+    ) -> List[dict]:
         """
         Try to get list of consumed entitlement certificates
         :param consumerId: consumer UUID
         :param request_certs: If this argument is true, then response will include entitlement certs too
+        :param validators: If present, conditional request is sent (see BaseRestLib.request_get()).
+            Empty list is returned, when the list was not modified.
         :return: List of dictionaries containing information about entitlements
         """
         method = "/consumers/%s/entitlements" % self.sanitize(consumerId)
@@ -2050,7 +2798,11 @@ class UEPConnection(BaseConnection):
             filters = "?exclude=certificates.key&exclude=certificates.cert"
         else:
             filters = ""
-        results = self.conn.request_get(method + filters, description=_("Fetching entitlements"))
+        results = list(
+            self.conn.request_get_stream(
+                method + filters, description=_("Fetching entitlements"), validators=validators
+            )
+        )
         return results
 
     def getServiceLevelList(self, owner_key: str) -> List[str]:
@@ -2123,13 +2875,18 @@ class UEPConnection(BaseConnection):
         method = "/status"
         return self.conn.request_get(method, description=_("Checking server status"))
 
-    def getContentOverrides(self, consumerId: str) -> List[dict]:
+    def getContentOverrides(
+        self, consumerId: str, validators: Optional[ResponseValidators] = None
+    ) -> Optional[List[dict]]:
         """
         Get all the overrides for the specified consumer
         :param consumerId: consumer UUID
+        :param validators: If present, conditional request is sent (see BaseRestLib.request_get())
         """
         method = "/consumers/%s/content_overrides" % self.sanitize(consumerId)
-        return self.conn.request_get(method, description=_("Fetching content overrides"))
+        return self.conn.request_get(
+            method, description=_("Fetching content overrides"), validators=validators
+        )
 
     def setContentOverrides(self, consumerId: str, overrides: List[dict]) -> List[dict]:
         """
@@ -13,7 +13,9 @@
 
 import heapq
 import itertools
-from typing import Optional, List, Union, Tuple
+from typing import Any, Dict, Optional, List, Union, Tuple
+
+from rhsm.bitstream import BitReader
 
 
 class HuffmanNode:
@@ -89,10 +91,10 @@ class HuffmanNode:
             raise AttributeError("node is not a leaf")
         turns: List[str] = []
         next_node: "HuffmanNode" = self
-        while next_node is not None:
-            if next_node.parent is not None:
-                turns.insert(0, next_node.direction_from_parent)
+        while next_node.parent is not None:
+            turns.append(next_node.direction_from_parent)
             next_node = next_node.parent
+        turns.reverse()
         return "".join(turns)
 
     @classmethod
@@ -105,20 +107,21 @@ class HuffmanNode:
         # the counter makes sure that when nodes of equal weight are compared,
         # the one most recently added gets chosen
         counter = itertools.count()
-        # We use the heapq module to make a min priority queue
-        queue: List[Tuple["HuffmanNode", int]] = [(node, next(counter)) for node in nodes]
+        # We use the heapq module to make a min priority queue. The weight is
+        # part of the queue item, so nodes themselves are never compared.
+        queue: List[Tuple[int, int, "HuffmanNode"]] = [(node.weight, next(counter), node) for node in nodes]
         heapq.heapify(queue)
         while True:
             left: "HuffmanNode"
             right: "HuffmanNode"
-            count: int
-            left, count = heapq.heappop(queue)
+            left = heapq.heappop(queue)[2]
             try:
-                right, count = heapq.heappop(queue)
+                right = heapq.heappop(queue)[2]
             except IndexError:
                 # no more nodes to compare, so a is the root node of the tree
                 return left
-            heapq.heappush(queue, (cls.combine(left, right), next(counter)))
+            node = cls.combine(left, right)
+            heapq.heappush(queue, (node.weight, next(counter), node))
 
     def __lt__(self, other: "HuffmanNode") -> bool:
         return self.weight < other.weight
@@ -147,3 +150,81 @@ class HuffmanNode:
 
     def __repr__(self) -> str:
         return 'HuffmanNode(%d, "%s")' % (self.weight, self.value)
+
+
+class HuffmanDecoder:
+    """
+    Table-driven decoder of Huffman codes. Codes of all leaves are computed from
+    the root of the tree at once. Every code is decoded from the window of next
+    max_length bits of the stream. Codes not longer than TABLE_BITS are decoded
+    using one lookup in the table indexed by the first TABLE_BITS bits of the window.
+    Longer codes are looked up in a dictionary, starting with the length of the
+    shortest code with the same prefix. Weights of v3 entitlement data are linear,
+    so lengths of long codes sharing one prefix do not differ much.
+    """
+
+    # Number of bits used for indexing of the lookup table
+    TABLE_BITS = 12
+
+    def __init__(self, root: HuffmanNode) -> None:
+        """
+        :param root:    root node of a Huffman tree; values of its leaves are decoded
+        """
+        codes: List[Tuple[int, int, Any]] = []
+        stack: List[Tuple[HuffmanNode, int, int]] = [(root, 0, 0)]
+        while stack:
+            node, code, length = stack.pop()
+            if node.is_leaf:
+                # The tree with only one leaf does not define any code
+                if length > 0:
+                    codes.append((code, length, node.value))
+            else:
+                stack.append((node.left, code << 1, length + 1))
+                stack.append((node.right, (code << 1) | 1, length + 1))
+
+        self.max_length = max((length for _code, length, _value in codes), default=0)
+        self.table_bits = min(self.max_length, self.TABLE_BITS)
+        # Entries of the table are pairs (value, length). The negative length means
+        # that only longer codes start with given bits and the minus length is the
+        # length of the shortest of them.
+        self._table: List[Optional[Tuple[Any, int]]] = [None] * (1 << self.table_bits)
+        # Long codes are keyed by the code with a leading one bit, which encodes its length
+        self._long_codes: Dict[int, Any] = {}
+        for code, length, value in codes:
+            if length <= self.table_bits:
+                shift = self.table_bits - length
+                start = code << shift
+                self._table[start : start + (1 << shift)] = [(value, length)] * (1 << shift)
+            else:
+                self._long_codes[(1 << length) | code] = value
+                prefix = code >> (length - self.table_bits)
+                entry = self._table[prefix]
+                if entry is None or -entry[1] > length:
+                    self._table[prefix] = (None, -length)
+
+    def decode(self, reader: BitReader) -> Any:
+        """
+        Read next code from the stream and return corresponding value
+
+        :param reader:  stream of bits with a huffman code as the next value
+        :return:        value of the leaf, or None when the stream does not contain
+                        any other complete code. The rest of the stream is consumed
+                        in this case.
+        """
+        max_length = self.max_length
+        remaining = reader.remaining
+        window = reader.peek(max_length)
+        entry = self._table[window >> (max_length - self.table_bits)]
+        if entry is not None:
+            value, length = entry
+            if length < 0:
+                for length in range(-length, min(max_length, remaining) + 1):
+                    key = (1 << length) | (window >> (max_length - length))
+                    if key in self._long_codes:
+                        reader.skip(length)
+                        return self._long_codes[key]
+            elif length <= remaining:
+                reader.skip(length)
+                return value
+        reader.skip(remaining)
+        return None
@@ -11,12 +11,22 @@
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 
+import hashlib
 import itertools
+import logging
+import os
+import shutil
+import tempfile
+import threading
 import zlib
-from typing import Tuple, List, Any
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
-from rhsm.bitstream import GhettoBitStream
-from rhsm.huffman import HuffmanNode
+from rhsm import ourjson as json
+from rhsm.bitstream import BitReader, GhettoBitStream
+from rhsm.huffman import HuffmanDecoder, HuffmanNode
+
+log = logging.getLogger(__name__)
 
 # this is the "sentinel" value used for the path node that indicates the end
 # of a path
@@ -53,13 +63,11 @@ class PathTree:
         :type  data:    binary string
         """
         word_leaves, unused_bits = self._unpack_data(data)
-        HuffmanNode.build_tree(word_leaves)
-        word_dict = dict((node.code, node.value) for node in word_leaves)
-        bitstream = GhettoBitStream(unused_bits)
+        word_decoder = HuffmanDecoder(HuffmanNode.build_tree(word_leaves))
+        bitstream = BitReader(unused_bits)
         path_leaves = self._generate_path_leaves(bitstream)
-        HuffmanNode.build_tree(path_leaves)
-        path_dict = dict((node.code, node) for node in path_leaves)
-        self.path_tree = self._generate_path_tree(path_dict, path_leaves, word_dict, bitstream)
+        path_decoder = HuffmanDecoder(HuffmanNode.build_tree(path_leaves))
+        self.path_tree = self._generate_path_tree(path_decoder, path_leaves, word_decoder, bitstream)
 
     def match_path(self, path: str) -> bool:
         """
@@ -161,7 +169,7 @@ class PathTree:
         return nodes, decompress.unused_data
 
     @staticmethod
-    def _get_node_count(bitstream: GhettoBitStream) -> int:
+    def _get_node_count(bitstream: Union[BitReader, GhettoBitStream]) -> int:
         """
         Determine the total number of nodes in the uncompressed tree. The
         algorithm for doing so is described in the v3 entitlement cert
@@ -188,7 +196,7 @@ class PathTree:
             return node_count
 
     @classmethod
-    def _generate_path_leaves(cls, bitstream: GhettoBitStream) -> List[HuffmanNode]:
+    def _generate_path_leaves(cls, bitstream: Union[BitReader, GhettoBitStream]) -> List[HuffmanNode]:
         """
         Given the remaining bits after decompressing the word list, this
         generates HuffmanNode objects to represent each node (besides root)
@@ -227,19 +235,22 @@ class PathTree:
 
     @classmethod
     def _generate_path_tree(
-        cls, path_dict: dict, path_leaves: List[HuffmanNode], word_dict: dict, bitstream: GhettoBitStream
+        cls,
+        path_decoder: HuffmanDecoder,
+        path_leaves: List[HuffmanNode],
+        word_decoder: HuffmanDecoder,
+        bitstream: BitReader,
     ) -> dict:
         """
         Once huffman trees have been generated for the words and for the path
         nodes, this method uses them and the bit stream to create the path tree
         that can be traversed to match potentially authorized paths
-        :param path_dict:   dictionary where keys are huffman codes and values
-                            are path nodes
+        :param path_decoder: decoder of huffman codes of path nodes
         :param path_leaves: leaf nodes from the huffman tree of path nodes. the
                             values will be constructed into a new tree that can
                             be traversed to match actual paths
-        :param word_dict:   dict where keys are huffman codes and values are
-                            words from the zlib-compressed word list
+        :param word_decoder: decoder of huffman codes of words from the
+                            zlib-compressed word list
         :param bitstream:   bit stream where the rest of the bits describe
                             how to use words as references between nodes in
                             the path tree. This format is described in detail
@@ -250,12 +261,14 @@ class PathTree:
         values.insert(0, root)
         for value in values:
             while True:
-                word = cls._get_leaf_from_dict(word_dict, bitstream)
+                word = word_decoder.decode(bitstream)
                 # check for end of node
                 if not word:
                     break
-                path_node = cls._get_leaf_from_dict(path_dict, bitstream)
-                value.setdefault(word, []).append(path_node.value)
+                path_node_value = path_decoder.decode(bitstream)
+                if path_node_value is None:
+                    raise ValueError("Entitlement data is truncated")
+                value.setdefault(word, []).append(path_node_value)
         # add the sentinel value that marks this explicitly as the end of a path
         # there should usually only be one of these nodes
         for value in values:
@@ -263,3 +276,223 @@ class PathTree:
                 value[PATH_END] = None
 
         return root
+
+
+class PathMatcher:
+    """
+    Compiled form of the path tree used for matching of paths. Nodes of the path tree
+    are flattened into a list and every node is represented by a list of [word, index]
+    pairs of its children. The end of a path is represented by the PATH_END word with
+    index -1. Nodes shared by more branches of the path tree are stored only once.
+
+    Matching is iterative and a node is never visited twice at the same depth, so paths
+    are matched without recursion, even when many entitlement variables (e.g. "$basearch")
+    match the same segment. The flattened tree can be stored as JSON, so it is not
+    necessary to decode Huffman-coded payload of the certificate again.
+    """
+
+    VERSION = 1
+
+    # Directory with stored matchers
+    CACHE_DIR = "/var/lib/rhsm/cache/path_matchers"
+
+    # Maximal number of matchers kept in memory
+    MAX_CACHED = 32
+
+    _cache: "OrderedDict[str, PathMatcher]" = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, nodes: List[List[Tuple[str, int]]]) -> None:
+        self.nodes = nodes
+        self._end: List[bool] = []
+        # children of every node matching exact segment
+        self._exact: List[Dict[str, List[int]]] = []
+        # children of every node matching any segment (entitlement variables)
+        self._variable: List[List[int]] = []
+        for children in nodes:
+            end = False
+            exact = {}
+            variable = []
+            for word, child in children:
+                if word == PATH_END:
+                    end = True
+                    continue
+                if word.startswith("$"):
+                    variable.append(child)
+                exact.setdefault(word, []).append(child)
+            self._end.append(end)
+            self._exact.append(exact)
+            self._variable.append(variable)
+
+    @classmethod
+    def from_tree(cls, tree: dict) -> "PathMatcher":
+        """
+        Compile the path tree generated by PathTree
+        :param tree: root node of the path tree (PathTree.path_tree)
+        """
+        nodes: List[Any] = []
+        indexes: Dict[int, int] = {}
+        pending: List[dict] = []
+
+        def index_of(node: dict) -> int:
+            if id(node) not in indexes:
+                indexes[id(node)] = len(nodes)
+                nodes.append(None)
+                pending.append(node)
+            return indexes[id(node)]
+
+        index_of(tree)
+        while pending:
+            node = pending.pop()
+            children = []
+            for word, child_nodes in node.items():
+                if word == PATH_END:
+                    children.append((word, -1))
+                    continue
+                for child in child_nodes:
+                    children.append((word, index_of(child)))
+            nodes[indexes[id(node)]] = children
+        return cls(nodes)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PathMatcher":
+        if data.get("version") != cls.VERSION:
+            raise ValueError("Unsupported version of path matcher: %s" % data.get("version"))
+        return cls([[(word, child) for word, child in children] for children in data["nodes"]])
+
+    def to_dict(self) -> dict:
+        return {"version": self.VERSION, "nodes": self.nodes}
+
+    @classmethod
+    def for_payload(cls, data: bytes, serial: Optional[Any] = None) -> "PathMatcher":
+        """
+        Get matcher of paths encoded in entitlement data extension of v3 certificate. The
+        matcher is compiled only once; it is cached in memory and stored in CACHE_DIR.
+        :param data: binary data of entitlement data extension
+        :param serial: serial number of certificate used in name of stored matcher
+        """
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        prefix = "%s-" % serial if serial is not None else ""
+        key = prefix + digest
+        with cls._lock:
+            matcher = cls._cache.get(key)
+            if matcher is not None:
+                cls._cache.move_to_end(key)
+                return matcher
+
+        matcher = cls._load(key)
+        if matcher is None:
+            matcher = cls.from_tree(PathTree(data).path_tree)
+            cls._store(key, prefix, matcher)
+
+        with cls._lock:
+            cls._cache[key] = matcher
+            while len(cls._cache) > cls.MAX_CACHED:
+                cls._cache.popitem(last=False)
+        return matcher
+
+    @classmethod
+    def _load(cls, key: str) -> Optional["PathMatcher"]:
+        try:
+            with open(os.path.join(cls.CACHE_DIR, key + ".json")) as matcher_file:
+                return cls.from_dict(json.load(matcher_file))
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            if not isinstance(err, FileNotFoundError):
+                log.debug("Unable to load stored path matcher %s: %s" % (key, err))
+            return None
+
+    @classmethod
+    def _store(cls, key: str, prefix: str, matcher: "PathMatcher") -> None:
+        try:
+            # The parent directory is created by rhsm, so matchers are not stored elsewhere
+            if not os.path.isdir(cls.CACHE_DIR):
+                os.mkdir(cls.CACHE_DIR)
+            # Remove matchers of older versions of the same certificate
+            if prefix:
+                for filename in os.listdir(cls.CACHE_DIR):
+                    if filename.startswith(prefix) and filename != key + ".json":
+                        os.unlink(os.path.join(cls.CACHE_DIR, filename))
+            with tempfile.NamedTemporaryFile(mode="w", dir=cls.CACHE_DIR, delete=False) as matcher_file:
+                json.dump(matcher.to_dict(), matcher_file)
+            os.chmod(matcher_file.name, 0o644)
+            os.rename(matcher_file.name, os.path.join(cls.CACHE_DIR, key + ".json"))
+        except OSError as err:
+            log.debug("Unable to store path matcher %s: %s" % (key, err))
+
+    @classmethod
+    def remove_unused(cls, serials: Iterable[Any]) -> None:
+        """
+        Remove stored matchers of certificates, which are not installed anymore
+        :param serials: serial numbers of installed certificates
+        """
+        prefixes = {"%s-" % serial for serial in serials}
+        try:
+            filenames = os.listdir(cls.CACHE_DIR)
+        except OSError:
+            return
+        for filename in filenames:
+            if filename.split("-", 1)[0] + "-" in prefixes:
+                continue
+            try:
+                os.unlink(os.path.join(cls.CACHE_DIR, filename))
+            except OSError as err:
+                log.debug("Unable to remove stored path matcher %s: %s" % (filename, err))
+
+    @classmethod
+    def delete_cache(cls) -> None:
+        """
+        Remove all stored matchers
+        """
+        with cls._lock:
+            cls._cache.clear()
+        shutil.rmtree(cls.CACHE_DIR, ignore_errors=True)
+
+    def match_path(self, path: str) -> bool:
+        """
+        Given an absolute path, determines if the tree contains any complete paths
+        that exactly equal the beginning of this path. See PathTree.match_path().
+        :param path:    absolute path to match against the tree
+        :return:        True iff there is a match, else False
+        """
+        if not path.startswith("/"):
+            raise ValueError('path must start with "/"')
+        words = path.strip("/").split("/")
+        last = len(words) - 1
+        stack = [(0, 0)]
+        visited = set()
+        while stack:
+            node, depth = stack.pop()
+            if self._end[node]:
+                return True
+            if (node, depth) in visited or depth > last:
+                continue
+            visited.add((node, depth))
+            word = words[depth]
+            if word == LISTING and depth == last:
+                return True
+            stack.extend((child, depth + 1) for child in self._exact[node].get(word, ()))
+            stack.extend((child, depth + 1) for child in self._variable[node])
+        return False
+
+    def match_paths(self, paths: Iterable[str]) -> List[bool]:
+        """
+        Match more paths at once
+        :param paths: absolute paths to match against the tree
+        :return: list of results in the same order as given paths
+        """
+        results: Dict[str, bool] = {}
+        return [
+            results[path] if path in results else results.setdefault(path, self.match_path(path))
+            for path in paths
+        ]
+
+    def build_path_list(self, acc: list, node: int = 0, curr_path: str = "") -> None:
+        """
+        Expand the tree into a list of paths in the same order as PathTree.build_path_list()
+        :param acc: an accumulator that stores the expanded paths
+        """
+        for word, child in self.nodes[node]:
+            if word == PATH_END:
+                acc.append(curr_path)
+            else:
+                self.build_path_list(acc, child, "%s/%s" % (curr_path, word))
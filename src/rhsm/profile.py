@@ -10,12 +10,14 @@
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 #
 import _io
+import hashlib
 import logging
 
 import importlib.util
 import rpm
 import os.path
-from typing import List, Union
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 from rhsm import ourjson as json
 from rhsm.utils import suppress_output
@@ -44,6 +46,9 @@ if use_zypper:
 else:
     REPOSITORY_PATH = "/etc/yum.repos.d/redhat.repo"
 
+# Locations of the rpm database, newer distributions use /usr/lib/sysimage/rpm
+RPMDB_PATHS: Tuple[str, ...] = ("/var/lib/rpm", "/usr/lib/sysimage/rpm")
+
 log = logging.getLogger(__name__)
 
 
@@ -343,6 +348,23 @@ class Package:
 
         return False
 
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    @property
+    def key(self) -> tuple:
+        """
+        Key identifying this package in a profile: NEVRA plus vendor.
+        """
+        return (
+            self.name,
+            self.epoch,
+            self.version,
+            self.release,
+            self.arch,
+            self._normalize_string(self.vendor),
+        )
+
     def __str__(self) -> str:
         return "<Package: %s %s %s>" % (self.name, self.version, self.release)
 
@@ -425,6 +447,12 @@ class RPMProfile:
             pkg_dicts.append(pkg.to_dict())
         return pkg_dicts
 
+    def index(self) -> Dict[tuple, Package]:
+        """
+        Returns the packages of this profile keyed by their NEVRA and vendor.
+        """
+        return {pkg.key: pkg for pkg in self.packages}
+
     def __eq__(self, other: "RPMProfile") -> bool:
         """
         Compare one profile to another to determine if anything has changed.
@@ -437,11 +465,107 @@ class RPMProfile:
         if len(self.packages) != len(other.packages):
             return False
 
-        for pkg in self.packages:
-            if pkg not in other.packages:
-                return False
+        return self.index().keys() == other.index().keys()
+
+
+def profile_digest(entries: List[dict]) -> str:
+    """
+    Compute digest of a list of profile entries (packages, repositories or modules).
+    The digest does not depend on the order of entries, so it can be computed in
+    linear time and compared with the digest of the profile stored in the cache.
+    @param entries: list of dicts as returned by collect() of some profile
+    @return: hex digest
+    """
+    total = 0
+    for entry in entries:
+        data = json.dumps(entry, sort_keys=True, default=str).encode("utf-8")
+        total += int.from_bytes(hashlib.sha256(data).digest(), "big")
+    return "%064x" % (total % (1 << 256))
+
+
+# Functions returning identity of profile entries. Two entries with the same
+# identity and different content are reported as changed entry in profile delta.
+PROFILE_ENTRY_IDENTITY: Dict[str, Callable[[dict], tuple]] = {
+    "rpm": lambda entry: (entry.get("name"), entry.get("arch")),
+    "enabled_repos": lambda entry: (entry.get("repositoryid"),),
+    "modulemd": lambda entry: (
+        entry.get("name"),
+        entry.get("stream"),
+        entry.get("version"),
+        entry.get("context"),
+        entry.get("arch"),
+    ),
+}
+
+
+def profile_delta(profile_type: str, old_entries: List[dict], new_entries: List[dict]) -> Dict[str, list]:
+    """
+    Compute difference between two lists of profile entries of given type.
+    Entries present only in new list are added, entries present only in old list
+    are removed. When removed and added entry have same identity (e.g. name and
+    arch of package), then they are reported as one changed entry.
+    @param profile_type: type of profile ("rpm", "enabled_repos" or "modulemd")
+    @param old_entries: list of dicts previously reported to server
+    @param new_entries: list of dicts representing current state
+    @return: dictionary with lists of "added", "removed" and "changed" entries
+    """
+    identity = PROFILE_ENTRY_IDENTITY[profile_type]
+    old_map = {json.dumps(entry, sort_keys=True, default=str): entry for entry in old_entries}
+    new_map = {json.dumps(entry, sort_keys=True, default=str): entry for entry in new_entries}
+
+    removed_by_identity = defaultdict(list)
+    for key, entry in old_map.items():
+        if key not in new_map:
+            removed_by_identity[identity(entry)].append(entry)
+
+    added = []
+    changed = []
+    for key, entry in new_map.items():
+        if key in old_map:
+            continue
+        removed_entries = removed_by_identity.get(identity(entry))
+        if removed_entries:
+            changed.append({"old": removed_entries.pop(0), "new": entry})
+        else:
+            added.append(entry)
+    removed = [entry for entries in removed_by_identity.values() for entry in entries]
+
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+def get_rpmdb_cookie() -> Optional[str]:
+    """
+    Returns string identifying current state of rpm database. The string changes
+    every time some package is installed, updated or removed. When it is not
+    possible to get the cookie from rpm (rpm < 4.17), then the cookie is created
+    from the stat() of files in the rpm database directory.
+    @return: string with cookie or None, when it is not possible to get the cookie
+    """
+    try:
+        ts = rpm.TransactionSet()
+        ts.setVSFlags(-1)
+        cookie = ts.dbCookie()
+    except (AttributeError, rpm.error) as err:
+        log.debug("Unable to get rpmdb cookie from rpm: %s" % err)
+    else:
+        if cookie:
+            return "cookie:%s" % cookie
+
+    for rpmdb_path in RPMDB_PATHS:
+        if not os.path.isdir(rpmdb_path):
+            continue
+        digest = hashlib.sha256()
+        for file_name in sorted(os.listdir(rpmdb_path)):
+            try:
+                stat = os.stat(os.path.join(rpmdb_path, file_name))
+            except OSError:
+                continue
+            digest.update(
+                ("%s:%d:%d:%d;" % (file_name, stat.st_ino, stat.st_size, stat.st_mtime_ns)).encode()
+            )
+        return "stat:%s" % digest.hexdigest()
 
-        return True
+    return None
 
 
 def get_profile(profile_type: str) -> Union[RPMProfile, EnabledRepos, ModulesProfile]:
@@ -0,0 +1,156 @@
+# Copyright (c) 2026 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+"""
+Recording of time spent in phases (spans) of one run of a program, e.g. in one
+action invoker, one REST API call or one read of a cache file. Spans are recorded
+only when recording was started using start_recording(); otherwise span() does
+nothing except of yielding the dictionary of attributes.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+log = logging.getLogger(__name__)
+
+
+class Recorder:
+    """
+    Recorder of spans of one run. Spans can be recorded from more threads,
+    the parent of a span is the innermost span open in the same thread.
+    """
+
+    def __init__(self, name: str):
+        self.name: str = name
+        self.start: float = time.time()
+        self.duration: Optional[float] = None
+        self.spans: List[Dict[str, Any]] = []
+        self._start_counter: float = time.perf_counter()
+        self._next_id: int = 1
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> List[int]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextlib.contextmanager
+    def span(self, kind: str, name: str, attributes: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Record one span. The caller can add attributes to the yielded dictionary.
+        """
+        with self._lock:
+            span_id = self._next_id
+            self._next_id += 1
+        stack = self._stack()
+        record = {
+            "id": span_id,
+            "parent": stack[-1] if stack else None,
+            "kind": kind,
+            "name": name,
+            "start": time.perf_counter() - self._start_counter,
+            "attributes": attributes,
+        }
+        stack.append(span_id)
+        try:
+            yield attributes
+        except BaseException as err:
+            record["error"] = type(err).__name__
+            raise
+        finally:
+            record["duration"] = time.perf_counter() - self._start_counter - record["start"]
+            stack.pop()
+            with self._lock:
+                self.spans.append(record)
+
+    def stop(self) -> None:
+        self.duration = time.perf_counter() - self._start_counter
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return the record of the run. Besides spans sorted by their start, it contains
+        number and total duration of spans of every kind.
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda record: record["id"])
+        totals: Dict[str, Dict[str, Any]] = {}
+        for record in spans:
+            total = totals.setdefault(record["kind"], {"count": 0, "duration": 0.0})
+            total["count"] += 1
+            total["duration"] += record["duration"]
+        return {
+            "name": self.name,
+            "pid": os.getpid(),
+            "start": self.start,
+            "duration": self.duration,
+            "totals": totals,
+            "spans": spans,
+        }
+
+
+_recorder: Optional[Recorder] = None
+
+
+def start_recording(name: str) -> Recorder:
+    """
+    Start recording of spans of the run with given name
+    """
+    global _recorder
+    _recorder = Recorder(name)
+    return _recorder
+
+
+def stop_recording() -> Optional[Recorder]:
+    """
+    Stop recording of spans and return the recorder, or None when recording was not started
+    """
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is not None:
+        recorder.stop()
+    return recorder
+
+
+@contextlib.contextmanager
+def span(kind: str, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Record span of given kind (e.g. "invoker", "rest", "cache") and name, when
+    recording was started. The caller can add attributes to the yielded dictionary.
+    """
+    recorder = _recorder
+    if recorder is None:
+        yield attributes
+        return
+    with recorder.span(kind, name, attributes) as span_attributes:
+        yield span_attributes
+
+
+def write_record(recorder: Recorder, path: str) -> None:
+    """
+    Append the record of the run as one line of JSON to the file. The file is
+    not written, when its directory does not exist.
+    """
+    if not os.path.isdir(os.path.dirname(path)):
+        return
+    try:
+        with open(path, "a") as record_file:
+            record_file.write(json.dumps(recorder.to_dict(), default=str) + "\n")
+    except OSError as err:
+        log.debug(f"Unable to write timing record to {path}: {err}")
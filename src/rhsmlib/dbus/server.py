@@ -29,7 +29,7 @@ from functools import partial
 from rhsmlib.services import config
 from rhsmlib.dbus.dbus_utils import pid_of_sender
 from rhsm.config import get_config_parser
-from rhsmlib.file_monitor import create_filesystem_watcher, DirectoryWatch
+from rhsmlib.file_monitor import create_filesystem_watcher, DirectoryWatch, InotifyFilesystemWatcher
 from rhsmlib.file_monitor import (
     CONSUMER_WATCHER,
     ENTITLEMENT_WATCHER,
@@ -81,11 +81,11 @@ class Server:
         of a class and a dictionary of arguments to send that class's constructor.
         """
 
-        # Do not allow reusing connection, because server uses multiple threads. If reusing connection
-        # was used, then two threads could try to use the connection in the almost same time.
-        # It means that one thread could send request and the second one could send second request
-        # before the first thread received response. This could lead to raising exception CannotSendRequest.
-        connection.REUSE_CONNECTION = False
+        # Server uses multiple threads. Connections to candlepin server are reused, because every
+        # thread checks out its own connection from the pool of connections (rhsm.connection.ConnectionPool)
+        # for the time of request. Two threads never send requests using the same connection in the
+        # almost same time, so they cannot cause raising of exception CannotSendRequest.
+        connection.REUSE_CONNECTION = True
 
         init_logger(parser)
 
@@ -164,11 +164,10 @@ class Server:
                 SYSPURPOSE_WATCHER: syspurpose_dir_watch,
             }
         )
-        self._thread = threading.Thread(
-            target=self.filesystem_watcher.loop,
-            name="Thread-FileSystemWatcher",
-        )
-        self._thread.start()
+        # GLib sources used for watching of filesystem in the mainloop
+        self._watcher_source_ids: List[int] = []
+        self._debounce_source_id: Optional[int] = None
+        self._start_filesystem_watcher()
 
     def run(self, started_event=None, stopped_event=None):
         """
@@ -185,11 +184,76 @@ class Server:
         except Exception as e:
             log.exception(e)
         finally:
-            # Terminate loop of notifier
-            self.filesystem_watcher.stop()
+            # Terminate watching of filesystem
+            self._stop_filesystem_watcher()
             if stopped_event:
                 stopped_event.set()
 
+    def _start_filesystem_watcher(self) -> None:
+        """
+        Watch filesystem in the mainloop. When inotify is used, then events are read,
+        when the inotify file descriptor is readable. Otherwise directories are polled
+        periodically.
+        """
+        watcher = self.filesystem_watcher
+        watcher.start()
+        if isinstance(watcher, InotifyFilesystemWatcher):
+            source_id = GLib.io_add_watch(
+                watcher.fileno(), GLib.PRIORITY_DEFAULT, GLib.IO_IN, self._on_filesystem_events
+            )
+        else:
+            source_id = GLib.timeout_add(watcher.TIMEOUT, self._on_filesystem_poll)
+        self._watcher_source_ids.append(source_id)
+
+    def _stop_filesystem_watcher(self) -> None:
+        if not self._watcher_source_ids and self._debounce_source_id is None:
+            return
+        for source_id in self._watcher_source_ids:
+            GLib.source_remove(source_id)
+        self._watcher_source_ids = []
+        if self._debounce_source_id is not None:
+            GLib.source_remove(self._debounce_source_id)
+            self._debounce_source_id = None
+        self.filesystem_watcher.stop()
+        if isinstance(self.filesystem_watcher, InotifyFilesystemWatcher):
+            self.filesystem_watcher.remove_watches()
+
+    def _on_filesystem_events(self, _fd, _condition) -> bool:
+        """
+        Callback called, when there are some inotify events. Callbacks of changed
+        directory watches are called later, when the debounce timeout elapsed since the
+        first event of the directory watch. Events coming in the meantime are merged.
+        """
+        self.filesystem_watcher.read_events()
+        if self._debounce_source_id is None:
+            self._schedule_notification(self.filesystem_watcher.notify_pending())
+        return True
+
+    def _read_filesystem_events(self) -> None:
+        """
+        Read inotify events, which have not been read by the mainloop yet
+        """
+        if isinstance(self.filesystem_watcher, InotifyFilesystemWatcher) and self._watcher_source_ids:
+            self._on_filesystem_events(None, None)
+
+    def _schedule_notification(self, remaining: Optional[float]) -> None:
+        if remaining is None:
+            self._debounce_source_id = None
+            return
+        self._debounce_source_id = GLib.timeout_add(int(remaining * 1000), self._on_debounce_timeout)
+
+    def _on_debounce_timeout(self) -> bool:
+        self._schedule_notification(self.filesystem_watcher.notify_pending())
+        # The timeout is scheduled again with new interval, when it is necessary
+        return False
+
+    def _on_filesystem_poll(self) -> bool:
+        self.filesystem_watcher.update()
+        for dir_watch in self.filesystem_watcher.dir_watches.values():
+            if dir_watch.temporary_disabled is True:
+                dir_watch.update_temporary_disabled_watcher()
+        return True
+
     @staticmethod
     def notify_started(started_event):
         """
@@ -209,10 +273,8 @@ class Server:
         """
         self.mainloop.quit()
 
-        # Make sure loop is terminated
-        self.filesystem_watcher.stop()
-        # Wait for notification thread to join
-        self._thread.join(2)
+        # Make sure filesystem is not watched anymore
+        self._stop_filesystem_watcher()
 
         # Unregister/remove everything.  Note that if you used dbus.SessionBus or dbus.SystemBus,
         # python-dbus will keep a cache of your old BusName objects even though we are releasing the name
@@ -255,6 +317,10 @@ class Server:
         server_instance = cls.INSTANCE
         if server_instance is None:
             return
+        # Events of changes done, while watchers were disabled, are still queued, because
+        # inotify events are read in the mainloop running this method. Read them now, when
+        # the watchers are still disabled, so the changes done by ourselves are ignored.
+        server_instance._read_filesystem_events()
         for dir_watcher_id, dir_watcher in server_instance.filesystem_watcher.dir_watches.items():
             if watcher_set is not None and dir_watcher_id not in watcher_set:
                 continue
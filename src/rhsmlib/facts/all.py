@@ -9,7 +9,11 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 #
-from typing import Dict, List, Union
+import concurrent.futures
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Union
 
 from rhsmlib.facts import collector
 from rhsmlib.facts import custom
@@ -21,8 +25,38 @@ from rhsmlib.facts import cloud_facts
 from rhsmlib.facts import pkg_arches
 from rhsmlib.facts import network
 
+log = logging.getLogger(__name__)
+
+
+class FactsCollectionError(Exception):
+    """
+    Raised, when some fact collector failed and there are no facts of the collector
+    to use instead, so incomplete facts are never cached or sent to the server.
+    """
+
+    pass
+
 
 class AllFactsCollector(collector.FactsCollector):
+    """
+    Runs all fact collectors. Collectors, which do not depend on facts collected
+    by other collectors, run concurrently in separate threads. Collectors listed
+    in self.dependencies are started, when the collectors they depend on finished.
+    Results are always merged in the order of self.collectors, so facts from later
+    collectors (e.g. custom facts) override facts from earlier collectors.
+    """
+
+    # Maximal number of collectors running concurrently; None means one
+    # thread for every collector
+    MAX_WORKERS: Optional[int] = None
+
+    # Maximal time (in seconds) spent waiting for result of one collector. It is
+    # not possible to interrupt running thread, so the collector keeps running in
+    # the background (e.g. in long-running rhsm.service) until it finishes, but its
+    # results are ignored. Collectors run in daemon threads, so a hanging collector
+    # does not prevent the process from exiting.
+    COLLECTOR_TIMEOUT: float = 120.0
+
     def __init__(self):
         self.collectors: List[type(collector.FactsCollector)] = [
             collector.StaticFactsCollector,
@@ -35,10 +69,136 @@ class AllFactsCollector(collector.FactsCollector):
             cloud_facts.CloudFactsCollector,
             pkg_arches.SupportedArchesCollector,
         ]
+        # Collectors consuming collected_hw_info of other collectors
+        self.dependencies: Dict[type(collector.FactsCollector), List[type(collector.FactsCollector)]] = {
+            # Detection of cloud provider uses DMI and virt facts, which can be overridden
+            # by custom facts
+            cloud_facts.CloudFactsCollector: [
+                host_collector.HostCollector,
+                hwprobe.HardwareCollector,
+                custom.CustomFactsCollector,
+            ],
+            # Supported architectures depend on distribution.name
+            pkg_arches.SupportedArchesCollector: [hwprobe.HardwareCollector, custom.CustomFactsCollector],
+        }
+        # Cache of facts from collectors declaring invalidation key (e.g. DMI and virt facts)
+        self.facts_cache = collector.FactSourceCache()
+
+    def _collected_hw_info(
+        self,
+        fact_collector_cls: type(collector.FactsCollector),
+        results: Dict[type(collector.FactsCollector), Dict[str, Union[str, int, bool, None]]],
+    ) -> Dict[str, Union[str, int, bool, None]]:
+        """
+        Merge facts of collectors, which given collector depends on.
+        """
+        dependencies = self.dependencies.get(fact_collector_cls, [])
+        collected_hw_info: Dict[str, Union[str, int, bool, None]] = {}
+        for dependency_cls in self.collectors:
+            if dependency_cls in dependencies:
+                collected_hw_info.update(results.get(dependency_cls, {}))
+        return collected_hw_info
+
+    def _is_ready(
+        self,
+        fact_collector_cls: type(collector.FactsCollector),
+        results: Dict[type(collector.FactsCollector), Dict[str, Union[str, int, bool, None]]],
+    ) -> bool:
+        return all(
+            dependency_cls in results or dependency_cls not in self.collectors
+            for dependency_cls in self.dependencies.get(fact_collector_cls, [])
+        )
+
+    def _start_collector(
+        self,
+        fact_collector_cls: type(collector.FactsCollector),
+        collected_hw_info: Dict[str, Union[str, int, bool, None]],
+    ) -> concurrent.futures.Future:
+        """
+        Run the collector in a new daemon thread and return future of its facts
+        """
+        future: concurrent.futures.Future = concurrent.futures.Future()
+
+        def run() -> None:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                fact_collector = fact_collector_cls(collected_hw_info=collected_hw_info)
+                future.set_result(fact_collector.get_all_cached(self.facts_cache))
+            except BaseException as err:
+                future.set_exception(err)
+
+        thread = threading.Thread(target=run, name="facts-%s" % fact_collector_cls.__name__, daemon=True)
+        thread.start()
+        return future
+
+    def _failed(
+        self, fact_collector_cls: type(collector.FactsCollector)
+    ) -> Dict[str, Union[str, int, bool, None]]:
+        """
+        Return the last cached facts of the failed collector. When there are no such
+        facts, then FactsCollectionError is raised.
+        """
+        facts: Optional[Dict[str, Union[str, int, bool, None]]] = self.facts_cache.get_last(
+            fact_collector_cls.__name__
+        )
+        if facts is None:
+            raise FactsCollectionError("Unable to collect facts of %s" % fact_collector_cls.__name__)
+        log.warning("Using last cached facts of %s" % fact_collector_cls.__name__)
+        return facts
 
     def get_all(self) -> Dict[str, Union[str, int, bool, None]]:
-        results: Dict[str, Union[str, int, bool, None]] = {}
+        results: Dict[type(collector.FactsCollector), Dict[str, Union[str, int, bool, None]]] = {}
+        waiting: List[type(collector.FactsCollector)] = list(self.collectors)
+        running: Dict[concurrent.futures.Future, Tuple[type(collector.FactsCollector), float]] = {}
+        max_workers: int = self.MAX_WORKERS or len(self.collectors)
+
+        while waiting or running:
+            for fact_collector_cls in [cls for cls in waiting if self._is_ready(cls, results)]:
+                if len(running) >= max_workers:
+                    break
+                waiting.remove(fact_collector_cls)
+                future = self._start_collector(
+                    fact_collector_cls, self._collected_hw_info(fact_collector_cls, results)
+                )
+                running[future] = (fact_collector_cls, time.monotonic())
+
+            if not running:
+                log.error(
+                    "Unable to run fact collectors with unresolved dependencies: %s"
+                    % ", ".join(cls.__name__ for cls in waiting)
+                )
+                break
+
+            deadline: float = min(started for _, started in running.values()) + self.COLLECTOR_TIMEOUT
+            done, _ = concurrent.futures.wait(
+                running,
+                timeout=max(deadline - time.monotonic(), 0.0),
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            for future in done:
+                fact_collector_cls, started = running.pop(future)
+                try:
+                    results[fact_collector_cls] = future.result()
+                except Exception as err:
+                    log.warning("Fact collector %s failed: %s" % (fact_collector_cls.__name__, err))
+                    results[fact_collector_cls] = self._failed(fact_collector_cls)
+                log.debug(
+                    "Fact collector %s finished in %.3fs"
+                    % (fact_collector_cls.__name__, time.monotonic() - started)
+                )
+
+            now: float = time.monotonic()
+            for future, (fact_collector_cls, started) in list(running.items()):
+                if now - started >= self.COLLECTOR_TIMEOUT:
+                    log.warning(
+                        "Fact collector %s did not finish in %ss, ignoring its facts"
+                        % (fact_collector_cls.__name__, self.COLLECTOR_TIMEOUT)
+                    )
+                    running.pop(future)
+                    results[fact_collector_cls] = self._failed(fact_collector_cls)
+
+        all_facts: Dict[str, Union[str, int, bool, None]] = {}
         for fact_collector_cls in self.collectors:
-            fact_collector: collector.FactsCollector = fact_collector_cls(collected_hw_info=results)
-            results.update(fact_collector.get_all())
-        return results
+            all_facts.update(results.get(fact_collector_cls, {}))
+        return all_facts
@@ -11,15 +11,38 @@
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 #
+import json
 import logging
 import os
 import platform
-from typing import Callable, Dict, List, Union
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Union
 
+from rhsm import cache_store
 from rhsmlib.facts import collection
 
 log = logging.getLogger(__name__)
 
+BOOT_ID_FILE = "/proc/sys/kernel/random/boot_id"
+
+
+def get_boot_id() -> Optional[str]:
+    """Return ID of current boot or None, when it is not possible to read it."""
+    try:
+        with open(BOOT_ID_FILE, "r") as boot_id_file:
+            return boot_id_file.read().strip()
+    except IOError:
+        return None
+
+
+def get_mtime(path: str) -> Optional[int]:
+    """Return modification time of the file (in nanoseconds) or None, when the file does not exist."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
 
 def get_arch(prefix: str = None) -> str:
     """Get the systems architecture.
@@ -55,10 +78,74 @@ def get_arch(prefix: str = None) -> str:
         raise
 
 
+class FactSourceCache:
+    """
+    Cache of facts collected by collectors, which declare invalidation key and TTL.
+    Facts of such collectors are reused until the invalidation key changes or the
+    TTL expires. The cache can be shared by collectors running in several threads.
+    """
+
+    CACHE_FILE = "/var/lib/rhsm/cache/fact_sources.json"
+
+    _lock = threading.Lock()
+
+    def _read_cache(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.CACHE_FILE, "r") as cache_file:
+                data = json.load(cache_file)
+        except (IOError, ValueError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return data
+
+    def get(self, name: str, key: str, ttl: int) -> Optional[Dict[str, Union[str, int, bool, None]]]:
+        """
+        Return cached facts of the collector, when the invalidation key is the same
+        and the facts are not older than ttl seconds. Otherwise, return None.
+        """
+        with self._lock:
+            entry = self._read_cache().get(name)
+        if not isinstance(entry, dict) or entry.get("key") != key:
+            return None
+        if time.time() - entry.get("timestamp", 0) > ttl:
+            return None
+        return entry.get("facts")
+
+    def get_last(self, name: str) -> Optional[Dict[str, Union[str, int, bool, None]]]:
+        """
+        Return the last cached facts of the collector, even when they are not valid anymore.
+        """
+        with self._lock:
+            entry = self._read_cache().get(name)
+        if not isinstance(entry, dict):
+            return None
+        return entry.get("facts")
+
+    def set(self, name: str, key: str, facts: Dict[str, Union[str, int, bool, None]]) -> None:
+        with self._lock:
+            data = self._read_cache()
+            data[name] = {"key": key, "timestamp": time.time(), "facts": facts}
+            try:
+                cache_store.write(self.CACHE_FILE, json.dumps(data))
+            except OSError as err:
+                log.debug("Unable to write cache %s: %s" % (self.CACHE_FILE, err))
+
+    @classmethod
+    def delete_cache(cls) -> None:
+        with cls._lock:
+            cache_store.remove(cls.CACHE_FILE)
+
+
 # An empty FactsCollector should just return an empty dict on get_all()
 
 
 class FactsCollector:
+    # Time (in seconds) the facts of this collector can be reused from FactSourceCache,
+    # when the invalidation key returned by cache_key() has not changed. None means
+    # that the facts are collected every time.
+    CACHE_TTL: Optional[int] = None
+
     def __init__(
         self,
         arch: str = None,
@@ -108,6 +195,36 @@ class FactsCollector:
 
         return all_hw_info
 
+    def cache_key(self) -> Optional[Dict[str, Any]]:
+        """
+        Return invalidation key of facts provided by this collector (e.g. boot ID, mtime
+        of some files, kernel version). The facts are collected again, when the key changes.
+        None means that the facts cannot be cached.
+        """
+        return None
+
+    def get_all_cached(self, facts_cache: FactSourceCache) -> Dict[str, Union[str, int, bool, None]]:
+        """
+        Return facts from the cache, when they are still valid. Otherwise, collect
+        facts using get_all() and store them in the cache.
+        """
+        key: Optional[Dict[str, Any]] = self.cache_key() if self.CACHE_TTL else None
+        if key is None:
+            return self.get_all()
+
+        name: str = type(self).__name__
+        key_str: str = json.dumps(key, sort_keys=True)
+        facts: Optional[Dict[str, Union[str, int, bool, None]]] = facts_cache.get(
+            name, key_str, self.CACHE_TTL
+        )
+        if facts is not None:
+            log.debug("Using cached facts of %s" % name)
+            return facts
+
+        facts = self.get_all()
+        facts_cache.set(name, key_str, facts)
+        return facts
+
 
 class StaticFactsCollector(FactsCollector):
     def __init__(self, static_facts: Dict[str, str] = None, **kwargs):
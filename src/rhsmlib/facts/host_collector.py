@@ -14,7 +14,8 @@
 
 import locale
 import logging
-from typing import Dict, Union
+import platform
+from typing import Any, Dict, Optional, Union
 
 from rhsmlib.facts import cleanup
 from rhsmlib.facts import virt
@@ -41,7 +42,30 @@ class HostCollector(collector.FactsCollector):
         cleanup.CleanupCollector()         [Collapse redundant facts, alter any
                                            facts that depend on output of other facts, etc.]
 
-    Facts collected include DMI info and virt status and virt.uuid."""
+    Facts collected include DMI info and virt status and virt.uuid.
+
+    These facts do not change until the next boot, so they are cached
+    in FactSourceCache, when collected by AllFactsCollector."""
+
+    CACHE_TTL = 24 * 60 * 60
+
+    # Files affecting the facts collected by this collector
+    CACHE_KEY_FILES = ["/usr/sbin/virt-what", "/usr/sbin/dmidecode"]
+
+    def cache_key(self) -> Optional[Dict[str, Any]]:
+        boot_id: Optional[str] = collector.get_boot_id()
+        if boot_id is None or self.prefix or self.testing:
+            return None
+        try:
+            default_locale = locale.getlocale(category=locale.LC_MESSAGES)
+        except ValueError:
+            default_locale = None
+        return {
+            "boot_id": boot_id,
+            "kernel": platform.release(),
+            "locale": default_locale,
+            "mtimes": {path: collector.get_mtime(path) for path in self.CACHE_KEY_FILES},
+        }
 
     def get_all(self) -> Dict[str, Union[str, int, bool, None]]:
         host_facts = {}
@@ -11,7 +11,7 @@
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 import threading
-from typing import Dict
+from typing import Callable, Dict, Iterable, List, Optional
 
 from rhsm.config import get_config_parser
 from rhsmlib.services import config
@@ -42,6 +42,9 @@ CONFIG_WATCHER = "CONFIG_WATCHER"
 PRODUCT_WATCHER = "PRODUCT_WATCHER"
 SYSPURPOSE_WATCHER = "SYSPURPOSE_WATCHER"
 
+# Default time in milliseconds, for which inotify events are collected
+DEFAULT_INOTIFY_DEBOUNCE = 500
+
 
 class FilesystemWatcher:
     """
@@ -75,10 +78,17 @@ class FilesystemWatcher:
         :return: set of dir watches that have changed, for testing purposes
         """
         changed_dir_watches = self.changed_dw_set()
-        for dir_watch in changed_dir_watches:
-            dir_watch.notify()
+        notify_all(changed_dir_watches)
         return changed_dir_watches  # returned a value for testing purposes (test_file_monitor.py)
 
+    def start(self):
+        """
+        Initializes timestamps for each dir watch in dir watch list. It has to be called,
+        when update() is called from some other loop than loop()
+        """
+        for dw in self.dir_watches.values():
+            dw.timestamp = self.get_mtime(dw)
+
     def get_mtime(self, dw):
         """
         :param dw: directory watch we are looking at
@@ -112,8 +122,7 @@ class FilesystemWatcher:
         notifies dir watch if it has changed
         :param user_end_loop_cb: callback function to be called at end of each iteration of the loop
         """
-        for dw in self.dir_watches.values():
-            dw.timestamp = self.get_mtime(dw)
+        self.start()
 
         # Never ending loop of watcher
         while not end_loop_cb(self, user_callback=user_end_loop_cb):
@@ -131,28 +140,36 @@ class InotifyFilesystemWatcher(FilesystemWatcher):
     Watches a set of directories and notifies when there are changes
 
     Inotify implementation
-    Calls callbacks associated with directory when the directory changes
-    Uses a loop running in its own thread
+    Calls callbacks associated with directory when the directory changes. Events are
+    collected for debounce_timeout milliseconds after the first event and then every
+    callback of changed dir watches is called only once.
+    Uses a loop running in its own thread, or the file descriptor returned by fileno()
+    can be watched by another main loop, which calls read_events() and notify_pending()
     ** Use create_filesystem_watcher to create instance of filesystem watcher
     """
 
     # Timeout of i-notify notifier in milliseconds
     TIMEOUT = 500
 
-    def __init__(self, dir_watches):
+    def __init__(self, dir_watches, debounce_timeout: Optional[int] = None):
         """
         Filesystem watcher if pyinotify is configured and available
         loop function will override parent class loop function
         :param dir_watches: list of directories to watch (see DirectoryWatch class below)
+        :param debounce_timeout: time in milliseconds, for which events are collected
         """
         super(InotifyFilesystemWatcher, self).__init__(dir_watches)
         self.watch_manager = None
         self.notifier = None
+        if debounce_timeout is None:
+            debounce_timeout = get_inotify_debounce()
+        self.debounce_timeout: int = debounce_timeout
+        # Dir watches changed since the last notification and time of their first change
+        self.pending: Dict[DirectoryWatch, float] = {}
 
-    def loop(self, callback=None):
+    def start(self):
         """
-        sets up watch manager, notifier, adds watches to watch manager, and starts loop
-        :param callback: callback method to be called at the end of each iteration of the loop
+        sets up watch manager, notifier and adds watches to watch manager
         """
         self.watch_manager = pyinotify.WatchManager()
         self.notifier = pyinotify.Notifier(
@@ -160,6 +177,54 @@ class InotifyFilesystemWatcher(FilesystemWatcher):
         )
         self.add_watches()
 
+    def fileno(self) -> int:
+        """
+        :return: file descriptor, which is readable, when there are some new events
+        """
+        return self.watch_manager.get_fd()
+
+    def read_events(self) -> None:
+        """
+        Read all available events without blocking and process them
+        """
+        if self.notifier.check_events(0):
+            self.notifier.read_events()
+        self.notifier.process_events()
+
+    def mark_changed(self, dir_watch: "DirectoryWatch") -> None:
+        """
+        Remember that the dir watch was changed. Its callbacks are called by notify_pending()
+        """
+        if dir_watch.temporary_disabled is True:
+            dir_watch.update_temporary_disabled_watcher()
+            if dir_watch.temporary_disabled is True:
+                log.debug("Directory watcher: %s temporary disabled. Ignoring event." % dir_watch.path)
+                return
+        self.pending.setdefault(dir_watch, time.monotonic())
+
+    def notify_pending(self) -> Optional[float]:
+        """
+        Call callbacks of dir watches, which were changed at least debounce_timeout ago
+        :return: time in seconds until next dir watch should be notified or None, when
+            there is no changed dir watch
+        """
+        now = time.monotonic()
+        timeout = self.debounce_timeout / 1000.0
+        ready = [dir_watch for dir_watch, changed in self.pending.items() if now - changed >= timeout]
+        for dir_watch in ready:
+            del self.pending[dir_watch]
+        notify_all(ready)
+        if not self.pending:
+            return None
+        return max(0.0, min(self.pending.values()) + timeout - now)
+
+    def loop(self, callback=None):
+        """
+        sets up watch manager, notifier, adds watches to watch manager, and starts loop
+        :param callback: callback method to be called at the end of each iteration of the loop
+        """
+        self.start()
+
         def inotify_callback():
             """
             This function checks if main loop should be ended or not
@@ -167,15 +232,17 @@ class InotifyFilesystemWatcher(FilesystemWatcher):
             """
             return end_loop_cb(self, user_callback=callback)
 
+        remaining: Optional[float] = None
         while not inotify_callback():
             self.notifier.process_events()
             # We use timeout to keep checks reasonably fast while still timing out
-            if self.notifier.check_events(self.TIMEOUT):
+            timeout = self.TIMEOUT
+            if remaining is not None:
+                timeout = min(timeout, int(remaining * 1000))
+            if self.notifier.check_events(timeout):
                 self.notifier.read_events()
-
-            for dir_watch in self.dir_watches.values():
-                if dir_watch.temporary_disabled is True:
-                    dir_watch.update_temporary_disabled_watcher()
+                self.notifier.process_events()
+            remaining = self.notify_pending()
 
         self.remove_watches()
 
@@ -191,14 +258,11 @@ class InotifyFilesystemWatcher(FilesystemWatcher):
 
         for dir_watch in self.dir_watches.values():
             # When watcher is temporary disabled, ten
-            if dir_watch.temporary_disabled is True:
-                log.debug("Directory watcher: %s temporary disabled. Ignoring event." % dir_watch.path)
-                continue
             # The event has to happen on file/directory we are interested in and the type of event
             # has to match the set of events we are interested in too
             if dir_watch.paths_match(event.path, event.pathname) and dir_watch.is_file_modified(event.mask):
-                # Call all callbacks associated with dir_watch
-                dir_watch.notify()
+                # Callbacks associated with dir_watch are called later by notify_pending()
+                self.mark_changed(dir_watch)
 
     def add_watches(self):
         """
@@ -269,12 +333,7 @@ class DirectoryWatch:
         """
         Calls all callbacks associated with dir watch
         """
-        for cb in self.callbacks:
-            if cb is not None:
-                try:
-                    cb()
-                except Exception as e:
-                    log.exception(e)
+        call_callbacks(self.callbacks)
 
     def paths_match(self, event_path, event_pathname):
         """
@@ -329,6 +388,28 @@ class DirectoryWatch:
             self._time_tmp_dis = 0.0
 
 
+def call_callbacks(callbacks: Iterable[Optional[Callable]]) -> None:
+    """
+    Calls every callback only once, even when it is included in the list more times
+    """
+    called: List[Callable] = []
+    for cb in callbacks:
+        if cb is not None and cb not in called:
+            called.append(cb)
+            try:
+                cb()
+            except Exception as e:
+                log.exception(e)
+
+
+def notify_all(dir_watches: Iterable["DirectoryWatch"]) -> None:
+    """
+    Calls callbacks of all dir watches. The callback associated with more dir watches
+    (e.g. reload of some D-Bus object) is called only once
+    """
+    call_callbacks(cb for dir_watch in dir_watches for cb in dir_watch.callbacks)
+
+
 def end_loop_cb(fsw, user_callback=None):
     """
     Callback method called to check if infinity loop should be finished.
@@ -377,6 +458,21 @@ def is_inotify_available():
     return pyinotify is not None
 
 
+def get_inotify_debounce() -> int:
+    """
+    Get time in milliseconds, for which inotify events are collected, from rhsm.conf.
+    :return: It returns 500 ms, when the option is not set or it is not valid.
+    """
+    try:
+        debounce = conf["rhsm"].get_int("inotify_debounce")
+    except (ValueError, configparser.Error) as e:
+        log.exception(e)
+        return DEFAULT_INOTIFY_DEBOUNCE
+    if debounce is None or debounce < 0:
+        return DEFAULT_INOTIFY_DEBOUNCE
+    return debounce
+
+
 def is_inotify_config():
     """
     Check if inotify is enabled or disabled in rhsm.conf.
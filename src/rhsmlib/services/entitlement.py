@@ -428,6 +428,7 @@ class EntitlementService:
                 page=_page,
                 items_per_page=_items_per_page,
                 iso_dates=iso_dates,
+                max_pages_in_flight=managerlib.POOL_PAGES_IN_FLIGHT,
             )
 
             timeout = cache.timeout()
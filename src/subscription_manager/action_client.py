@@ -17,7 +17,7 @@
 # in this software or its documentation.
 #
 import logging
-from typing import List, TYPE_CHECKING
+from typing import Dict, List, TYPE_CHECKING
 
 from subscription_manager import base_action_client
 
@@ -37,7 +37,6 @@ log = logging.getLogger(__name__)
 
 class ActionClient(base_action_client.BaseActionClient):
     def _get_libset(self) -> List["BaseActionInvoker"]:
-        # TODO: replace with FSM thats progress through this async and wait/joins if needed
         self.entcertlib = EntCertActionInvoker()
         self.content_client = ContentActionClient()
         self.factlib = FactsActionInvoker()
@@ -60,6 +59,20 @@ class ActionClient(base_action_client.BaseActionClient):
 
         return lib_set
 
+    def _get_dependencies(self) -> Dict["BaseActionInvoker", List["BaseActionInvoker"]]:
+        # Certificates have to be updated first. The uploads to the server do not depend
+        # on each other, so they run concurrently, except of the package profile, which
+        # contains repositories enabled in the repo files generated by content client.
+        return {
+            self.entcertlib: [],
+            self.idcertlib: [self.entcertlib],
+            self.content_client: [self.idcertlib],
+            self.factlib: [self.idcertlib],
+            self.profilelib: [self.content_client],
+            self.installedprodlib: [self.idcertlib],
+            self.syspurposelib: [self.idcertlib],
+        }
+
 
 # it may make more sense to have *Lib.cleanup actions?
 # *Lib things are weird, since some are idempotent, but
@@ -12,9 +12,11 @@
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 #
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 import logging
-from typing import List, Optional, TYPE_CHECKING
+from typing import Dict, List, Optional, TYPE_CHECKING
 
+from rhsm import timing
 from rhsm.connection import GoneException, ExpiredIdentityCertException
 
 from subscription_manager import injection as inj
@@ -31,6 +33,9 @@ class BaseActionClient:
     An object used to update the certificates, DNF repos, and facts for the system.
     """
 
+    # Maximal number of invokers running at the same time
+    MAX_CONCURRENT_UPDATES: int = 4
+
     def __init__(self, skips: List[type("ActionReport")] = None):
         self._libset: List[BaseActionInvoker] = self._get_libset()
         self.lock: ActionLock = inj.require(inj.ACTION_LOCK)
@@ -41,6 +46,15 @@ class BaseActionClient:
         # FIXME (?) Raise NotImplementedError, to ensure each subclass is using its own function
         return []
 
+    def _get_dependencies(self) -> Optional[Dict["BaseActionInvoker", List["BaseActionInvoker"]]]:
+        """
+        Return dictionary with invokers, which have to be finished before the invoker
+        is started. Invokers, which do not depend on each other, can run concurrently.
+        None means that invokers run one by one in the order of the libset. The libset
+        can be a generator in this case.
+        """
+        return None
+
     def update(self) -> None:
         """
         Update entitlement certificates and corresponding DNF repositories.
@@ -56,7 +70,8 @@ class BaseActionClient:
         update_report: Optional[ActionReport] = None
 
         try:
-            update_report = lib.update()
+            with timing.span("invoker", type(lib).__name__):
+                update_report = lib.update()
         # see bz#852706, reraise GoneException so that consumer cert deletion works
         except GoneException:
             raise
@@ -73,6 +88,10 @@ class BaseActionClient:
         return update_report
 
     def _run_updates(self) -> List["ActionReport"]:
+        dependencies = self._get_dependencies()
+        if dependencies is not None:
+            return self._run_concurrent_updates(dependencies)
+
         update_reports: List[ActionReport] = []
 
         for lib in self._libset:
@@ -86,3 +105,95 @@ class BaseActionClient:
             update_reports.append(update_report)
 
         return update_reports
+
+    def _check_dependencies(self, dependencies: Dict["BaseActionInvoker", List["BaseActionInvoker"]]) -> None:
+        """
+        Raise ValueError, when some invoker depends on an invoker, which is not in the libset,
+        or when invokers depend on each other, so they could never be started.
+        """
+        unknown = [
+            dependency
+            for lib in self._libset
+            for dependency in dependencies.get(lib, [])
+            if dependency not in self._libset
+        ]
+        if unknown:
+            raise ValueError("Invokers %s are not in the libset" % ", ".join(str(lib) for lib in unknown))
+        ordered: List[BaseActionInvoker] = []
+        remaining: List[BaseActionInvoker] = list(self._libset)
+        while remaining:
+            ready = [
+                lib
+                for lib in remaining
+                if all(dependency in ordered for dependency in dependencies.get(lib, []))
+            ]
+            if not ready:
+                raise ValueError(
+                    "Cyclic dependencies of invokers %s" % ", ".join(str(lib) for lib in remaining)
+                )
+            for lib in ready:
+                remaining.remove(lib)
+                ordered.append(lib)
+
+    def _run_concurrent_updates(
+        self, dependencies: Dict["BaseActionInvoker", List["BaseActionInvoker"]]
+    ) -> List["ActionReport"]:
+        """
+        Run invokers in the order given by their dependencies. Invokers, which are ready
+        at the same time, run concurrently in a thread pool. Reports are returned in the
+        order of the libset. When some invoker raises an exception, then no other invoker
+        is started and the exception is raised, when running invokers are finished.
+        Invalid dependencies are reported by ValueError before any invoker is started.
+        """
+        self._check_dependencies(dependencies)
+        libs: List[BaseActionInvoker] = [lib for lib in self._libset if type(lib) not in self.skips]
+        # Skipped invokers are considered to be finished
+        finished: List[BaseActionInvoker] = [lib for lib in self._libset if lib not in libs]
+        pending: List[BaseActionInvoker] = list(libs)
+        running: Dict[Future, BaseActionInvoker] = {}
+        update_reports: Dict[BaseActionInvoker, ActionReport] = {}
+        error: Optional[Exception] = None
+        executor: Optional[ThreadPoolExecutor] = None
+
+        try:
+            while pending or running:
+                ready = []
+                if error is None:
+                    ready = [
+                        lib
+                        for lib in pending
+                        if all(dependency in finished for dependency in dependencies.get(lib, []))
+                    ]
+                for lib in ready:
+                    pending.remove(lib)
+                    log.debug("running lib: %s" % lib)
+                    # Do not start new thread, when there is nothing to run concurrently
+                    if len(ready) == 1 and not running:
+                        update_reports[lib] = self._run_update(lib)
+                        finished.append(lib)
+                        break
+                    if executor is None:
+                        executor = ThreadPoolExecutor(
+                            max_workers=self.MAX_CONCURRENT_UPDATES, thread_name_prefix="ActionClient"
+                        )
+                    running[executor.submit(self._run_update, lib)] = lib
+                if not running:
+                    if ready:
+                        continue
+                    # There is nothing to run due to exception
+                    break
+                done, _not_done = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    lib = running.pop(future)
+                    try:
+                        update_reports[lib] = future.result()
+                    except Exception as err:
+                        error = error or err
+                    finished.append(lib)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        if error is not None:
+            raise error
+        return [update_reports[lib] for lib in libs if lib in update_reports]
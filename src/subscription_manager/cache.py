@@ -25,7 +25,7 @@ import os
 import socket
 import threading
 import time
-from typing import Dict, TextIO, Literal, Optional, List, Any, Set, TYPE_CHECKING
+from typing import Callable, Dict, TextIO, Literal, Optional, List, Any, Set, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from rhsm.certificate2 import EntitlementCertificate, Product
@@ -38,10 +38,12 @@ from rhsm.https import ssl
 
 from rhsm.config import get_config_parser
 import rhsm.connection as connection
-from rhsm.profile import get_profile
+from rhsm.profile import get_profile, get_rpmdb_cookie, profile_delta, profile_digest
 import subscription_manager.injection as inj
 from subscription_manager.jsonwrapper import PoolWrapper
+from rhsm import cache_store
 from rhsm import ourjson as json
+from rhsm import timing
 from subscription_manager.isodate import parse_date
 from subscription_manager.utils import get_supported_resources
 from syspurpose.files import post_process_received_data
@@ -54,6 +56,9 @@ log = logging.getLogger(__name__)
 
 PACKAGES_RESOURCE = "packages"
 
+# Capability of server allowing to upload only changes of combined profile
+PROFILE_DELTA_CAPABILITY = "combined_reporting_delta"
+
 conf = config.Config(get_config_parser())
 
 
@@ -68,6 +73,10 @@ class CacheManager:
     # Fields the subclass must override:
     CACHE_FILE: str = None
 
+    # Version of format of data in CACHE_FILE. The cache written with other
+    # version of format is not used.
+    SCHEMA_VERSION: int = 1
+
     def to_dict(self) -> Dict:
         """
         Returns the data for this collection as a dict to be serialized
@@ -109,6 +118,12 @@ class CacheManager:
     def exists(self) -> bool:
         return self._cache_exists()
 
+    def _cache_metadata(self) -> Dict[str, Any]:
+        """
+        Metadata stored together with the cache in the index of cache store
+        """
+        return {}
+
     def write_cache(self, debug: bool = True) -> None:
         """
         Write the current cache to disk. Should only be done after
@@ -121,11 +136,15 @@ class CacheManager:
         """
         # Logging in this method (when threaded) can cause a segfault, BZ 988861 and 988430
         try:
-            if not os.access(os.path.dirname(self.CACHE_FILE), os.R_OK):
-                os.makedirs(os.path.dirname(self.CACHE_FILE))
-            f: TextIO = open(self.CACHE_FILE, "w+")
-            json.dump(self.to_dict(), f, default=json.encode)
-            f.close()
+            with timing.span("cache", self.CACHE_FILE, operation="write"):
+                if not os.access(os.path.dirname(self.CACHE_FILE), os.R_OK):
+                    os.makedirs(os.path.dirname(self.CACHE_FILE))
+                cache_store.write(
+                    self.CACHE_FILE,
+                    json.dumps(self.to_dict(), default=json.encode),
+                    schema=self.SCHEMA_VERSION,
+                    **self._cache_metadata(),
+                )
             if debug:
                 log.debug("Wrote cache: %s" % self.CACHE_FILE)
         except IOError as err:
@@ -138,10 +157,15 @@ class CacheManager:
         Returns none if no cache file exists.
         """
 
+        metadata: Optional[Dict] = cache_store.metadata(self.CACHE_FILE)
+        if metadata is not None and metadata["schema"] != self.SCHEMA_VERSION:
+            log.debug("Format of cache %s is not supported, ignoring it" % self.CACHE_FILE)
+            return None
         try:
-            f = open(self.CACHE_FILE)
-            data: dict = self._load_data(f)
-            f.close()
+            with timing.span("cache", self.CACHE_FILE, operation="read"):
+                f = open(self.CACHE_FILE)
+                data: dict = self._load_data(f)
+                f.close()
             return data
         except IOError as err:
             log.error("Unable to read cache: %s" % self.CACHE_FILE)
@@ -218,6 +242,10 @@ class StatusCache(CacheManager):
     def __init__(self):
         self.server_status: Optional[Dict] = None
         self.last_error: Optional[Exception] = None
+        # Validators of the response, which the status was created from
+        self.validators: Optional[connection.ResponseValidators] = None
+        # UUID of the consumer, which the status was loaded for
+        self.uuid: Optional[str] = None
 
     def load_status(
         self, uep: connection.UEPConnection, uuid: Optional[str], on_date: Optional[datetime.datetime] = None
@@ -237,6 +265,7 @@ class StatusCache(CacheManager):
             # and None has to be returned
             if uuid is None:
                 return None
+            self.uuid = uuid
             self._sync_with_server(uep, uuid, on_date)
             self.write_cache()
             self.last_error = False
@@ -269,6 +298,11 @@ class StatusCache(CacheManager):
             if not self._cache_exists():
                 log.error("Server unreachable, registered, but no cache exists.")
                 return None
+            if self.server_status is None:
+                metadata: Optional[Dict] = cache_store.metadata(self.CACHE_FILE)
+                if metadata is not None and metadata["uuid"] not in (None, uuid):
+                    log.error("Server unreachable, cached status belongs to other consumer.")
+                    return None
 
             log.warning("Unable to reach server, using cached status.")
             return self._read_cache()
@@ -297,6 +331,47 @@ class StatusCache(CacheManager):
         """
         raise NotImplementedError
 
+    def _read_validators(self) -> connection.ResponseValidators:
+        """
+        Return validators of the cached status. The validators are empty, when
+        the status is not cached or the validators were not stored.
+        """
+        if self.validators is None:
+            self.validators = connection.ResponseValidators()
+            metadata: Optional[Dict] = cache_store.metadata(self.CACHE_FILE)
+            if metadata is not None and metadata["validators"] is not None:
+                try:
+                    self.validators = connection.ResponseValidators.from_dict(metadata["validators"])
+                except (ValueError, AttributeError):
+                    pass
+        return self.validators
+
+    def _get_status(self, get_status: Callable[[connection.ResponseValidators], Any]) -> Tuple[bool, Any]:
+        """
+        Get status from server using conditional request, when validators of the cached
+        status are known. Returns tuple (False, None), when the status was not modified
+        and the cached status is kept in server_status. Otherwise, it returns True and
+        the response.
+        """
+        validators: connection.ResponseValidators = self._read_validators()
+        response: Any = get_status(validators)
+        if validators.not_modified:
+            cached_status: Optional[Dict] = self._read_cache()
+            if cached_status is not None:
+                log.debug("Status was not modified, using %s" % self.CACHE_FILE)
+                self.server_status = cached_status
+                return False, None
+            log.debug("Unable to read %s, requesting status once again" % self.CACHE_FILE)
+            self.validators = connection.ResponseValidators()
+            response = get_status(self.validators)
+        return True, response
+
+    def _cache_metadata(self) -> Dict[str, Any]:
+        return {
+            "uuid": self.uuid,
+            "validators": self.validators.to_dict() if self.validators else None,
+        }
+
     def _read_cache(self) -> Optional[Dict]:
         """
         Prefer in memory cache to avoid io.  If it doesn't exist, save
@@ -358,6 +433,7 @@ class StatusCache(CacheManager):
     def delete_cache(self) -> None:
         super(StatusCache, self).delete_cache()
         self.server_status = None
+        self.validators = None
 
 
 class EntitlementStatusCache(StatusCache):
@@ -385,10 +461,16 @@ class ProductStatusCache(StatusCache):
     def _sync_with_server(
         self, uep: connection.UEPConnection, consumer_uuid: str, _: Optional[datetime.datetime] = None
     ) -> None:
-        consumer_data: Dict = uep.getConsumer(consumer_uuid)
+        modified, consumer_data = self._get_status(
+            lambda validators: uep.getConsumer(consumer_uuid, validators=validators)
+        )
+        if not modified:
+            return
 
         if "installedProducts" not in consumer_data:
             log.warning("Server does not support product date ranges.")
+            # Status was not created from this response
+            self.validators = connection.ResponseValidators()
         else:
             self.server_status = consumer_data["installedProducts"]
 
@@ -403,7 +485,11 @@ class OverrideStatusCache(StatusCache):
     def _sync_with_server(
         self, uep: connection.UEPConnection, consumer_uuid: str, _: Optional[datetime.datetime] = None
     ) -> None:
-        self.server_status = uep.getContentOverrides(consumer_uuid)
+        modified, overrides = self._get_status(
+            lambda validators: uep.getContentOverrides(consumer_uuid, validators=validators)
+        )
+        if modified:
+            self.server_status = overrides
 
 
 class ReleaseStatusCache(StatusCache):
@@ -416,12 +502,14 @@ class ReleaseStatusCache(StatusCache):
     def _sync_with_server(
         self, uep: connection.UEPConnection, consumer_uuid: str, _: Optional[datetime.datetime] = None
     ) -> None:
-        def get_release(uuid: str) -> Dict:
+        def get_release(validators: connection.ResponseValidators) -> Optional[Dict]:
             # To mimic connection problems you can raise required exception:
             # raise connection.RemoteServerException(500, "GET", "/release")
-            return uep.getRelease(uuid)
+            return uep.getRelease(consumer_uuid, validators=validators)
 
-        self.server_status = get_release(consumer_uuid)
+        modified, release = self._get_status(get_release)
+        if modified:
+            self.server_status = release
 
     # our read_status could check for "full_refresh_on_yum", since
     # we are yum specific, and not triggered till late.
@@ -435,10 +523,16 @@ class ProfileManager(CacheManager):
 
     CACHE_FILE = "/var/lib/rhsm/cache/profile.json"
 
+    PROFILE_TYPES = ("rpm", "enabled_repos", "modulemd")
+
     def __init__(self):
         # Could be None, we'll read the system's current profile later once
         # we're sure we actually need the data.
         self._current_profile = None
+        # Cookie of rpmdb read just before the current profile was created
+        self._rpmdb_cookie: Optional[str] = None
+        # When the upload is forced, then whole profile is always sent to server
+        self._full_upload_required: bool = False
         self.report_package_profile = self.profile_reporting_enabled()
         self.identity = inj.require(inj.IDENTITY)
 
@@ -463,10 +557,31 @@ class ProfileManager(CacheManager):
         }
         return combined_profile
 
+    def _unchanged_rpm_profile(self, rpmdb_cookie: Optional[str]) -> Optional[List[Dict]]:
+        """
+        When the rpm database was not modified since the last time we wrote the cache,
+        then return the list of packages from the cache. Otherwise, return None.
+        """
+        if rpmdb_cookie is None:
+            return None
+        index: Optional[Dict] = self._read_index()
+        if index is None or index.get("rpmdb_cookie") != rpmdb_cookie:
+            return None
+        cached_profile: Optional[Dict] = self._read_cache()
+        if not isinstance(cached_profile, dict) or "rpm" not in cached_profile:
+            return None
+        log.debug("The rpm database has not changed, using list of packages from %s" % self.CACHE_FILE)
+        return cached_profile["rpm"]
+
     @property
     def current_profile(self) -> Dict[str, List[Dict]]:
         if not self._current_profile:
-            rpm_profile: List[Dict] = get_profile("rpm").collect()
+            # The cookie has to be read before rpmdb, because rpmdb could be changed
+            # during reading the list of installed packages
+            self._rpmdb_cookie = get_rpmdb_cookie()
+            rpm_profile: Optional[List[Dict]] = self._unchanged_rpm_profile(self._rpmdb_cookie)
+            if rpm_profile is None:
+                rpm_profile = get_profile("rpm").collect()
             enabled_repos: List[Dict] = get_profile("enabled_repos").collect()
             module_profile: List[Dict] = get_profile("modulemd").collect()
             combined_profile: Dict[str, List[Dict]] = self._assembly_profile(
@@ -478,6 +593,7 @@ class ProfileManager(CacheManager):
     @current_profile.setter
     def current_profile(self, new_profile: Dict[str, List[Dict]]):
         self._current_profile = new_profile
+        self._rpmdb_cookie = None
 
     def to_dict(self) -> Dict[str, List[Dict]]:
         return self.current_profile
@@ -486,6 +602,35 @@ class ProfileManager(CacheManager):
         json_str: str = open_file.read()
         return json.loads(json_str)
 
+    @classmethod
+    def _profile_digests(cls, profile: Dict[str, List[Dict]]) -> Dict[str, str]:
+        return {
+            profile_type: profile_digest(profile.get(profile_type, [])) for profile_type in cls.PROFILE_TYPES
+        }
+
+    def _cache_metadata(self) -> Dict[str, Any]:
+        # State of rpmdb and digests of the profile are stored in the index of cache store,
+        # so they are never used with other content of CACHE_FILE
+        return {
+            "validators": {
+                "rpmdb_cookie": self._rpmdb_cookie,
+                "digests": self._profile_digests(self.current_profile),
+            }
+        }
+
+    def _read_index(self) -> Optional[Dict]:
+        """
+        Load the index of cached profile from the cache store. Returns None, when the index
+        does not exist or it is corrupted.
+        """
+        metadata: Optional[Dict] = cache_store.metadata(self.CACHE_FILE)
+        if metadata is None:
+            return None
+        index: Optional[Dict] = metadata.get("validators")
+        if not isinstance(index, dict) or not isinstance(index.get("digests"), dict):
+            return None
+        return index
+
     def update_check(
         self, uep: connection.UEPConnection, consumer_uuid: str, force: bool = False
     ) -> Literal[0, 1]:
@@ -500,6 +645,7 @@ class ProfileManager(CacheManager):
             return 0
 
         if force or self.report_package_profile:
+            self._full_upload_required = force
             return CacheManager.update_check(self, uep, consumer_uuid, force)
         elif not self.report_package_profile:
             log.warning("Skipping package profile upload due to report_package_profile setting.")
@@ -512,6 +658,10 @@ class ProfileManager(CacheManager):
             log.debug("Cache file %s does not exist" % self.CACHE_FILE)
             return True
 
+        index: Optional[Dict] = self._read_index()
+        if index is not None:
+            return self._profile_digests(self.current_profile) != index["digests"]
+
         cached_profile: Optional[str] = self._read_cache()
         return not cached_profile == self.current_profile
 
@@ -524,6 +674,9 @@ class ProfileManager(CacheManager):
         """
         combined_profile: Dict = self.current_profile
         if uep.has_capability("combined_reporting"):
+            if not self._full_upload_required and uep.has_capability(PROFILE_DELTA_CAPABILITY):
+                if self._sync_delta_with_server(uep, consumer_uuid, combined_profile):
+                    return
             _combined_profile: List[Dict] = [
                 {"content_type": "rpm", "profile": combined_profile["rpm"]},
                 {"content_type": "enabled_repos", "profile": combined_profile["enabled_repos"]},
@@ -533,6 +686,59 @@ class ProfileManager(CacheManager):
         else:
             uep.updatePackageProfile(consumer_uuid, combined_profile["rpm"])
 
+    def _profile_delta(self, combined_profile: Dict[str, List[Dict]]) -> Optional[List[Dict]]:
+        """
+        Compute changes of current profile against the profile stored in cache, which is the
+        profile that has been uploaded to the server. Returns None, when it is not possible
+        to compute the delta, because there is no usable cache.
+        """
+        if not self._cache_exists():
+            return None
+        cached_profile: Optional[Dict] = self._read_cache()
+        if not isinstance(cached_profile, dict):
+            return None
+        _profile_delta: List[Dict] = []
+        for profile_type in self.PROFILE_TYPES:
+            if not isinstance(cached_profile.get(profile_type), list):
+                return None
+            delta: Dict[str, List] = profile_delta(
+                profile_type, cached_profile[profile_type], combined_profile[profile_type]
+            )
+            if delta["added"] or delta["removed"] or delta["changed"]:
+                _profile_delta.append({"content_type": profile_type, **delta})
+        return _profile_delta
+
+    def _sync_delta_with_server(
+        self, uep: connection.UEPConnection, consumer_uuid: str, combined_profile: Dict[str, List[Dict]]
+    ) -> bool:
+        """
+        Try to send only changes of combined profile to the server.
+        :return: True, when delta was sent to the server; False, when whole profile has to be sent
+        """
+        _profile_delta: Optional[List[Dict]] = self._profile_delta(combined_profile)
+        if _profile_delta is None:
+            log.debug("Unable to compute delta of profile, uploading whole profile")
+            return False
+        if not _profile_delta:
+            log.debug("Profile has not changed since the last upload")
+            return True
+        try:
+            uep.updateCombinedProfileDelta(consumer_uuid, _profile_delta)
+        except connection.RateLimitExceededException:
+            raise
+        except (connection.RestlibException, connection.RemoteServerException) as err:
+            log.warning("Unable to upload delta of profile, uploading whole profile: %s" % err)
+            return False
+        log.debug(
+            "Uploaded delta of profile: %s"
+            % ", ".join(
+                "%s: +%d -%d ~%d"
+                % (item["content_type"], len(item["added"]), len(item["removed"]), len(item["changed"]))
+                for item in _profile_delta
+            )
+        )
+        return True
+
 
 class InstalledProductsManager(CacheManager):
     """
@@ -640,7 +846,11 @@ class PoolStatusCache(StatusCache):
     def _sync_with_server(
         self, uep: connection.UEPConnection, consumer_uuid: str, _: Optional[datetime.datetime] = None
     ) -> None:
-        self.server_status = uep.getEntitlementList(consumer_uuid)
+        modified, entitlements = self._get_status(
+            lambda validators: uep.getEntitlementList(consumer_uuid, validators=validators)
+        )
+        if modified:
+            self.server_status = entitlements
 
 
 class PoolTypeCache:
@@ -754,8 +964,7 @@ class ContentAccessCache:
 
     def _update_cache(self, data: Dict) -> None:
         log.debug("Updating content access cache")
-        with open(self.CACHE_FILE, "w") as cache:
-            cache.write(json.dumps(data))
+        cache_store.write(self.CACHE_FILE, json.dumps(data))
 
     def read(self) -> str:
         with open(self.CACHE_FILE, "r") as cache:
@@ -790,6 +999,113 @@ class WrittenOverrideCache(CacheManager):
             pass
 
 
+class RepoFingerprintCache(CacheManager):
+    """
+    Cache to keep track of the fingerprint of the content used last time
+    the repo files were generated, together with the status of the repo
+    files written at that time. When neither has changed, there is no need
+    to generate the repo files again.
+    """
+
+    CACHE_FILE = "/var/lib/rhsm/cache/repo_fingerprint.json"
+
+    def __init__(self, fingerprint: Optional[str] = None, files: Optional[Dict] = None):
+        self.fingerprint: Optional[str] = fingerprint
+        self.files: Dict[str, Optional[List[int]]] = files or {}
+
+    def to_dict(self) -> Dict:
+        return {"fingerprint": self.fingerprint, "files": self.files}
+
+    def _load_data(self, open_file: TextIO) -> Optional[Dict]:
+        try:
+            data: Dict = json.loads(open_file.read()) or {}
+            self.fingerprint = data.get("fingerprint")
+            self.files = data.get("files") or {}
+            return data
+        except IOError as err:
+            log.error("Unable to read cache: %s" % self.CACHE_FILE)
+            log.exception(err)
+        except ValueError:
+            # ignore json file parse errors, we are going to generate
+            # a new as if it didn't exist
+            pass
+
+    def is_current(self, fingerprint: str, files: Dict[str, Optional[List[int]]]) -> bool:
+        """
+        Check if the repo files were generated from content with the given
+        fingerprint and if they were not modified since then.
+
+        :param fingerprint: fingerprint of the current content
+        :param files: current status of the repo files (see RepoFileBase.stat())
+        """
+        return self.fingerprint is not None and self.fingerprint == fingerprint and self.files == files
+
+
+class ContentModelCache(CacheManager):
+    """
+    Cache of repos created from the content of entitlement certificates. The repos
+    are stored together with the key describing everything they were created from
+    and with the time, when some entitlement certificate becomes valid or expires.
+    """
+
+    CACHE_FILE = "/var/lib/rhsm/cache/content_model.json"
+
+    def __init__(self):
+        self.key: Optional[str] = None
+        self.expires: Optional[float] = None
+        self.repos: List[Dict] = []
+        self._loaded: bool = False
+
+    def to_dict(self) -> Dict:
+        return {"key": self.key, "expires": self.expires, "repos": self.repos}
+
+    def _load_data(self, open_file: TextIO) -> Optional[Dict]:
+        try:
+            data: Dict = json.loads(open_file.read()) or {}
+            self.key = data.get("key")
+            self.expires = data.get("expires")
+            self.repos = data.get("repos") or []
+            return data
+        except IOError as err:
+            log.error("Unable to read cache: %s" % self.CACHE_FILE)
+            log.exception(err)
+        except ValueError:
+            # ignore json file parse errors, we are going to generate
+            # a new as if it didn't exist
+            pass
+
+    def get_repos(self, key: str) -> Optional[List[Dict]]:
+        """
+        Return cached repos, when they were created for the given key and
+        no entitlement certificate has become valid or expired since then.
+
+        :param key: key describing current entitlement certificates, configuration, etc.
+        :return: list of repos or None, when the cache cannot be used
+        """
+        if not self._loaded:
+            self.read_cache_only()
+            self._loaded = True
+        if self.key is None or self.key != key:
+            return None
+        if self.expires is not None and time.time() >= self.expires:
+            return None
+        return self.repos
+
+    def set_repos(self, key: str, repos: List[Dict], expires: Optional[float]) -> None:
+        """
+        Store repos created for the given key.
+
+        :param key: key describing current entitlement certificates, configuration, etc.
+        :param repos: list of repos
+        :param expires: time, when the repos have to be created again
+        """
+        self.key = key
+        self.repos = repos
+        self.expires = expires
+        self._loaded = True
+        self.write_cache(debug=False)
+
+
 class ConsumerCache(CacheManager):
     """
     Base class for caching data that gets automatically obsoleted, when consumer uuid
@@ -1266,6 +1582,5 @@ class CloudTokenCache:
 
     @classmethod
     def _save_to_file(cls, token: Dict[str, str]) -> None:
-        with open(cls.CACHE_FILE, "w") as f:
-            json.dump(token, f)
+        cache_store.write(cls.CACHE_FILE, json.dumps(token))
         log.debug(f"Candlepin JWT was saved to a cache file ({cls.CACHE_FILE}).")
@@ -13,9 +13,14 @@
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 #
+import datetime
+import json
 import logging
 import os
-from typing import Dict, List, Optional, Set, Tuple, TYPE_CHECKING
+import shutil
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple, TYPE_CHECKING
 
 from rhsm.certificate import Key, create_from_file
 from rhsm.config import get_config_parser
@@ -98,47 +103,262 @@ class Directory:
         return self.path
 
 
+def _stat_key(path: str) -> Optional[List[int]]:
+    """
+    Return inode, modification time and size of the file. The certificate has to be
+    parsed again, when any of them is changed.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_ino, st.st_mtime_ns, st.st_size]
+
+
+def _timestamp(getter: Callable[[], datetime.datetime]) -> Optional[float]:
+    try:
+        date = getter()
+    except Exception:
+        return None
+    if not isinstance(date, datetime.datetime) or date.tzinfo is None:
+        return None
+    return date.timestamp()
+
+
+def _may_be_valid(entry: dict, now: float) -> bool:
+    """
+    Check if certificate with given index entry could be valid now
+    """
+    return (entry["start"] is None or entry["start"] <= now) and (entry["end"] is None or now <= entry["end"])
+
+
+def _may_be_expired(entry: dict, now: float) -> bool:
+    """
+    Check if certificate with given index entry could be expired now
+    """
+    return entry["end"] is None or entry["end"] < now
+
+
+class CertificateDirectoryIndex:
+    """
+    Index of certificates in one certificate directory. The index maps serial numbers,
+    product IDs, pool IDs and stacking IDs to certificate files and it also contains
+    validity windows of certificates. The index is stored in INDEX_FILE, so other processes
+    do not have to parse all certificates just to find one of them. Entries of the index
+    are invalidated, when inode, modification time or size of the file is changed.
+    """
+
+    INDEX_FILE = "/var/lib/rhsm/cache/cert_index.json"
+
+    # Keys of entry, which can be used for lookup
+    LOOKUP_KEYS = ("serial", "products", "pool_id", "stacking_id")
+
+    def __init__(self, path: str):
+        self.path = path
+        # Entries of certificate files ordered like the files in the directory
+        self.entries: Dict[str, dict] = {}
+        self._lookup: Dict[str, Dict[str, List[str]]] = {}
+
+    @staticmethod
+    def entry_for_cert(cert: "EntitlementCertificate", stat_key: Optional[List[int]]) -> dict:
+        """
+        Create index entry with information about certificate needed for lookups
+        """
+        pool = getattr(cert, "pool", None)
+        order = getattr(cert, "order", None)
+        stacking_id = getattr(order, "stacking_id", None) if order else None
+        valid_range = getattr(cert, "valid_range", None)
+        entitlement_type = getattr(cert, "entitlement_type", None)
+        return {
+            "stat": stat_key,
+            "serial": str(cert.serial),
+            "products": [str(product.id) for product in getattr(cert, "products", None) or []],
+            "pool_id": str(pool.id) if pool and pool.id is not None else None,
+            "stacking_id": str(stacking_id) if stacking_id else None,
+            "start": _timestamp(valid_range.begin) if valid_range else None,
+            "end": _timestamp(valid_range.end) if valid_range else None,
+            "entitlement_type": str(entitlement_type) if entitlement_type is not None else None,
+        }
+
+    def _read(self) -> dict:
+        try:
+            with open(self.INDEX_FILE) as index_file:
+                data = json.load(index_file)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return data
+
+    def _write(self) -> None:
+        index_dir = os.path.dirname(self.INDEX_FILE)
+        if not os.path.isdir(index_dir):
+            return
+        # Entries of directories, which do not exist anymore (e.g. temporary directories)
+        # are removed, so the index does not grow forever
+        data = {path: entries for path, entries in self._read().items() if os.path.isdir(path)}
+        data[self.path] = self.entries
+        try:
+            with tempfile.NamedTemporaryFile(mode="w", dir=index_dir, delete=False) as index_file:
+                json.dump(data, index_file)
+            os.rename(index_file.name, self.INDEX_FILE)
+        except (OSError, TypeError, ValueError) as err:
+            log.debug(f"Unable to write index of certificates {self.INDEX_FILE}: {err}")
+
+    def update(self, filenames: List[str], load_cert: Callable[[str], "EntitlementCertificate"]) -> None:
+        """
+        Update the index according to given list of certificate files. Only new and changed
+        certificates are loaded using load_cert() callback. The index is stored, when it
+        was changed.
+        """
+        stored = self.entries or self._read().get(self.path) or {}
+        entries = {}
+        changed = len(stored) != len(filenames)
+        for filename in filenames:
+            stat_key = _stat_key(os.path.join(self.path, filename))
+            entry = stored.get(filename)
+            if entry is None or stat_key is None or entry.get("stat") != stat_key:
+                entry = self.entry_for_cert(load_cert(filename), stat_key)
+                changed = True
+            entries[filename] = entry
+        self.entries = entries
+
+        self._lookup = {key: {} for key in self.LOOKUP_KEYS}
+        for filename, entry in entries.items():
+            for key in self.LOOKUP_KEYS:
+                values = entry.get(key)
+                if not isinstance(values, list):
+                    values = [values]
+                for value in values:
+                    if value is not None:
+                        self._lookup[key].setdefault(value, []).append(filename)
+
+        if changed:
+            self._write()
+
+    def lookup(self, key: str, value: str) -> List[str]:
+        """
+        Return list of certificate files having given value of the key
+        """
+        return self._lookup.get(key, {}).get(str(value), [])
+
+    def filter(self, predicate: Callable[[dict], bool]) -> List[str]:
+        """
+        Return list of certificate files with entries matching the predicate
+        """
+        return [filename for filename, entry in self.entries.items() if predicate(entry)]
+
+
 class CertificateDirectory(Directory):
     KEY = "key.pem"
 
+    # Index of certificates used for lookups; directories without index (e.g. stubs
+    # or directories merging more directories) scan all listed certificates
+    _index: Optional[CertificateDirectoryIndex] = None
+
     def __init__(self, path: str):
         super(CertificateDirectory, self).__init__(path)
         self.create()
         self._listing: Optional[List["EntitlementCertificate"]] = None
+        # Parsed certificates: filename -> (stat key, certificate)
+        self._certs: Dict[str, Tuple[Optional[List[int]], "EntitlementCertificate"]] = {}
+        self._index = CertificateDirectoryIndex(self.path)
+        self._index_updated = False
 
     def refresh(self) -> None:
-        # simply clear the cache. the next list() will reload.
+        # simply clear the cache. the next list() will reload. Certificates, which
+        # have not been changed, are not parsed again.
         self._listing = None
+        self._index_updated = False
+
+    def _cert_files(self) -> List[str]:
+        filenames = [
+            fn for _p, fn in Directory.list(self) if fn.endswith(".pem") and not fn.endswith(self.KEY)
+        ]
+        # Forget parsed certificates of removed files
+        for filename in set(self._certs).difference(filenames):
+            del self._certs[filename]
+        return filenames
+
+    def _load_cert(self, filename: str) -> "EntitlementCertificate":
+        """
+        Parse certificate file, when it has not been parsed yet or it was changed
+        """
+        path = self.abspath(filename)
+        stat_key = _stat_key(path)
+        cached = self._certs.get(filename)
+        if cached is not None and stat_key is not None and cached[0] == stat_key:
+            return cached[1]
+        cert = create_from_file(path)
+        self._certs[filename] = (stat_key, cert)
+        return cert
+
+    def files_state(self) -> List[list]:
+        """
+        Return paths and stat keys of all files in the directory. The state is changed,
+        when any certificate or key is added, removed or modified.
+        """
+        return sorted([self.abspath(fn), _stat_key(self.abspath(fn))] for _p, fn in Directory.list(self))
+
+    def _is_listed(self, entry: dict) -> bool:
+        """
+        Check if certificate with given index entry is returned by list()
+        """
+        return True
+
+    def _candidates(
+        self,
+        key: Optional[str] = None,
+        value: Optional[str] = None,
+        predicate: Optional[Callable[[dict], bool]] = None,
+    ) -> List["EntitlementCertificate"]:
+        """
+        Return certificates, which could match given value of index key or predicate of index
+        entry, in the same order as list() returns them. Caller has to check returned certificates.
+        When certificates have not been listed yet, then only matching certificates are parsed.
+        """
+        if self._index is None or self._listing is not None:
+            return self.list()
+        if not self._index_updated:
+            self._index.update(self._cert_files(), self._load_cert)
+            self._index_updated = True
+        if key is not None:
+            filenames = self._index.lookup(key, value)
+        else:
+            filenames = self._index.filter(predicate)
+        return [
+            self._load_cert(filename)
+            for filename in filenames
+            if self._is_listed(self._index.entries[filename])
+        ]
 
     def list(self) -> List["EntitlementCertificate"]:
         if self._listing is not None:
             return self._listing
         listing = []
-        for _p, fn in Directory.list(self):
-            if not fn.endswith(".pem") or fn.endswith(self.KEY):
-                continue
-            path = self.abspath(fn)
-            listing.append(create_from_file(path))
+        for fn in self._cert_files():
+            listing.append(self._load_cert(fn))
         self._listing = listing
         return listing
 
     def list_valid(self) -> List["EntitlementCertificate"]:
+        now = time.time()
         valid = []
-        for c in self.list():
+        for c in self._candidates(predicate=lambda entry: _may_be_valid(entry, now)):
             if c.is_valid():
                 valid.append(c)
         return valid
 
     def list_expired(self) -> List["EntitlementCertificate"]:
+        now = time.time()
         expired = []
-        for c in self.list():
+        for c in self._candidates(predicate=lambda entry: _may_be_expired(entry, now)):
             if c.is_expired():
                 expired.append(c)
         return expired
 
     def find(self, sn: str) -> Optional["EntitlementCertificate"]:
-        # TODO: could optimize to just load SERIAL.pem? Maybe not in all cases.
-        for c in self.list():
+        for c in self._candidates("serial", sn):
             if c.serial == sn:
                 return c
         return None
@@ -146,11 +366,10 @@ class CertificateDirectory(Directory):
     def find_all_by_product(self, p_hash: str) -> List["EntitlementCertificate"]:
         certs = set()
         providing_stack_ids = set()
-        stack_id_map = {}
 
         # Note this will override a product cert for id '71' with
         # a different product cert for id '71' if it is later in self.list
-        for c in self.list():
+        for c in self._candidates("products", p_hash):
             for p in c.products:
                 if p.id == p_hash:
                     certs.add(c)
@@ -158,20 +377,16 @@ class CertificateDirectory(Directory):
                     if c.order and c.order.stacking_id:
                         providing_stack_ids.add(c.order.stacking_id)
 
-            # Keep track of stack ids in case we need them later.  avoids another loop
-            if c.order and c.order.stacking_id:
-                if c.order.stacking_id not in stack_id_map:
-                    stack_id_map[c.order.stacking_id] = set()
-                stack_id_map[c.order.stacking_id].add(c)
-
-        # Complete
+        # Complete with certificates of stacks providing our product
         for stack_id in providing_stack_ids:
-            certs |= stack_id_map[stack_id]
+            for c in self._candidates("stacking_id", stack_id):
+                if c.order and c.order.stacking_id == stack_id:
+                    certs.add(c)
 
         return list(certs)
 
     def find_by_product(self, p_hash: str) -> Optional["EntitlementCertificate"]:
-        for c in self.list():
+        for c in self._candidates("products", p_hash):
             for p in c.products:
                 if p.id == p_hash:
                     return c
@@ -232,6 +447,8 @@ class ProductDirectory(ProductCertificateDirectory):
         # the product cert back to the host in some manner. Or better, let a plugin
         # decide.
         super().__init__(installed_prod_path)
+        # Certificates are listed from two directories
+        self._index = None
 
     def list(self) -> List["EntitlementCertificate"]:
         installed_prod_list: List[EntitlementCertificate] = self.installed_prod_dir.list()
@@ -246,6 +463,9 @@ class ProductDirectory(ProductCertificateDirectory):
         self.installed_prod_dir.refresh()
         self.default_prod_dir.refresh()
 
+    def files_state(self) -> List[list]:
+        return self.installed_prod_dir.files_state() + self.default_prod_dir.files_state()
+
 
 class EntitlementDirectory(CertificateDirectory):
     PATH = conf["rhsm"]["entitlementCertDir"]
@@ -285,7 +505,12 @@ class EntitlementDirectory(CertificateDirectory):
         return True
 
     def list_valid(self) -> List["EntitlementCertificate"]:
-        return [x for x in self.list() if self._check_key(x) and x.is_valid()]
+        now = time.time()
+        candidates = self._candidates(predicate=lambda entry: _may_be_valid(entry, now))
+        return [x for x in candidates if self._check_key(x) and x.is_valid()]
+
+    def _is_listed(self, entry: dict) -> bool:
+        return entry["entitlement_type"] != CONTENT_ACCESS_CERT_TYPE
 
     def list_valid_with_content_access(self) -> List["EntitlementCertificate"]:
         return [x for x in self.list_with_content_access() if self._check_key(x) and x.is_valid()]
@@ -319,7 +544,7 @@ class EntitlementDirectory(CertificateDirectory):
         product ID.
         """
         entitlements = []
-        for cert in self.list():
+        for cert in self._candidates("products", product_id):
             for cert_product in cert.products:
                 if product_id == cert_product.id:
                     entitlements.append(cert)
@@ -331,7 +556,9 @@ class EntitlementDirectory(CertificateDirectory):
         pool ID.
         """
         entitlements = [
-            entitlement for entitlement in self.list() if str(entitlement.pool.id) == str(pool_id)
+            entitlement
+            for entitlement in self._candidates("pool_id", pool_id)
+            if str(entitlement.pool.id) == str(pool_id)
         ]
         return entitlements
 
@@ -359,20 +586,91 @@ class Path:
         return os.path.isdir(path)
 
 
+class CertificateWriteError(Exception):
+    """
+    Writing of certificates failed after some of them were already renamed to
+    the entitlement directory. The written certificates are listed in written.
+    """
+
+    def __init__(self, error: Exception, written: List["EntitlementCertificate"]):
+        super(CertificateWriteError, self).__init__(str(error))
+        self.error: Exception = error
+        self.written: List[EntitlementCertificate] = written
+
+
 class Writer:
+    # Prefix of temporary directories, where certificates are written first
+    STAGING_PREFIX = ".entitlement-"
+
+    # Age (in seconds) of temporary directory left by a crashed process, which is removed
+    STALE_STAGING_AGE = 60 * 60
+
     def __init__(self):
         self.ent_dir: EntitlementDirectory = require(ENT_DIR)
 
     def write(self, key: Key, cert: "EntitlementCertificate") -> None:
-        serial = cert.serial
-        ent_dir_path = self.ent_dir.productpath()
+        self.write_all([(key, cert)])
 
-        key_filename = "%s-key.pem" % str(serial)
-        key_path = Path.join(ent_dir_path, key_filename)
-        log.debug(f"Writing key file: '{key_path}'")
-        key.write(key_path)
+    def _remove_stale_staging_dirs(self, parent_dir: str) -> None:
+        """
+        Remove temporary directories with private keys left by processes, which
+        crashed during writing of certificates
+        """
+        try:
+            filenames = os.listdir(parent_dir)
+        except OSError:
+            return
+        now = time.time()
+        for filename in filenames:
+            if not filename.startswith(self.STAGING_PREFIX):
+                continue
+            path = os.path.join(parent_dir, filename)
+            try:
+                if not os.path.isdir(path) or now - os.stat(path).st_mtime < self.STALE_STAGING_AGE:
+                    continue
+            except OSError:
+                continue
+            log.debug(f"Removing stale directory: '{path}'")
+            shutil.rmtree(path, ignore_errors=True)
 
-        cert_filename = "%s.pem" % str(serial)
-        cert_path = Path.join(ent_dir_path, cert_filename)
-        log.debug(f"Writing certificate file: '{cert_path}'")
-        cert.write(cert_path)
+    def write_all(self, bundles: List[Tuple[Key, "EntitlementCertificate"]]) -> None:
+        """
+        Write keys and certificates of more entitlements. All files are written to
+        a temporary directory next to the entitlement directory first, and then they
+        are renamed to the entitlement directory in one pass. Thus nobody can see
+        partially written files in the entitlement directory. When renaming fails,
+        then CertificateWriteError with already written certificates is raised.
+        """
+        if not bundles:
+            return
+        ent_dir_path = self.ent_dir.productpath()
+        files = []
+        for key, cert in bundles:
+            serial = cert.serial
+            # The key is renamed before the certificate, so the certificate is written,
+            # when it is renamed
+            files.append((key, Path.join(ent_dir_path, "%s-key.pem" % str(serial)), None))
+            files.append((cert, Path.join(ent_dir_path, "%s.pem" % str(serial)), cert))
+
+        # The temporary directory is on the same filesystem, so files can be renamed
+        parent_dir = os.path.dirname(os.path.dirname(files[0][1]))
+        self._remove_stale_staging_dirs(parent_dir)
+        staging_dir = tempfile.mkdtemp(prefix=self.STAGING_PREFIX, dir=parent_dir)
+        try:
+            staged = []
+            for pem, path, cert in files:
+                staging_path = os.path.join(staging_dir, os.path.basename(path))
+                pem.write(staging_path)
+                staged.append((pem, staging_path, path, cert))
+            written = []
+            for pem, staging_path, path, cert in staged:
+                log.debug(f"Writing file: '{path}'")
+                try:
+                    os.rename(staging_path, path)
+                except OSError as err:
+                    raise CertificateWriteError(err, written) from err
+                pem.path = path
+                if cert is not None:
+                    written.append(cert)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
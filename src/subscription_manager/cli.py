@@ -11,6 +11,7 @@
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 #
+import importlib
 import os
 import sys
 import logging
@@ -98,14 +99,52 @@ class AbstractCLICommand:
         return ArgumentParser(usage=self._get_usage(), description=self.shortdesc)
 
 
+class LazyCLICommand:
+    """
+    Command registered by its name. The module of the command is imported and the
+    command is created, when some other attribute of the command is used for the
+    first time, e.g. when the command is invoked.
+    """
+
+    def __init__(self, name: str, class_path: str, primary: bool = False, aliases: List[str] = None):
+        """
+        :param name: name of the command, it has to be the same as the name of created command
+        :param class_path: full path of the class of the command including the module
+        """
+        self.name: str = name
+        self.class_path: str = class_path
+        self.primary: bool = primary
+        self.aliases: List[str] = aliases or []
+        self._command: Optional[AbstractCLICommand] = None
+
+    @property
+    def command(self) -> AbstractCLICommand:
+        if self._command is None:
+            module_name, class_name = self.class_path.rsplit(".", 1)
+            log.debug(f"Loading command {self.name} from module {module_name}")
+            clazz: Type[AbstractCLICommand] = getattr(importlib.import_module(module_name), class_name)
+            self._command = clazz()
+        return self._command
+
+    def __getattr__(self, name: str):
+        if name.startswith("__") or name == "_command":
+            raise AttributeError(name)
+        return getattr(self.command, name)
+
+
 # taken wholseale from rho...
 class CLI:
-    def __init__(self, command_classes: List[Type[AbstractCLICommand]] = None):
+    def __init__(
+        self,
+        command_classes: List[Type[AbstractCLICommand]] = None,
+        lazy_commands: List[LazyCLICommand] = None,
+    ):
         command_classes = command_classes or []
-        self.cli_commands: Dict[str, AbstractCLICommand] = {}
-        self.cli_aliases: Dict[str, AbstractCLICommand] = {}
-        for clazz in command_classes:
-            cmd: AbstractCLICommand = clazz()
+        self.cli_commands: Dict[str, Union[AbstractCLICommand, LazyCLICommand]] = {}
+        self.cli_aliases: Dict[str, Union[AbstractCLICommand, LazyCLICommand]] = {}
+        commands: List[Union[AbstractCLICommand, LazyCLICommand]] = [clazz() for clazz in command_classes]
+        commands += lazy_commands or []
+        for cmd in commands:
             # ignore the base class
             if cmd.name != "cli":
                 self.cli_commands[cmd.name] = cmd
@@ -179,6 +179,8 @@ class CPProvider:
             log.debug("Closing auth/keycloak connection...")
             self.keycloak_auth_cp.conn.close_connection()
             log.debug("Auth/keycloak connection closed")
+        log.debug("Closing idle pooled connections...")
+        connection.connection_pool.close_all()
 
     def get_consumer_auth_cp(self) -> connection.UEPConnection:
         if not self.consumer_auth_cp:
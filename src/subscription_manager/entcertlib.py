@@ -10,15 +10,18 @@
 # Red Hat trademarks are not licensed under GPLv2. No permission is
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
-from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, TYPE_CHECKING
 
+import collections
+import concurrent.futures
 import logging
 import socket
 
 from rhsm.certificate import Key, create_from_pem
 from rhsm.certificate2 import CONTENT_ACCESS_CERT_TYPE
+from rhsm.pathtree import PathMatcher
 
-from subscription_manager.certdirectory import Writer
+from subscription_manager.certdirectory import CertificateWriteError, Writer
 from subscription_manager import certlib
 from subscription_manager import content_action_client
 from subscription_manager import utils
@@ -43,6 +46,11 @@ log = logging.getLogger(__name__)
 
 CONTENT_ACCESS_CERT_CAPABILITY = "org_level_content_access"
 
+# Maximal number of entitlement certificates requested in one REST API call
+CERTIFICATE_BATCH_SIZE: int = 100
+# Number of batches of entitlement certificates requested concurrently
+CERTIFICATE_BATCHES_IN_FLIGHT: int = 2
+
 
 class EntCertActionInvoker(certlib.BaseActionInvoker):
     """Invoker for entitlement certificate updating actions."""
@@ -133,6 +141,9 @@ class EntCertUpdateAction:
                 cert_changed = True
 
         if cert_changed:
+            # Stored path matchers of removed certificates are not needed anymore
+            PathMatcher.remove_unused(self._get_local_serials())
+
             self.repo_hook()
 
             # NOTE: Since we have the yum repos defined here now
@@ -151,7 +162,7 @@ class EntCertUpdateAction:
     def install(self, missing_serials) -> List[int]:
         """Install any missing entitlement certificates."""
 
-        cert_bundles = self.get_certificates_by_serial_list(missing_serials)
+        cert_bundles = self.iter_certificates_by_serial_list(missing_serials)
 
         ent_cert_bundles_installer = EntitlementCertBundlesInstaller(self.report)
         return ent_cert_bundles_installer.install(cert_bundles)
@@ -261,15 +272,41 @@ class EntCertUpdateAction:
 
     def get_certificates_by_serial_list(self, sn_list: List[int]) -> List[Dict]:
         """Fetch a list of entitlement certificates specified by a list of serial numbers."""
-        result: List[Dict] = []
-        if sn_list:
-            sn_list = [str(sn) for sn in sn_list]
+        return list(self.iter_certificates_by_serial_list(sn_list))
+
+    def iter_certificates_by_serial_list(
+        self,
+        sn_list: List[int],
+        batch_size: int = CERTIFICATE_BATCH_SIZE,
+        max_batches_in_flight: int = CERTIFICATE_BATCHES_IN_FLIGHT,
+    ) -> Iterator[Dict]:
+        """
+        Fetch entitlement certificates specified by a list of serial numbers in batches
+        of batch_size. The next batches are requested, while certificates of the current
+        batch are yielded, so the caller can process them in the meantime.
+        """
+        if not sn_list:
+            return
+        sn_list = [str(sn) for sn in sn_list]
+        batches = [sn_list[index : index + batch_size] for index in range(0, len(sn_list), batch_size)]
+
+        def get_batch(serials: List[str]) -> List[Dict]:
             # NOTE: use injected IDENTITY, need to validate this
             # handles disconnected errors properly
-            reply: List[Dict] = self.uep.getCertificates(self.identity.uuid, serials=sn_list)
-            for cert in reply:
-                result.append(cert)
-        return result
+            return self.uep.getCertificates(self.identity.uuid, serials=serials)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_batches_in_flight)) as executor:
+            in_flight: collections.deque = collections.deque()
+            try:
+                for batch in batches:
+                    in_flight.append(executor.submit(get_batch, batch))
+                    if len(in_flight) >= max(1, max_batches_in_flight):
+                        yield from in_flight.popleft().result()
+                while in_flight:
+                    yield from in_flight.popleft().result()
+            finally:
+                for future_batch in in_flight:
+                    future_batch.cancel()
 
     def _get_expected_serials(self) -> List[int]:
         exp: List[int] = self.get_certificate_serials_list()
@@ -312,14 +349,19 @@ class EntitlementCertBundlesInstaller:
         self.exceptions: List[Exception] = []
         self.report: EntCertUpdateReport = report
 
-    def install(self, cert_bundles):
-        """Fetch entitliement certs, install them, and update the report."""
+    def install(self, cert_bundles: Iterable[Dict]):
+        """Fetch entitliement certs, install them, and update the report.
+
+        All bundles are split and validated first, and then all certs and keys
+        are written to the entitlement directory at once.
+        """
         bundle_installer = EntitlementCertBundleInstaller(self.report)
-        installed_serials: List[int] = []
+        built_bundles: List[Tuple[Dict, Key, "EntitlementCertificate"]] = []
         for cert_bundle in cert_bundles:
-            cert_serial: Optional[int] = bundle_installer.install(cert_bundle)
-            if cert_serial is not None:
-                installed_serials.append(cert_serial)
+            built_bundle = bundle_installer.build(cert_bundle)
+            if built_bundle is not None:
+                built_bundles.append((cert_bundle,) + built_bundle)
+        installed_serials: List[int] = bundle_installer.write_all(built_bundles)
         self.exceptions = bundle_installer.exceptions
         self.post_install()
         return installed_serials
@@ -362,21 +404,49 @@ class EntitlementCertBundleInstaller:
 
     def install(self, bundle: Dict):
         """Persist an ent cert and it's key after splitting it from the bundle."""
-        self.pre_install(bundle)
-
-        cert_bundle_writer = Writer()
         cert_serial: int = None
+        built_bundle = self.build(bundle)
+        if built_bundle is None:
+            self.post_install(bundle)
+        else:
+            installed_serials: List[int] = self.write_all([(bundle,) + built_bundle])
+            if installed_serials:
+                cert_serial = installed_serials[0]
+        return cert_serial
+
+    def build(self, bundle: Dict) -> Optional[Tuple[Key, "EntitlementCertificate"]]:
+        """Split an ent cert bundle before it is written. Return None, when it is not valid."""
+        self.pre_install(bundle)
         try:
-            key, cert = self.build_cert(bundle)
-            cert_bundle_writer.write(key, cert)
-            self.report.added.append(cert)
-            cert_serial = cert.serial
+            return self.build_cert(bundle)
         except Exception as e:
             self.install_exception(bundle, e)
+            return None
 
-        self.post_install(bundle)
-
-        return cert_serial
+    def write_all(self, built_bundles: List[Tuple[Dict, Key, "EntitlementCertificate"]]) -> List[int]:
+        """Persist all split ent cert bundles at once and return serials of written certs."""
+        cert_serials: List[int] = []
+        if built_bundles:
+            written: List[EntitlementCertificate] = []
+            try:
+                Writer().write_all([(key, cert) for _bundle, key, cert in built_bundles])
+            except CertificateWriteError as e:
+                # Only some certificates were renamed to the entitlement directory
+                written = e.written
+                for bundle, _key, cert in built_bundles:
+                    if cert not in written:
+                        self.install_exception(bundle, e.error)
+            except Exception as e:
+                for bundle, _key, _cert in built_bundles:
+                    self.install_exception(bundle, e)
+            else:
+                written = [cert for _bundle, _key, cert in built_bundles]
+            for cert in written:
+                self.report.added.append(cert)
+                cert_serials.append(cert.serial)
+        for bundle, _key, _cert in built_bundles:
+            self.post_install(bundle)
+        return cert_serials
 
     # TODO: add subman plugin, slot, and conduit
     def pre_install(self, bundle: Dict):
@@ -23,7 +23,6 @@ from rhsm.certificate2 import CertificateLoadingError
 
 from subscription_manager.certdirectory import DEFAULT_PRODUCT_CERT_DIR
 from subscription_manager.cp_provider import TokenAuthUnsupportedException
-from subscription_manager.entcertlib import Disconnected
 
 from subscription_manager.i18n import ungettext, ugettext as _
 from subscription_manager.utils import terminal_printable_content
@@ -69,6 +68,10 @@ RESTLIB_MESSAGE = _("{message} (HTTP error code {code}: {title})")
 
 class ExceptionMapper:
     def __init__(self):
+        # imported here, because entcertlib imports a lot of modules, which are not
+        # needed by the command line tools until the mapper is used
+        from subscription_manager.entcertlib import Disconnected
+
         self.message_map: Dict[str, Callable] = {
             socket_error: (SOCKET_MESSAGE, self.format_using_template),
             socket_gaierror: (GAI_MESSAGE, self.format_generic_oserror),
@@ -91,18 +91,19 @@ class FactsActionCommand:
         # figure out the diff between latest facts and
         # report that as updates
 
-        if self.facts.has_changed():
-            fact_updates = self.facts.get_facts()
-            self.report.fact_updates = fact_updates
-
-            consumer_identity = inj.require(inj.IDENTITY)
-            if not consumer_identity.is_valid():
-                return self.report
-
-            # CacheManager.update_check calls self.has_changed,
-            # is the self.facts.has_changed above redundant?
-            self.facts.update_check(self.uep, consumer_identity.uuid)
-            log.info("Facts have been updated.")
-        else:
-            log.debug("Facts have not changed, skipping upload.")
+        # Facts are collected only once; CacheManager.update_check calls
+        # self.has_changed again, and it uses the facts from this session
+        with self.facts.collection_session():
+            if self.facts.has_changed():
+                fact_updates = self.facts.get_facts()
+                self.report.fact_updates = fact_updates
+
+                consumer_identity = inj.require(inj.IDENTITY)
+                if not consumer_identity.is_valid():
+                    return self.report
+
+                self.facts.update_check(self.uep, consumer_identity.uuid)
+                log.info("Facts have been updated.")
+            else:
+                log.debug("Facts have not changed, skipping upload.")
         return self.report
@@ -9,10 +9,11 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 #
+import contextlib
 from datetime import datetime
 import logging
 import os
-from typing import Dict, Optional, TYPE_CHECKING
+from typing import Callable, Dict, Iterator, Optional, TYPE_CHECKING
 
 from subscription_manager.injection import PLUGIN_MANAGER, require
 from subscription_manager.cache import CacheManager
@@ -28,6 +29,26 @@ if TYPE_CHECKING:
 log = logging.getLogger(__name__)
 
 
+class FactsCollectionSession:
+    """
+    Snapshot of facts shared during one action run. Facts are collected at most
+    once during the lifetime of the session, so all fact collectors (dmidecode,
+    lscpu, virt-what, ...) are run only once, no matter how many times the facts
+    are refreshed during the session.
+    """
+
+    def __init__(self, collect_facts: Callable[[], Dict]):
+        self._collect_facts = collect_facts
+        self._facts: Optional[Dict] = None
+
+    def get_facts(self) -> Dict:
+        if self._facts is None:
+            self._facts = self._collect_facts()
+        else:
+            log.debug("Using facts collected in current session")
+        return self._facts
+
+
 class Facts(CacheManager):
     """
     Manages the facts for this system, maintains a cache of the most
@@ -39,6 +60,9 @@ class Facts(CacheManager):
 
     CACHE_FILE = "/var/lib/rhsm/facts/facts.json"
 
+    # Session used for collecting facts; None, when no session is active
+    _session: Optional[FactsCollectionSession] = None
+
     def __init__(self):
         self.facts = {}
 
@@ -69,12 +93,33 @@ class Facts(CacheManager):
                 return True
         return False
 
+    @contextlib.contextmanager
+    def collection_session(self) -> Iterator[FactsCollectionSession]:
+        """
+        Context manager for collecting facts at most once. When the session
+        is already active, then the active session is used.
+        """
+        if self._session is not None:
+            yield self._session
+            return
+        self._session = FactsCollectionSession(self._collect_facts)
+        try:
+            yield self._session
+        finally:
+            self._session = None
+
+    def _collect_facts(self) -> Dict:
+        collector = AllFactsCollector()
+        facts = collector.get_all()
+        self.plugin_manager.run("post_facts_collection", facts=facts)
+        return facts
+
     def get_facts(self, refresh: bool = False):
         if len(self.facts) == 0 or refresh:
-            collector = AllFactsCollector()
-            facts = collector.get_all()
-            self.plugin_manager.run("post_facts_collection", facts=facts)
-            self.facts = facts
+            if self._session is not None:
+                self.facts = self._session.get_facts()
+            else:
+                self.facts = self._collect_facts()
         return self.facts
 
     def to_dict(self):
@@ -12,6 +12,7 @@
 # in this software or its documentation.
 #
 # Supported Features:
+import importlib
 from typing import Dict
 
 IDENTITY = "IDENTITY"
@@ -38,6 +39,8 @@ INSTALLED_PRODUCTS_MANAGER = "INSTALLED_PRODUCTS_MANAGER"
 RELEASE_STATUS_CACHE = "RELEASE_STATUS_CACHE"
 CONTENT_ACCESS_CACHE = "CONTENT_ACCESS_CACHE"
 CRYPTO_CAPABILITIES_CACHE = "CRYPTO_CAPABILITIES_CACHE"
+REPO_FINGERPRINT_CACHE = "REPO_FINGERPRINT_CACHE"
+CONTENT_MODEL_CACHE = "CONTENT_MODEL_CACHE"
 
 
 class FeatureBroker:
@@ -78,6 +81,9 @@ class FeatureBroker:
         except KeyError:
             raise KeyError("Unknown feature: %r" % feature)
 
+        if isinstance(provider, LazyClass):
+            provider = self.providers[feature] = provider.load()
+
         if isinstance(provider, type):
             self.providers[feature] = provider(*args, **kwargs)
         elif callable(provider):
@@ -86,6 +92,37 @@ class FeatureBroker:
         return self.providers[feature]
 
 
+class LazyClass:
+    """
+    Class given by its full path. The module of the class is imported, when the
+    feature is required for the first time, so features can be provided without
+    importing all modules implementing them.
+    """
+
+    def __init__(self, class_path: str):
+        self.class_path: str = class_path
+
+    def load(self) -> type:
+        module_name, class_name = self.class_path.rsplit(".", 1)
+        return getattr(importlib.import_module(module_name), class_name)
+
+
+def lazyNonSingleton(other: LazyClass) -> object:
+    """
+    Creates a factory method for a lazy class. The class is imported, when the
+    factory is called for the first time.
+    """
+    clazz = None
+
+    def factory(*args, **kwargs):
+        nonlocal clazz
+        if clazz is None:
+            clazz = other.load()
+        return clazz(*args, **kwargs)
+
+    return factory
+
+
 def nonSingleton(other: type) -> object:
     """
     Creates a factory method for a class. Passes args to the constructor
@@ -117,4 +154,6 @@ def provide(feature: str, provider: object, singleton: bool = False) -> None:
     global FEATURES
     if not singleton and isinstance(provider, type):
         provider = nonSingleton(provider)
+    elif not singleton and isinstance(provider, LazyClass):
+        provider = lazyNonSingleton(provider)
     return FEATURES.provide(feature, provider)
@@ -14,34 +14,9 @@
 
 import subscription_manager.injection as inj
 
-
-from subscription_manager.cache import (
-    ProductStatusCache,
-    EntitlementStatusCache,
-    OverrideStatusCache,
-    ProfileManager,
-    InstalledProductsManager,
-    PoolTypeCache,
-    ReleaseStatusCache,
-    ContentAccessCache,
-    PoolStatusCache,
-    SupportedResourcesCache,
-    AvailableEntitlementsCache,
-    CurrentOwnerCache,
-    SyspurposeValidFieldsCache,
-    CapabilitiesCache,
-    CryptographicCapabilitiesCache,
-)
-
-from subscription_manager.cert_sorter import CertSorter
-from subscription_manager.certdirectory import EntitlementDirectory
-from subscription_manager.certdirectory import ProductDirectory
-from subscription_manager.facts import Facts
-from subscription_manager.identity import Identity
-from subscription_manager.validity import ValidProductDateRangeCalculator
-from subscription_manager.cp_provider import CPProvider
-from subscription_manager.plugins import PluginManager
-from subscription_manager.lock import ActionLock
+# Features are provided by full paths of classes, because importing all the modules
+# would slow down start of every command line tool. The module is imported, when
+# the feature is required for the first time.
 
 
 def init_dep_injection():
@@ -53,43 +28,99 @@ def init_dep_injection():
     # Set up consumer identity as a singleton so we don't constantly re-load
     # it from disk. Call reload when anything changes and all references will be
     # updated.
-    inj.provide(inj.IDENTITY, Identity, singleton=True)
+    inj.provide(inj.IDENTITY, inj.LazyClass("subscription_manager.identity.Identity"), singleton=True)
 
-    inj.provide(inj.PRODUCT_DATE_RANGE_CALCULATOR, ValidProductDateRangeCalculator)
+    inj.provide(
+        inj.PRODUCT_DATE_RANGE_CALCULATOR,
+        inj.LazyClass("subscription_manager.validity.ValidProductDateRangeCalculator"),
+    )
 
-    inj.provide(inj.ENT_DIR, EntitlementDirectory, singleton=True)
-    inj.provide(inj.PROD_DIR, ProductDirectory, singleton=True)
+    inj.provide(
+        inj.ENT_DIR, inj.LazyClass("subscription_manager.certdirectory.EntitlementDirectory"), singleton=True
+    )
+    inj.provide(
+        inj.PROD_DIR, inj.LazyClass("subscription_manager.certdirectory.ProductDirectory"), singleton=True
+    )
 
     # FIXME: find a way to handle exceptions when looking for
     #        attributes of inj (can happen if yum has old inj module,
     #        but runs a new version of injectioninit...)
-    inj.provide(inj.ENTITLEMENT_STATUS_CACHE, EntitlementStatusCache, singleton=True)
-    inj.provide(inj.CURRENT_OWNER_CACHE, CurrentOwnerCache, singleton=True)
-    inj.provide(inj.CAPABILITIES_CACHE, CapabilitiesCache, singleton=True)
-    inj.provide(inj.SYSPURPOSE_VALID_FIELDS_CACHE, SyspurposeValidFieldsCache)
-    inj.provide(inj.SUPPORTED_RESOURCES_CACHE, SupportedResourcesCache, singleton=True)
-    inj.provide(inj.AVAILABLE_ENTITLEMENT_CACHE, AvailableEntitlementsCache, singleton=True)
-    inj.provide(inj.PROD_STATUS_CACHE, ProductStatusCache, singleton=True)
-    inj.provide(inj.OVERRIDE_STATUS_CACHE, OverrideStatusCache, singleton=True)
-    inj.provide(inj.RELEASE_STATUS_CACHE, ReleaseStatusCache, singleton=False)
-    inj.provide(inj.CONTENT_ACCESS_CACHE, ContentAccessCache, singleton=True)
-    inj.provide(inj.CRYPTO_CAPABILITIES_CACHE, CryptographicCapabilitiesCache, singleton=True)
-
-    inj.provide(inj.PROFILE_MANAGER, ProfileManager, singleton=True)
-    inj.provide(inj.INSTALLED_PRODUCTS_MANAGER, InstalledProductsManager, singleton=True)
-
-    inj.provide(inj.CP_PROVIDER, CPProvider, singleton=True)
-
-    inj.provide(inj.CERT_SORTER, CertSorter, singleton=True)
+    inj.provide(
+        inj.ENTITLEMENT_STATUS_CACHE,
+        inj.LazyClass("subscription_manager.cache.EntitlementStatusCache"),
+        singleton=True,
+    )
+    inj.provide(
+        inj.CURRENT_OWNER_CACHE, inj.LazyClass("subscription_manager.cache.CurrentOwnerCache"), singleton=True
+    )
+    inj.provide(
+        inj.CAPABILITIES_CACHE, inj.LazyClass("subscription_manager.cache.CapabilitiesCache"), singleton=True
+    )
+    inj.provide(
+        inj.SYSPURPOSE_VALID_FIELDS_CACHE,
+        inj.LazyClass("subscription_manager.cache.SyspurposeValidFieldsCache"),
+    )
+    inj.provide(
+        inj.SUPPORTED_RESOURCES_CACHE,
+        inj.LazyClass("subscription_manager.cache.SupportedResourcesCache"),
+        singleton=True,
+    )
+    inj.provide(
+        inj.AVAILABLE_ENTITLEMENT_CACHE,
+        inj.LazyClass("subscription_manager.cache.AvailableEntitlementsCache"),
+        singleton=True,
+    )
+    inj.provide(
+        inj.PROD_STATUS_CACHE, inj.LazyClass("subscription_manager.cache.ProductStatusCache"), singleton=True
+    )
+    inj.provide(
+        inj.OVERRIDE_STATUS_CACHE,
+        inj.LazyClass("subscription_manager.cache.OverrideStatusCache"),
+        singleton=True,
+    )
+    inj.provide(
+        inj.RELEASE_STATUS_CACHE,
+        inj.LazyClass("subscription_manager.cache.ReleaseStatusCache"),
+        singleton=False,
+    )
+    inj.provide(
+        inj.CONTENT_ACCESS_CACHE,
+        inj.LazyClass("subscription_manager.cache.ContentAccessCache"),
+        singleton=True,
+    )
+    inj.provide(
+        inj.CRYPTO_CAPABILITIES_CACHE,
+        inj.LazyClass("subscription_manager.cache.CryptographicCapabilitiesCache"),
+        singleton=True,
+    )
+    inj.provide(inj.REPO_FINGERPRINT_CACHE, inj.LazyClass("subscription_manager.cache.RepoFingerprintCache"))
+    inj.provide(inj.CONTENT_MODEL_CACHE, inj.LazyClass("subscription_manager.cache.ContentModelCache"))
+
+    inj.provide(
+        inj.PROFILE_MANAGER, inj.LazyClass("subscription_manager.cache.ProfileManager"), singleton=True
+    )
+    inj.provide(
+        inj.INSTALLED_PRODUCTS_MANAGER,
+        inj.LazyClass("subscription_manager.cache.InstalledProductsManager"),
+        singleton=True,
+    )
+
+    inj.provide(inj.CP_PROVIDER, inj.LazyClass("subscription_manager.cp_provider.CPProvider"), singleton=True)
+
+    inj.provide(inj.CERT_SORTER, inj.LazyClass("subscription_manager.cert_sorter.CertSorter"), singleton=True)
 
     # Set up plugin manager as a singleton.
     # FIXME: should we aggressively catch exceptions here? If we can't
     # create a PluginManager we should probably raise an exception all the way up
-    inj.provide(inj.PLUGIN_MANAGER, PluginManager, singleton=True)
+    inj.provide(
+        inj.PLUGIN_MANAGER, inj.LazyClass("subscription_manager.plugins.PluginManager"), singleton=True
+    )
 
-    inj.provide(inj.POOL_STATUS_CACHE, PoolStatusCache, singleton=True)
-    inj.provide(inj.POOLTYPE_CACHE, PoolTypeCache, singleton=True)
-    inj.provide(inj.ACTION_LOCK, ActionLock)
+    inj.provide(
+        inj.POOL_STATUS_CACHE, inj.LazyClass("subscription_manager.cache.PoolStatusCache"), singleton=True
+    )
+    inj.provide(inj.POOLTYPE_CACHE, inj.LazyClass("subscription_manager.cache.PoolTypeCache"), singleton=True)
+    inj.provide(inj.ACTION_LOCK, inj.LazyClass("subscription_manager.lock.ActionLock"))
 
     # see what happens with non singleton, callable
-    inj.provide(inj.FACTS, Facts)
+    inj.provide(inj.FACTS, inj.LazyClass("subscription_manager.facts.Facts"))
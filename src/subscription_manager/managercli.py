@@ -13,63 +13,65 @@
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 #
+import importlib
 import logging
 import sys
 
-from typing import List, Optional, TYPE_CHECKING, Type
+from typing import List, Optional, Tuple
 
-if TYPE_CHECKING:
-    from subscription_manager.cli_command.cli import CliCommand
-
-from subscription_manager import managerlib
-from subscription_manager.cli import CLI
-from subscription_manager.cli_command.clean import CleanCommand
-from subscription_manager.cli_command.config import ConfigCommand
-from subscription_manager.cli_command.environments import EnvironmentsCommand
-from subscription_manager.cli_command.facts import FactsCommand
-from subscription_manager.cli_command.identity import IdentityCommand
-from subscription_manager.cli_command.list import ListCommand
-from subscription_manager.cli_command.override import OverrideCommand
-from subscription_manager.cli_command.owners import OwnersCommand
-from subscription_manager.cli_command.plugins import PluginsCommand
-from subscription_manager.cli_command.refresh import RefreshCommand
-from subscription_manager.cli_command.register import RegisterCommand
-from subscription_manager.cli_command.release import ReleaseCommand
-from subscription_manager.cli_command.repos import ReposCommand
-from subscription_manager.cli_command.status import StatusCommand
-from subscription_manager.cli_command.syspurpose import SyspurposeCommand
-from subscription_manager.cli_command.unregister import UnRegisterCommand
-from subscription_manager.cli_command.version import VersionCommand
+from subscription_manager.cli import CLI, LazyCLICommand
 from subscription_manager.i18n import ugettext as _
-from subscription_manager.repolib import YumPluginManager
 
 log = logging.getLogger(__name__)
 
+# Name, class and primary flag of commands. Commands are imported only when they are
+# used, because every command imports its own dependencies and only one command is
+# used by one run of subscription-manager.
+COMMANDS: List[Tuple[str, str, bool]] = [
+    ("register", "subscription_manager.cli_command.register.RegisterCommand", True),
+    ("unregister", "subscription_manager.cli_command.unregister.UnRegisterCommand", True),
+    ("config", "subscription_manager.cli_command.config.ConfigCommand", False),
+    ("list", "subscription_manager.cli_command.list.ListCommand", True),
+    ("identity", "subscription_manager.cli_command.identity.IdentityCommand", False),
+    ("orgs", "subscription_manager.cli_command.owners.OwnersCommand", False),
+    ("refresh", "subscription_manager.cli_command.refresh.RefreshCommand", True),
+    ("clean", "subscription_manager.cli_command.clean.CleanCommand", False),
+    ("repos", "subscription_manager.cli_command.repos.ReposCommand", False),
+    ("release", "subscription_manager.cli_command.release.ReleaseCommand", True),
+    ("status", "subscription_manager.cli_command.status.StatusCommand", True),
+    ("environments", "subscription_manager.cli_command.environments.EnvironmentsCommand", False),
+    ("version", "subscription_manager.cli_command.version.VersionCommand", False),
+    ("plugins", "subscription_manager.cli_command.plugins.PluginsCommand", False),
+    ("repo-override", "subscription_manager.cli_command.override.OverrideCommand", False),
+    ("facts", "subscription_manager.cli_command.facts.FactsCommand", False),
+    ("syspurpose", "subscription_manager.cli_command.syspurpose.SyspurposeCommand", False),
+]
+
+
+def __getattr__(name: str) -> type:
+    """
+    Classes of commands are still available as attributes of this module. They
+    are imported, when they are used for the first time.
+    """
+    for _command_name, class_path, _primary in COMMANDS:
+        module_name, class_name = class_path.rsplit(".", 1)
+        if class_name == name:
+            return getattr(importlib.import_module(module_name), class_name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 class ManagerCLI(CLI):
     def __init__(self):
-        commands: List[Type[CliCommand]] = [
-            RegisterCommand,
-            UnRegisterCommand,
-            ConfigCommand,
-            ListCommand,
-            IdentityCommand,
-            OwnersCommand,
-            RefreshCommand,
-            CleanCommand,
-            ReposCommand,
-            ReleaseCommand,
-            StatusCommand,
-            EnvironmentsCommand,
-            VersionCommand,
-            PluginsCommand,
-            OverrideCommand,
-            FactsCommand,
-            SyspurposeCommand,
+        commands: List[LazyCLICommand] = [
+            LazyCLICommand(name, class_path, primary=primary) for name, class_path, primary in COMMANDS
         ]
-        CLI.__init__(self, command_classes=commands)
+        CLI.__init__(self, lazy_commands=commands)
 
     def main(self) -> Optional[int]:
+        # imported here, because these modules are not needed for registration of commands
+        from subscription_manager import managerlib
+        from subscription_manager.repolib import YumPluginManager
+
         managerlib.check_identity_cert_perms()
         ret: Optional[int] = CLI.main(self)
         # Try to enable all yum plugins (subscription-manager and plugin-id)
@@ -13,6 +13,8 @@
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 #
+import collections
+import concurrent.futures
 import datetime
 import glob
 import logging
@@ -21,10 +23,25 @@ import grp
 import shutil
 import stat
 import syslog
-from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union, TYPE_CHECKING
+from typing import (
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    TYPE_CHECKING,
+)
 
 
 from rhsm.config import get_config_parser
+from rhsm.connection import ResponsePaging
+from rhsm.pathtree import PathMatcher
+from rhsmlib.facts.collector import FactSourceCache
 
 import subscription_manager.cache as cache
 from subscription_manager.cert_sorter import StackingGroupSorter, ComplianceManager
@@ -75,6 +92,11 @@ ENT_CONFIG_DIR: str = cfg.get("rhsm", "entitlementCertDir")
 ID_CERT_PERMS: int = stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP
 RHSM_GROUP_NAME: str = "rhsm"
 
+# Number of pools requested in one page, when pools are fetched page by page
+POOL_PAGE_SIZE: int = 1000
+# Number of pages requested concurrently by services, which can fetch more pages at once
+POOL_PAGES_IN_FLIGHT: int = 2
+
 
 def system_log(message: str, priority: int = syslog.LOG_NOTICE) -> None:
     utils.system_log(message, priority)
@@ -115,6 +137,48 @@ class CertificateFetchError(Exception):
         return msg
 
 
+class PoolIndex:
+    """
+    Index of pools used for filtering of pools. It maps ids of products to ids
+    of pools providing these products and ids of pools to ids of products
+    provided by these pools. Pools with the same product (top level or provided)
+    can be found without iterating over all pools.
+    """
+
+    def __init__(self, pools: Iterable[dict]):
+        # Pools by pool id
+        self.pools: Dict[str, dict] = {}
+        # Ids of provided products (without top level product) by pool id
+        self.provided_ids: Dict[str, FrozenSet[str]] = {}
+        # Ids of pools by id of top level or provided product
+        self.pool_ids_by_product: Dict[str, Set[str]] = {}
+        for pool in pools:
+            self.add(pool)
+
+    def add(self, pool: dict) -> None:
+        pool_id = pool["id"]
+        provided_ids = frozenset(provided["productId"] for provided in pool["providedProducts"])
+        self.pools[pool_id] = pool
+        self.provided_ids[pool_id] = provided_ids
+        for product_id in provided_ids.union([pool["productId"]]):
+            self.pool_ids_by_product.setdefault(product_id, set()).add(pool_id)
+
+    def covers(self, pools: Iterable[dict]) -> bool:
+        """
+        :return: True, when all given pools are indexed by this index
+        """
+        return all(self.pools.get(pool["id"]) is pool for pool in pools)
+
+    def pool_ids_for_products(self, product_ids: Iterable[str]) -> Set[str]:
+        """
+        :return: set of ids of pools providing (top level or provided) any of given products
+        """
+        pool_ids: Set[str] = set()
+        for product_id in product_ids:
+            pool_ids.update(self.pool_ids_by_product.get(product_id, ()))
+        return pool_ids
+
+
 class PoolFilter:
     """
     Helper to filter a list of pools.
@@ -127,10 +191,24 @@ class PoolFilter:
         product_dir: "ProductDirectory",
         entitlement_dir: "EntitlementDirectory",
         sorter: Optional[ComplianceManager] = None,
+        pool_index: Optional[PoolIndex] = None,
     ):
         self.product_directory: ProductDirectory = product_dir
         self.entitlement_directory: EntitlementDirectory = entitlement_dir
         self.sorter: Optional[ComplianceManager] = sorter
+        self.pool_index: Optional[PoolIndex] = pool_index
+
+    def _get_pool_index(self, pools: List[dict]) -> PoolIndex:
+        """
+        Return index of pools given to the filter, when it contains all given pools.
+        Otherwise, create new index of given pools.
+        """
+        if self.pool_index is not None and self.pool_index.covers(pools):
+            return self.pool_index
+        return PoolIndex(pools)
+
+    def _get_installed_product_ids(self) -> Set[str]:
+        return set(str(product.products[0].id) for product in self.product_directory.list())
 
     def filter_product_ids(self, pools: Iterable[dict], product_ids: Iterable[str]) -> List[dict]:
         """
@@ -138,37 +216,24 @@ class PoolFilter:
         in the requested list of product ids. Both the top level product
         and all provided products will be checked.
         """
-        matched_pools: List[dict] = []
-        for pool in pools:
-            if pool["productId"] in product_ids:
-                log.debug("pool matches: %s" % pool["productId"])
-                matched_pools.append(pool)
-                continue
-
-            for provided in pool["providedProducts"]:
-                if provided["productId"] in product_ids:
-                    log.debug("pool provides: %s" % provided["productId"])
-                    matched_pools.append(pool)
-                    break
-        return matched_pools
+        pools = list(pools)
+        matched_pool_ids: Set[str] = self._get_pool_index(pools).pool_ids_for_products(product_ids)
+        return [pool for pool in pools if pool["id"] in matched_pool_ids]
 
     def filter_out_uninstalled(self, pools: Iterable[dict]) -> List[dict]:
         """
         Filter the given list of pools, return only those which provide
         a product installed on this system.
         """
-        installed_products: List[EntitlementCertificate] = self.product_directory.list()
+        pools = list(pools)
+        installed_pool_ids: Set[str] = self._get_pool_index(pools).pool_ids_for_products(
+            self._get_installed_product_ids()
+        )
+        # we only need one matched item per pool id, so add to dict to keep unique:
         matched_data_dict: Dict[str, dict] = {}
-        for d in pools:
-            for product in installed_products:
-                productid = product.products[0].id
-                # we only need one matched item per pool id, so add to dict to keep unique:
-                # Build a list of provided product IDs for comparison:
-                provided_ids: List[str] = [p["productId"] for p in d["providedProducts"]]
-
-                if str(productid) in provided_ids or str(productid) == d["productId"]:
-                    matched_data_dict[d["id"]] = d
-
+        for pool in pools:
+            if pool["id"] in installed_pool_ids:
+                matched_data_dict[pool["id"]] = pool
         return list(matched_data_dict.values())
 
     def filter_out_installed(self, pools: Iterable[dict]) -> List[dict]:
@@ -176,18 +241,15 @@ class PoolFilter:
         Filter the given list of pools, return only those which do not provide
         a product installed on this system.
         """
-        installed_products: List[EntitlementCertificate] = self.product_directory.list()
+        pools = list(pools)
+        installed_pool_ids: Set[str] = self._get_pool_index(pools).pool_ids_for_products(
+            self._get_installed_product_ids()
+        )
+        # we only need one matched item per pool id, so add to dict to keep unique:
         matched_data_dict: Dict[str, dict] = {}
-        for d in pools:
-            matched_data_dict[d["id"]] = d
-            provided_ids = [p["productId"] for p in d["providedProducts"]]
-            for product in installed_products:
-                productid = product.products[0].id
-                # we only need one matched item per pool id, so add to dict to keep unique:
-                if str(productid) in provided_ids or str(productid) == d["productId"]:
-                    del matched_data_dict[d["id"]]
-                    break
-
+        for pool in pools:
+            if pool["id"] not in installed_pool_ids:
+                matched_data_dict[pool["id"]] = pool
         return list(matched_data_dict.values())
 
     def filter_product_name(self, pools: Iterable[dict], contains_text: str) -> List[dict]:
@@ -236,16 +298,18 @@ class PoolFilter:
 
     def filter_out_overlapping(self, pools: Iterable[dict]) -> List[dict]:
         entitled_product_ids_to_certs: Dict[str, set] = self._get_entitled_product_to_cert_map()
+        pools = list(pools)
+        pool_index: PoolIndex = self._get_pool_index(pools)
         filtered_pools: List[dict] = []
         for pool in pools:
-            provided_ids = set([p["productId"] for p in pool["providedProducts"]])
+            provided_ids = set(pool_index.provided_ids[pool["id"]])
             wrapped_pool = PoolWrapper(pool)
             # NOTE: We may have to check for other types
             # or handle the case of a product with no type in the future
             if wrapped_pool.get_product_attributes("type")["type"] == "SVC":
                 provided_ids.add(pool["productId"])
             overlap: int = 0
-            possible_overlap_pids = provided_ids.intersection(list(entitled_product_ids_to_certs.keys()))
+            possible_overlap_pids = provided_ids.intersection(entitled_product_ids_to_certs)
             for productid in possible_overlap_pids:
                 if (
                     self._dates_overlap(pool, entitled_product_ids_to_certs[productid])
@@ -260,8 +324,9 @@ class PoolFilter:
         return filtered_pools
 
     def filter_out_non_overlapping(self, pools: Iterable[dict]) -> List[dict]:
-        not_overlapping = self.filter_out_overlapping(pools)
-        return [pool for pool in pools if pool not in not_overlapping]
+        pools = list(pools)
+        not_overlapping_ids: Set[str] = set(pool["id"] for pool in self.filter_out_overlapping(pools))
+        return [pool for pool in pools if pool["id"] not in not_overlapping_ids]
 
     def filter_subscribed_pools(
         self,
@@ -274,7 +339,8 @@ class PoolFilter:
         already has a subscription, unless the pool can be subscribed to again
         (ie has multi-entitle).
         """
-        resubscribeable_pool_ids: List[str] = [pool["id"] for pool in list(compatible_pools.values())]
+        resubscribeable_pool_ids: Set[str] = set(pool["id"] for pool in compatible_pools.values())
+        subscribed_pool_ids = set(subscribed_pool_ids)
 
         filtered_pools: List[dict] = []
         for pool in pools:
@@ -300,7 +366,118 @@ def list_pools(
     rule checks server side will have the most up to date info about the
     consumer possible.
     """
+    ownerid: str = _prepare_pools_listing(uep, consumer_uuid)
+
+    return uep.getPoolsList(
+        consumer=consumer_uuid,
+        listAll=list_all,
+        active_on=active_on,
+        owner=ownerid,
+        filter_string=filter_string,
+        future=future,
+        after_date=after_date,
+        page=page,
+        items_per_page=items_per_page,
+    )
+
+
+def iter_pool_pages(
+    uep: "UEPConnection",
+    consumer_uuid: str,
+    list_all: bool = False,
+    active_on: Optional[datetime.datetime] = None,
+    filter_string: Optional[str] = None,
+    future: Optional[str] = None,
+    after_date: Optional[datetime.datetime] = None,
+    page_size: int = POOL_PAGE_SIZE,
+    max_pages_in_flight: int = 1,
+) -> Iterator[List[dict]]:
+    """
+    Fetch pools page by page like list_pools() does. Pages are yielded as soon
+    as they are received, so it is not necessary to keep all pools in memory.
+    The number of pages is given by the total count of pools or by the links to
+    the next page, which the server sends in headers of the response. More pages
+    can be requested concurrently, when max_pages_in_flight is bigger than one
+    and the total count is known. When the server does not advertise paging, then
+    all pools are requested at once. The pool id is yielded only once, even when
+    the list of pools changes between requests of pages.
+    """
+    ownerid: str = _prepare_pools_listing(uep, consumer_uuid)
 
+    def get_page(page: int, items_per_page: int = page_size) -> Tuple[List[dict], ResponsePaging]:
+        paging = ResponsePaging()
+        pools: List[dict] = uep.getPoolsList(
+            consumer=consumer_uuid,
+            listAll=list_all,
+            active_on=active_on,
+            owner=ownerid,
+            filter_string=filter_string,
+            future=future,
+            after_date=after_date,
+            page=page,
+            items_per_page=items_per_page,
+            paging=paging,
+        )
+        return pools, paging
+
+    seen_pool_ids: Set[str] = set()
+
+    def get_new_pools(pools: List[dict]) -> List[dict]:
+        new_pools: List[dict] = [pool for pool in pools if pool["id"] not in seen_pool_ids]
+        seen_pool_ids.update(pool["id"] for pool in new_pools)
+        return new_pools
+
+    # Pages are numbered from 1, page 0 means all pools
+    pools, paging = get_page(1)
+    if not paging.advertised:
+        # It is not known, whether the server respected the requested page
+        log.debug("Server does not advertise paging of pools, requesting all pools at once")
+        pools, _paging = get_page(0, 0)
+        new_pools: List[dict] = get_new_pools(pools)
+        if new_pools:
+            yield new_pools
+        return
+    new_pools = get_new_pools(pools)
+    if not new_pools:
+        return
+    yield new_pools
+
+    last_page: Optional[int] = None
+    if paging.total_count is not None:
+        # The server can use smaller pages than requested
+        last_page = -(-paging.total_count // len(pools))
+    elif not paging.has_next:
+        return
+    # The next page is known in advance only when the total count is known
+    pages_in_flight: int = max(1, max_pages_in_flight) if last_page is not None else 1
+    next_page: int = 2
+    with concurrent.futures.ThreadPoolExecutor(max_workers=pages_in_flight) as executor:
+        in_flight: collections.deque = collections.deque()
+        try:
+            while True:
+                while len(in_flight) < pages_in_flight and (last_page is None or next_page <= last_page):
+                    in_flight.append(executor.submit(get_page, next_page))
+                    next_page += 1
+                if not in_flight:
+                    return
+                pools, paging = in_flight.popleft().result()
+                new_pools = get_new_pools(pools)
+                # The server returned no pool or it ignored the requested page
+                if not new_pools:
+                    return
+                yield new_pools
+                if last_page is None and not paging.has_next:
+                    return
+        finally:
+            for future_page in in_flight:
+                future_page.cancel()
+
+
+def _prepare_pools_listing(uep: "UEPConnection", consumer_uuid: str) -> str:
+    """
+    Update facts and profile of the consumer, when it is necessary
+    :return: key of the owner of the consumer
+    """
     # client tells service 'look for facts again'
     # if service finds new facts:
     #     -emit a signal?
@@ -322,19 +499,7 @@ def list_pools(
     profile_mgr.update_check(uep, consumer_uuid)
 
     owner: dict = uep.getOwner(consumer_uuid)
-    ownerid: str = owner["key"]
-
-    return uep.getPoolsList(
-        consumer=consumer_uuid,
-        listAll=list_all,
-        active_on=active_on,
-        owner=ownerid,
-        filter_string=filter_string,
-        future=future,
-        after_date=after_date,
-        page=page,
-        items_per_page=items_per_page,
-    )
+    return owner["key"]
 
 
 # TODO: This method is morphing the actual pool json and returning a new
@@ -352,6 +517,7 @@ def get_available_entitlements(
     page: int = 0,
     items_per_page: int = 0,
     iso_dates: bool = False,
+    max_pages_in_flight: int = 1,
 ) -> List[dict]:
     """
     Returns a list of entitlement pools from the server.
@@ -359,6 +525,43 @@ def get_available_entitlements(
     The 'all' setting can be used to return all pools, even if the rules do
     not pass. (i.e. show pools that are incompatible for your hardware)
     """
+    return list(
+        iter_available_entitlements(
+            get_all=get_all,
+            active_on=active_on,
+            overlapping=overlapping,
+            uninstalled=uninstalled,
+            text=text,
+            filter_string=filter_string,
+            future=future,
+            after_date=after_date,
+            page=page,
+            items_per_page=items_per_page,
+            iso_dates=iso_dates,
+            max_pages_in_flight=max_pages_in_flight,
+        )
+    )
+
+
+def iter_available_entitlements(
+    get_all: bool = False,
+    active_on: Optional[datetime.datetime] = None,
+    overlapping: bool = False,
+    uninstalled: bool = False,
+    text: Optional[str] = None,
+    filter_string: Optional[str] = None,
+    future: Optional[str] = None,
+    after_date: Optional[datetime.datetime] = None,
+    page: int = 0,
+    items_per_page: int = 0,
+    iso_dates: bool = False,
+    max_pages_in_flight: int = 1,
+) -> Iterator[dict]:
+    """
+    Yields entitlement pools from the server. See get_available_entitlements().
+    When no page is requested, then pools are fetched, filtered and yielded
+    page by page.
+    """
     columns: List[str] = [
         "id",
         "quantity",
@@ -380,8 +583,14 @@ def get_available_entitlements(
         "management_enabled",
     ]
 
+    date_formatter: Callable
+    if iso_dates:
+        date_formatter = format_iso8601_date
+    else:
+        date_formatter = format_date
+
     pool_stash = PoolStash()
-    dlist: List[dict] = pool_stash.get_filtered_pools_list(
+    for dlist in pool_stash.iter_filtered_pool_pages(
         active_on,
         not get_all,
         overlapping,
@@ -392,50 +601,46 @@ def get_available_entitlements(
         after_date=after_date,
         page=page,
         items_per_page=items_per_page,
-    )
+        max_pages_in_flight=max_pages_in_flight,
+    ):
+        for pool in dlist:
+            yield _format_available_pool(pool, columns, date_formatter)
 
-    date_formatter: Callable
-    if iso_dates:
-        date_formatter = format_iso8601_date
-    else:
-        date_formatter = format_date
 
-    for pool in dlist:
-        pool_wrapper = PoolWrapper(pool)
-        pool["providedProducts"] = pool_wrapper.get_provided_products()
-        if allows_multi_entitlement(pool):
-            pool["multi-entitlement"] = "Yes"
-        else:
-            pool["multi-entitlement"] = "No"
+def _format_available_pool(pool: dict, columns: List[str], date_formatter: Callable) -> dict:
+    pool_wrapper = PoolWrapper(pool)
+    pool["providedProducts"] = pool_wrapper.get_provided_products()
+    if allows_multi_entitlement(pool):
+        pool["multi-entitlement"] = "Yes"
+    else:
+        pool["multi-entitlement"] = "No"
 
-        support_attrs = pool_wrapper.get_product_attributes(
-            "support_level", "support_type", "roles", "usage", "addons"
-        )
-        pool["service_level"] = support_attrs["support_level"]
-        pool["service_type"] = support_attrs["support_type"]
-        pool["roles"] = support_attrs["roles"]
-        pool["usage"] = support_attrs["usage"]
-        pool["addons"] = support_attrs["addons"]
-        pool["suggested"] = pool_wrapper.get_suggested_quantity()
-        pool["pool_type"] = pool_wrapper.get_pool_type()
-        pool["management_enabled"] = pool_wrapper.management_enabled()
-
-        if pool["suggested"] is None:
-            pool["suggested"] = ""
+    support_attrs = pool_wrapper.get_product_attributes(
+        "support_level", "support_type", "roles", "usage", "addons"
+    )
+    pool["service_level"] = support_attrs["support_level"]
+    pool["service_type"] = support_attrs["support_type"]
+    pool["roles"] = support_attrs["roles"]
+    pool["usage"] = support_attrs["usage"]
+    pool["addons"] = support_attrs["addons"]
+    pool["suggested"] = pool_wrapper.get_suggested_quantity()
+    pool["pool_type"] = pool_wrapper.get_pool_type()
+    pool["management_enabled"] = pool_wrapper.management_enabled()
+
+    if pool["suggested"] is None:
+        pool["suggested"] = ""
 
     # no default, so default is None if key not found
-    data = [_sub_dict(pool, columns) for pool in dlist]
-    for d in data:
-        if int(d["quantity"]) < 0:
-            d["quantity"] = _("Unlimited")
-        else:
-            d["quantity"] = str(int(d["quantity"]) - int(d["consumed"]))
-
-        d["startDate"] = date_formatter(isodate.parse_date(d["startDate"]))
-        d["endDate"] = date_formatter(isodate.parse_date(d["endDate"]))
-        del d["consumed"]
+    d = _sub_dict(pool, columns)
+    if int(d["quantity"]) < 0:
+        d["quantity"] = _("Unlimited")
+    else:
+        d["quantity"] = str(int(d["quantity"]) - int(d["consumed"]))
 
-    return data
+    d["startDate"] = date_formatter(isodate.parse_date(d["startDate"]))
+    d["endDate"] = date_formatter(isodate.parse_date(d["endDate"]))
+    del d["consumed"]
+    return d
 
 
 class MergedPools:
@@ -554,6 +759,9 @@ class PoolStash:
         # All pools:
         self.all_pools = {}
 
+        # Index of all pools used by filters:
+        self.pool_index: PoolIndex = PoolIndex([])
+
     def all_pools_size(self) -> int:
         return len(self.all_pools)
 
@@ -569,26 +777,29 @@ class PoolStash:
         self.all_pools = {}
         self.compatible_pools = {}
         log.debug("Refreshing pools from server...")
-        for pool in list_pools(
+        for pools in iter_pool_pages(
             require(CP_PROVIDER).get_consumer_auth_cp(), self.identity.uuid, active_on=active_on
         ):
-            self.compatible_pools[pool["id"]] = pool
-            self.all_pools[pool["id"]] = pool
+            for pool in pools:
+                self.compatible_pools[pool["id"]] = pool
+                self.all_pools[pool["id"]] = pool
 
         # Filter the list of all pools, removing those we know are compatible.
         # Sadly this currently requires a second query to the server.
         self.incompatible_pools = {}
-        for pool in list_pools(
+        for pools in iter_pool_pages(
             require(CP_PROVIDER).get_consumer_auth_cp(),
             self.identity.uuid,
             list_all=True,
             active_on=active_on,
         ):
-            if not pool["id"] in self.compatible_pools:
-                self.incompatible_pools[pool["id"]] = pool
-                self.all_pools[pool["id"]] = pool
+            for pool in pools:
+                if not pool["id"] in self.compatible_pools:
+                    self.incompatible_pools[pool["id"]] = pool
+                    self.all_pools[pool["id"]] = pool
 
         self.subscribed_pool_ids = self._get_subscribed_pool_ids()
+        self._update_pool_index()
 
         # In the gui, cache all pool types so when we attach new ones
         # we can avoid more api calls
@@ -616,46 +827,94 @@ class PoolStash:
         Used for CLI --available filtering
         cuts down on api calls
         """
-        self.all_pools: Dict[str, dict] = {}
-        self.compatible_pools: Dict[str, dict] = {}
+        filtered_pools: List[dict] = []
+        all_pools: Dict[str, dict] = {}
+        compatible_pools: Dict[str, dict] = {}
+        for pools in self.iter_filtered_pool_pages(
+            active_on,
+            incompatible,
+            overlapping,
+            uninstalled,
+            text,
+            filter_string,
+            future=future,
+            after_date=after_date,
+            page=page,
+            items_per_page=items_per_page,
+        ):
+            filtered_pools.extend(pools)
+            all_pools.update(self.all_pools)
+            compatible_pools.update(self.compatible_pools)
+        self.all_pools = all_pools
+        self.compatible_pools = compatible_pools
+        self._update_pool_index()
+        return filtered_pools
+
+    def iter_filtered_pool_pages(
+        self,
+        active_on: Optional[datetime.datetime],
+        incompatible: bool,
+        overlapping: bool,
+        uninstalled: bool,
+        text: Optional[str],
+        filter_string: Optional[str],
+        future: Optional[str] = None,
+        after_date: Optional[datetime.datetime] = None,
+        page: int = 0,
+        items_per_page: int = 0,
+        max_pages_in_flight: int = 1,
+    ) -> Iterator[List[dict]]:
+        """
+        Same as get_filtered_pools_list(), but pools are fetched from the server and filtered
+        page by page, when no page is requested. Filtered pools are yielded for every page.
+        Only pools of the last page are kept in the stash.
+        """
         if active_on and overlapping:
             self.sorter = ComplianceManager(active_on)
         elif not active_on and overlapping:
             self.sorter = require(CERT_SORTER)
 
-        if incompatible:
-            pools = list_pools(
-                require(CP_PROVIDER).get_consumer_auth_cp(),
-                self.identity.uuid,
-                active_on=active_on,
-                filter_string=filter_string,
-                future=future,
-                after_date=after_date,
-                page=page,
-                items_per_page=items_per_page,
-            )
-            for pool in pools:
-                self.compatible_pools[pool["id"]] = pool
-        else:  # --all has been used
-            pools = list_pools(
-                require(CP_PROVIDER).get_consumer_auth_cp(),
-                self.identity.uuid,
-                list_all=True,
-                active_on=active_on,
-                filter_string=filter_string,
-                future=future,
-                after_date=after_date,
-                page=page,
-                items_per_page=items_per_page,
+        list_options = {
+            "list_all": not incompatible,
+            "active_on": active_on,
+            "filter_string": filter_string,
+            "future": future,
+            "after_date": after_date,
+        }
+        uep: "UEPConnection" = require(CP_PROVIDER).get_consumer_auth_cp()
+        pages: Iterable[List[dict]]
+        if page != 0 or items_per_page != 0:
+            pages = [
+                list_pools(uep, self.identity.uuid, page=page, items_per_page=items_per_page, **list_options)
+            ]
+        else:
+            pages = iter_pool_pages(
+                uep, self.identity.uuid, max_pages_in_flight=max_pages_in_flight, **list_options
             )
-            for pool in pools:
-                self.all_pools[pool["id"]] = pool
 
-        return self._filter_pools(incompatible, overlapping, uninstalled, False, text)
+        for pools in pages:
+            self.all_pools = {}
+            self.compatible_pools = {}
+            if incompatible:
+                for pool in pools:
+                    self.compatible_pools[pool["id"]] = pool
+            else:  # --all has been used
+                for pool in pools:
+                    self.all_pools[pool["id"]] = pool
+            self._update_pool_index()
+            yield self._filter_pools(incompatible, overlapping, uninstalled, False, text)
 
     def _get_subscribed_pool_ids(self) -> List[str]:
         return [ent.pool.id for ent in require(ENT_DIR).list()]
 
+    def _update_pool_index(self) -> None:
+        """
+        Index all pools, so filters do not have to iterate over all pools for every product
+        """
+        pools: Dict[str, dict] = dict(self.compatible_pools)
+        pools.update(self.all_pools)
+        self.pool_index = PoolIndex(pools.values())
+
     def _filter_pools(
         self,
         incompatible: bool,
@@ -678,7 +937,7 @@ class PoolStash:
             pools = list(self.compatible_pools.values())
             log.debug("\tRemoved %d incompatible pools" % len(self.incompatible_pools))
 
-        pool_filter = PoolFilter(require(PROD_DIR), require(ENT_DIR), self.sorter)
+        pool_filter = PoolFilter(require(PROD_DIR), require(ENT_DIR), self.sorter, self.pool_index)
 
         # Filter out products that are not installed if necessary:
         if uninstalled:
@@ -860,6 +1119,7 @@ def clean_all_data(backup: bool = True) -> None:
         SyncedStore(None).update_cache({})
     # FIXME: implement as dbus client to facts service DeleteCache() once implemented
     # Facts.delete_cache()
+    FactSourceCache.delete_cache()
     # WrittenOverridesCache is also a subclass of cache.CacheManager, but
     # it is deleted in RepoActionInvoker.delete_repo_file() below.
     # StatusCache subclasses have a a per instance cache varable
@@ -872,6 +1132,8 @@ def clean_all_data(backup: bool = True) -> None:
     require(RELEASE_STATUS_CACHE).delete_cache()
     cache.CloudTokenCache.delete_cache()
     cache.CryptographicCapabilitiesCache.delete_cache()
+    cache.ContentModelCache.delete_cache()
+    PathMatcher.delete_cache()
 
     RepoActionInvoker.delete_repo_file()
     log.debug("Cleaned local data")
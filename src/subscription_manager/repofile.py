@@ -357,6 +357,17 @@ class RepoFileBase:
     def exists(self) -> bool:
         return self.path_exists(self.path)
 
+    def stat(self) -> Optional[List[int]]:
+        """
+        Return modification time, size and inode of the repo file,
+        or None, when the file does not exist
+        """
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return [st.st_mtime_ns, st.st_size, st.st_ino]
+
     def create_dir_path(self) -> None:
         """
         Try to create directory for .repo files
@@ -15,17 +15,25 @@
 from typing import Dict, Iterable, List, Literal, Optional, Set, Tuple, Union, TYPE_CHECKING
 
 from iniparse import RawConfigParser as ConfigParser
+import hashlib
 import logging
 import os
+import time
 
 import subscription_manager.injection as inj
-from subscription_manager.cache import OverrideStatusCache, WrittenOverrideCache
+from subscription_manager.cache import (
+    ContentModelCache,
+    OverrideStatusCache,
+    RepoFingerprintCache,
+    WrittenOverrideCache,
+)
 from subscription_manager import model
 from subscription_manager.model import ent_cert
 from subscription_manager.repofile import Repo, manage_repos_enabled, get_repo_file_classes
 from subscription_manager.repofile import YumRepoFile
 from subscription_manager.utils import get_supported_resources, has_capability
 
+from rhsm import ourjson as json
 import rhsm.config
 import configparser
 from rhsmlib.facts.hwprobe import HardwareCollector
@@ -45,6 +53,7 @@ if TYPE_CHECKING:
     from subscription_manager.certlib import Locker
     from subscription_manager.identity import Identity
     from subscription_manager.model import Content
+    from subscription_manager.repofile import RepoFileBase
 
 log = logging.getLogger(__name__)
 
@@ -52,6 +61,9 @@ conf = config.Config(rhsm.config.get_config_parser())
 
 ALLOWED_CONTENT_TYPES = ["yum", "deb"]
 
+# Options of [server] section used in proxy settings of repos
+PROXY_CONF_OPTIONS = ("proxy_scheme", "proxy_hostname", "proxy_port", "proxy_user", "proxy_password")
+
 
 class YumPluginManager:
     """
@@ -257,6 +269,7 @@ class RepoActionInvoker(BaseActionInvoker):
                 os.unlink(server_val_repo_file.path)
         # When the repo is removed, also remove the override tracker
         WrittenOverrideCache.delete_cache()
+        RepoFingerprintCache.delete_cache()
 
 
 # This is $releasever specific, but expanding other vars would be similar,
@@ -360,7 +373,8 @@ class RepoUpdateActionCommand:
         self.ent_dir: EntitlementDirectory = inj.require(inj.ENT_DIR)
         self.prod_dir: ProductDirectory = inj.require(inj.PROD_DIR)
 
-        self.ent_source = ent_cert.EntitlementDirEntitlementSource()
+        # Created lazily, because it parses all entitlement certificates
+        self._ent_source: Optional[ent_cert.EntitlementDirEntitlementSource] = None
 
         self.cp_provider: CPProvider = inj.require(inj.CP_PROVIDER)
         self.uep: Optional[UEPConnection] = None
@@ -385,6 +399,10 @@ class RepoUpdateActionCommand:
 
         self.written_overrides = WrittenOverrideCache()
 
+        self.fingerprint_cache: RepoFingerprintCache = inj.require(inj.REPO_FINGERPRINT_CACHE)
+
+        self.content_model_cache: ContentModelCache = inj.require(inj.CONTENT_MODEL_CACHE)
+
         # FIXME: empty report at the moment, should be changed to include
         # info about updated repos
         self.report = RepoActionReport()
@@ -422,6 +440,12 @@ class RepoUpdateActionCommand:
             self.uep = self.cp_provider.get_consumer_auth_cp()
         return self.uep
 
+    @property
+    def ent_source(self) -> ent_cert.EntitlementDirEntitlementSource:
+        if self._ent_source is None:
+            self._ent_source = ent_cert.EntitlementDirEntitlementSource()
+        return self._ent_source
+
     def perform(self) -> Optional["RepoActionReport"]:
         # the [rhsm] manage_repos can be overridden to disable generation of the
         # redhat.repo file:
@@ -444,6 +468,16 @@ class RepoUpdateActionCommand:
             # See BZ 1658409
             repo_pairs.append((repo_class(), server_val_repo_class()))
 
+        # When the content is the same as last time and nobody touched the repo
+        # files since we wrote them, then the repo files would be generated again
+        # with the same result. Do not read or write them at all in this case.
+        unique_content = self.get_unique_content()
+        fingerprint = self._content_fingerprint(unique_content)
+        self.fingerprint_cache.read_cache_only()
+        if self.fingerprint_cache.is_current(fingerprint, self._repo_files_stat(repo_pairs)):
+            log.debug("Content of repo files has not changed, skipping generation of repo files")
+            return self.report
+
         for repo_file, server_val_repo_file in repo_pairs:
             repo_file.read()
             server_val_repo_file.read()
@@ -451,7 +485,7 @@ class RepoUpdateActionCommand:
 
         # Iterate content from entitlement certs, and create/delete each section
         # in the RepoFile as appropriate:
-        for cont in self.get_unique_content():
+        for cont in unique_content:
             valid.add(cont.id)
 
             for repo_file, server_value_repo_file in repo_pairs:
@@ -472,7 +506,6 @@ class RepoUpdateActionCommand:
                         server_value_repo_file.update(server_value_repo)
                         self.report_update(existing)
 
-        # TODO: do not write new repo file and cache written_overrides, when nothing changed
         for repo_file, server_value_repo_file in repo_pairs:
             for section in server_value_repo_file.sections():
                 if section not in valid:
@@ -488,9 +521,35 @@ class RepoUpdateActionCommand:
             # Update with the values we just wrote
             self.written_overrides.overrides = self.overrides
             self.written_overrides.write_cache()
+
+        self.fingerprint_cache.fingerprint = fingerprint
+        self.fingerprint_cache.files = self._repo_files_stat(repo_pairs)
+        self.fingerprint_cache.write_cache()
         log.debug("repos updated: %s" % self.report)
         return self.report
 
+    def _content_fingerprint(self, content: Iterable[Repo]) -> str:
+        """
+        Compute fingerprint of everything the generated repo files depend on.
+        The repos already contain expanded $releasever and applied overrides,
+        the overrides are used once more, when the repos are merged with
+        the existing repo files.
+        """
+        repos = [[repo.id, repo.content_type, list(repo.items())] for repo in content]
+        repos.sort(key=lambda item: item[0])
+        data = {
+            "repos": repos,
+            "overrides": self.overrides,
+            "override_supported": self.override_supported,
+        }
+        return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _repo_files_stat(
+        repo_pairs: List[Tuple["RepoFileBase", "RepoFileBase"]],
+    ) -> Dict[str, Optional[List[int]]]:
+        return {repo_file.path: repo_file.stat() for pair in repo_pairs for repo_file in pair}
+
     def get_unique_content(self) -> Iterable[Repo]:
         # FIXME Shouldn't this skip all of the repo updating?
         if not self.manage_repos:
@@ -516,6 +575,67 @@ class RepoUpdateActionCommand:
         return content
 
     def get_all_content(self, baseurl: str, ca_cert: str) -> List[Repo]:
+        # Parsing of all entitlement certificates and creating of repos takes
+        # noticeable time on systems with many content sets, and it happens
+        # before every dnf command. Use the repos created last time, when nothing
+        # they were created from has changed.
+        ent_dir_state = self.ent_dir.files_state()
+        if not ent_dir_state:
+            return self._create_all_content(baseurl, ca_cert)
+
+        key = self._content_model_key(ent_dir_state, baseurl, ca_cert)
+        cached_repos = self.content_model_cache.get_repos(key)
+        if cached_repos is not None:
+            log.debug("Using cached content model")
+            content_list = []
+            for data in cached_repos:
+                # Proxy credentials are not stored in the cache
+                repo = Repo._set_proxy_info(_repo_from_dict(data))
+                if self.override_supported and self.apply_overrides:
+                    repo = self._set_override_info(repo)
+                content_list.append(repo)
+            return content_list
+
+        content_list = self._create_all_content(baseurl, ca_cert)
+        self.content_model_cache.set_repos(
+            key, [_repo_to_dict(repo) for repo in content_list], self._content_model_expiration()
+        )
+        return content_list
+
+    def _content_model_key(self, ent_dir_state: List[list], baseurl: str, ca_cert: str) -> str:
+        """
+        Compute key of everything the repos created from entitlement certificates
+        depend on, except of time.
+        """
+        release = None
+        if not rhsm.config.in_container():
+            release = inj.require(inj.RELEASE_STATUS_CACHE).read_cache_only()
+        data = {
+            "ent_dir": ent_dir_state,
+            "prod_dir": self.prod_dir.files_state(),
+            "overrides": self.overrides if self.override_supported and self.apply_overrides else None,
+            "release": release,
+            "conf": [baseurl, ca_cert, conf["rhsm"]["repomd_gpg_url"]]
+            + [conf["server"][name] for name in PROXY_CONF_OPTIONS],
+            "ssl_verify_status": has_capability("ssl_verify_status"),
+        }
+        return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _content_model_expiration(self) -> Optional[float]:
+        """
+        Return the nearest time, when some entitlement certificate becomes
+        valid or expires, or None, when there is no such time.
+        """
+        now = time.time()
+        boundaries = []
+        for cert in self.ent_dir.list_with_content_access():
+            for date in (cert.valid_range.begin(), cert.valid_range.end()):
+                timestamp = date.timestamp()
+                if timestamp > now:
+                    boundaries.append(timestamp)
+        return min(boundaries, default=None)
+
+    def _create_all_content(self, baseurl: str, ca_cert: str) -> List[Repo]:
         matching_content = self.matching_content()
         content_list = []
 
@@ -634,6 +754,27 @@ class RepoUpdateActionCommand:
         self.report.repo_deleted.append(section)
 
 
+def _repo_to_dict(repo: Repo) -> dict:
+    """
+    Convert repo to dict, which can be stored in the content model cache.
+    The proxy password is not stored, it is set from configuration again.
+    """
+    items = [[key, None if key == "proxy_password" else repo[key]] for key in repo._order]
+    return {"id": repo.id, "content_type": repo.content_type, "items": items}
+
+
+def _repo_from_dict(data: dict) -> Repo:
+    """
+    Create repo from dict stored in the content model cache. The order of keys
+    is kept, so the repo is written to the repo file in the same way.
+    """
+    repo = Repo(data["id"])
+    repo.content_type = data["content_type"]
+    for key, value in data["items"]:
+        repo[key] = value
+    return repo
+
+
 class RepoActionReport(ActionReport):
     """Report class for reporting yum repo updates."""
 
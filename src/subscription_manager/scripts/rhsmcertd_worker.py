@@ -19,11 +19,11 @@ import sys
 import time
 import datetime
 from argparse import SUPPRESS
-from typing import Dict, List, Union, TYPE_CHECKING
+from typing import Dict, List, Optional, Union, TYPE_CHECKING
 
 from cloud_what.provider import detect_cloud_provider, CLOUD_PROVIDERS, BaseCloudProvider
 
-from rhsm import connection, config, logutil
+from rhsm import connection, config, logutil, timing
 
 from rhsmlib.services.register import RegisterService
 
@@ -52,6 +52,9 @@ DEFAULT_AUTOREGISTER_INTERVAL = 60
 # Value in seconds
 DEFAULT_AUTOREGISTER_IDENTITY_INTERVAL = 60 * 10
 
+# Every run appends JSON record with time spent in invokers, REST API calls and caches
+TIMING_LOG_FILE = "/var/log/rhsm/rhsmcertd-timing.log"
+
 
 class ExitStatus(enum.IntEnum):
     """Well-known exit codes.
@@ -529,6 +532,7 @@ def main():
     options: argparse.Namespace
     args: List[str]
     options, args = parser.parse_known_args()
+    timing.start_recording("rhsmcertd-worker")
     try:
         _main(options)
     except SystemExit as se:
@@ -547,6 +551,10 @@ def main():
         log.exception("Error while updating certificates using daemon")
         print(_("Unable to update entitlement certificates and repositories"))
         sys.exit(ExitStatus.UNKNOWN_ERROR)
+    finally:
+        recorder: Optional[timing.Recorder] = timing.stop_recording()
+        if recorder is not None:
+            timing.write_record(recorder, TIMING_LOG_FILE)
 
 
 if __name__ == "__main__":
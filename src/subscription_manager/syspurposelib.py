@@ -19,6 +19,7 @@ It contains methods for accessing/manipulating the local syspurpose.json metadat
 
 from typing import Optional, Tuple, Union, TYPE_CHECKING
 
+from rhsm import cache_store
 from rhsm.connection import ConnectionException, GoneException
 from subscription_manager import certlib
 from subscription_manager import injection as inj
@@ -108,7 +109,7 @@ def write_syspurpose_cache(values: dict) -> bool:
     :return:
     """
     try:
-        json.dump(values, open(CACHED_SYSPURPOSE, "w"), ensure_ascii=True, indent=2)
+        cache_store.write(CACHED_SYSPURPOSE, json.dumps(values, ensure_ascii=True, indent=2))
     except OSError:
         log.warning("Could not write to syspurpose cache %s" % CACHED_SYSPURPOSE)
         return False
@@ -23,7 +23,7 @@ import errno
 import io
 from typing import Callable, Union
 
-from syspurpose.utils import create_dir, create_file, write_to_file_utf8
+from syspurpose.utils import create_dir, create_file, write_file_utf8, write_to_file_utf8
 from subscription_manager.i18n import ugettext as _
 
 # Constants for locations of the two system syspurpose files
@@ -198,9 +198,7 @@ class SyspurposeStore:
         Write the current contents to the file at "self.path"
         """
         if not fp:
-            with io.open(self.path, "w", encoding="utf-8") as f:
-                write_to_file_utf8(f, self.contents)
-                f.flush()
+            write_file_utf8(self.path, self.contents)
         else:
             write_to_file_utf8(fp, self.contents)
 
@@ -640,14 +638,11 @@ class SyncedStore:
 
         # Then we can try to create syspurpose.json file
         try:
-            f = io.open(path, "w+", encoding="utf-8")
+            write_file_utf8(path, data)
         except OSError as e:
             if e.errno != errno.EEXIST:
                 raise
         else:
-            write_to_file_utf8(f, data)
-            f.flush()
-            f.close()
             log.debug("Successfully updated syspurpose values at '%s'." % path)
             return
         log.debug("Failed to update syspurpose values at '%s'." % path)
@@ -21,6 +21,8 @@ import os
 import errno
 import logging
 
+from rhsm.cache_store import write_atomically
+
 log = logging.getLogger(__name__)
 
 
@@ -73,3 +75,15 @@ def write_to_file_utf8(file, data: dict) -> None:
     :return:
     """
     file.write(json.dumps(data, indent=2, ensure_ascii=False, sort_keys=True))
+
+
+def write_file_utf8(path: str, data: dict) -> None:
+    """
+    Writes out the provided data to the file at the path atomically and flushes it
+    to the disk, so the file is complete even after a crash of the system. It uses
+    the same formatting as write_to_file_utf8.
+    :param path: The path to the file to write to
+    :param data: The data to be written
+    :return:
+    """
+    write_atomically(path, json.dumps(data, indent=2, ensure_ascii=False, sort_keys=True), fsync=True)
@@ -9,6 +9,8 @@ import unittest
 import logging
 
 from cloud_what.providers import aws, azure, gcp
+from rhsm.pathtree import PathMatcher
+from rhsmlib.facts.collector import FactSourceCache
 
 try:
     # 2.7+
@@ -205,6 +207,8 @@ class SubManFixture(unittest.TestCase):
         inj.provide(inj.CURRENT_OWNER_CACHE, stubs.StubCurrentOwnerCache)
         inj.provide(inj.OVERRIDE_STATUS_CACHE, stubs.StubOverrideStatusCache())
         inj.provide(inj.RELEASE_STATUS_CACHE, stubs.StubReleaseStatusCache())
+        inj.provide(inj.REPO_FINGERPRINT_CACHE, stubs.StubRepoFingerprintCache())
+        inj.provide(inj.CONTENT_MODEL_CACHE, stubs.StubContentModelCache())
         inj.provide(inj.AVAILABLE_ENTITLEMENT_CACHE, stubs.StubAvailableEntitlementsCache())
         inj.provide(inj.PROFILE_MANAGER, stubs.StubProfileManager())
         # By default set up an empty stub entitlement and product dir.
@@ -263,6 +267,16 @@ class SubManFixture(unittest.TestCase):
         in_container_mock.return_value = False
         self.addCleanup(self.in_container_patcher.stop)
 
+        # Never store path matchers of certificates to /var/lib/rhsm
+        self.path_matcher_patcher = patch.object(PathMatcher, "CACHE_DIR", "/not/a/real/path/path_matchers")
+        self.path_matcher_patcher.start()
+
+        # Never cache facts of collectors to /var/lib/rhsm
+        self.fact_source_cache_patcher = patch.object(
+            FactSourceCache, "CACHE_FILE", "/not/a/real/path/fact_sources.json"
+        )
+        self.fact_source_cache_patcher.start()
+
         self.files_to_cleanup = []
 
     def tearDown(self):
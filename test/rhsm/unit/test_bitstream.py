@@ -15,7 +15,7 @@ import os
 import unittest
 import zlib
 
-from rhsm.bitstream import GhettoBitStream
+from rhsm.bitstream import BitReader, GhettoBitStream
 
 DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "entitlement_data.bin")
 entitlement_data = open(DATA, "rb").read()
@@ -72,3 +72,34 @@ class TestGhettoBitStream(unittest.TestCase):
         self.assertEqual(self.bs.combine_bytes([1, 3]), 259)
         self.assertEqual(self.bs.combine_bytes([3]), 3)
         self.assertEqual(self.bs.combine_bytes([1, 1, 3]), 65795)
+
+
+class TestBitReader(unittest.TestCase):
+    def setUp(self):
+        self.br = BitReader(tree_data)
+
+    def test_pop_byte(self):
+        self.assertEqual(self.br.pop_byte(), 5)
+        self.assertEqual(self.br.remaining, len(tree_data) * 8 - 8)
+
+    def test_same_bits_as_ghetto_bit_stream(self):
+        bits = "".join(GhettoBitStream(tree_data))
+        for count in (1, 3, 7, 13):
+            br = BitReader(tree_data)
+            read_bits = ""
+            while br.remaining >= count:
+                read_bits += "{0:0{1}b}".format(br.read(count), count)
+            self.assertEqual(read_bits, bits[: len(read_bits)])
+
+    def test_peek_does_not_move(self):
+        self.br.skip(3)
+        self.assertEqual(self.br.peek(10), self.br.peek(10))
+        self.assertEqual(self.br.position, 3)
+
+    def test_peek_past_end(self):
+        br = BitReader(b"\xff")
+        br.skip(4)
+        self.assertEqual(br.peek(8), 0b11110000)
+        self.assertRaises(IndexError, br.read, 8)
+        br.skip(100)
+        self.assertEqual(br.remaining, 0)
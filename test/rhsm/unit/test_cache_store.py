@@ -0,0 +1,156 @@
+# Copyright (c) 2026 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+
+import errno
+import json
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from rhsm import cache_store
+
+
+class TestWriteAtomically(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.path = os.path.join(self.temp_dir, "status.json")
+
+    def _read(self):
+        with open(self.path) as cache_file:
+            return cache_file.read()
+
+    def test_write_new_file(self):
+        cache_store.write_atomically(self.path, '{"a": 1}')
+        self.assertEqual('{"a": 1}', self._read())
+        self.assertEqual(cache_store.DEFAULT_MODE, stat.S_IMODE(os.stat(self.path).st_mode))
+        self.assertEqual(["status.json"], os.listdir(self.temp_dir))
+
+    def test_replace_keeps_mode(self):
+        cache_store.write_atomically(self.path, "old", mode=0o600)
+        old_inode = os.stat(self.path).st_ino
+        cache_store.write_atomically(self.path, "new")
+        self.assertEqual("new", self._read())
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(self.path).st_mode))
+        self.assertNotEqual(old_inode, os.stat(self.path).st_ino)
+
+    def test_fsync(self):
+        with patch("os.fsync") as mock_fsync:
+            cache_store.write_atomically(self.path, b"data", fsync=True)
+        # The file and the directory are flushed
+        self.assertEqual(2, mock_fsync.call_count)
+        with patch("os.fsync") as mock_fsync:
+            cache_store.write_atomically(self.path, b"data")
+        mock_fsync.assert_not_called()
+
+    def test_failed_write_keeps_old_file(self):
+        cache_store.write_atomically(self.path, "old")
+        with patch("os.write", side_effect=OSError(errno.ENOSPC, "No space left on device")):
+            self.assertRaises(OSError, cache_store.write_atomically, self.path, "new")
+        self.assertEqual("old", self._read())
+        self.assertEqual(["status.json"], os.listdir(self.temp_dir))
+
+    def test_mount_point_written_in_place(self):
+        cache_store.write_atomically(self.path, "old")
+        with patch("os.replace", side_effect=OSError(errno.EBUSY, "Device or resource busy")):
+            cache_store.write_atomically(self.path, "new")
+        self.assertEqual("new", self._read())
+        self.assertEqual(["status.json"], os.listdir(self.temp_dir))
+
+
+class TestCacheStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.store = cache_store.CacheStore(self.temp_dir)
+        self.path = os.path.join(self.temp_dir, "status.json")
+
+    def test_metadata(self):
+        self.store.write(self.path, "{}", schema=2, uuid="UUID", validators={"etag": '"1"'})
+        metadata = self.store.metadata(self.path)
+        self.assertEqual(2, metadata["schema"])
+        self.assertEqual("UUID", metadata["uuid"])
+        self.assertEqual({"etag": '"1"'}, metadata["validators"])
+        self.assertIn("written_at", metadata)
+
+    def test_one_index_for_all_files(self):
+        other_path = os.path.join(self.temp_dir, "other.json")
+        self.store.write(self.path, "{}", uuid="UUID")
+        self.store.write(other_path, "[]", uuid="OTHER_UUID")
+        self.assertEqual(
+            sorted(["status.json", "other.json", cache_store.INDEX_FILE_NAME]),
+            sorted(os.listdir(self.temp_dir)),
+        )
+        # The index is shared with other stores of the directory, e.g. in other processes
+        store = cache_store.CacheStore(self.temp_dir)
+        self.assertEqual("UUID", store.metadata(self.path)["uuid"])
+        self.assertEqual("OTHER_UUID", store.metadata(other_path)["uuid"])
+
+    def test_no_metadata_of_changed_file(self):
+        self.store.write(self.path, "{}", uuid="UUID")
+        with open(self.path, "w") as cache_file:
+            cache_file.write('{"changed": true}')
+        self.assertIsNone(self.store.metadata(self.path))
+
+    def test_no_metadata_of_unknown_file(self):
+        self.assertIsNone(self.store.metadata(self.path))
+        with open(self.path, "w") as cache_file:
+            cache_file.write("{}")
+        self.assertIsNone(self.store.metadata(self.path))
+
+    def test_corrupted_index(self):
+        self.store.write(self.path, "{}")
+        with open(self.store.index_path, "w") as index_file:
+            index_file.write('{"entries": ')
+        self.assertIsNone(self.store.metadata(self.path))
+        self.store.write(self.path, "{}", uuid="UUID")
+        self.assertEqual("UUID", self.store.metadata(self.path)["uuid"])
+
+    def test_remove(self):
+        other_path = os.path.join(self.temp_dir, "other.json")
+        self.store.write(self.path, "{}")
+        self.store.write(other_path, "[]")
+        self.store.remove(self.path)
+        self.store.remove(self.path)
+        self.assertFalse(os.path.exists(self.path))
+        with open(self.store.index_path) as index_file:
+            self.assertEqual(["other.json"], list(json.load(index_file)["entries"]))
+
+    def test_index_failure_ignored(self):
+        with patch.object(
+            self.store, "_update_index", side_effect=OSError(errno.EACCES, "Permission denied")
+        ):
+            self.store.write(self.path, "{}")
+        self.assertTrue(os.path.exists(self.path))
+        self.assertIsNone(self.store.metadata(self.path))
+
+    def test_concurrent_writes(self):
+        paths = [os.path.join(self.temp_dir, "cache%d.json" % number) for number in range(8)]
+        threads = [threading.Thread(target=self.store.write, args=(path, "{}")) for path in paths]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for path in paths:
+            self.assertIsNotNone(self.store.metadata(path), path)
+
+    def test_store_of_directory(self):
+        cache_store.write(self.path, "{}", uuid="UUID")
+        self.assertIs(cache_store.get_store(self.path), cache_store.get_store(self.store.index_path))
+        self.assertEqual("UUID", cache_store.metadata(self.path)["uuid"])
+        cache_store.remove(self.path)
+        self.assertIsNone(cache_store.metadata(self.path))
@@ -12,12 +12,19 @@
 # in this software or its documentation.
 #
 
+import base64
 from datetime import datetime
+import tempfile
 import unittest
+import zlib
 
 from test.rhsm.unit import certdata
-from rhsm.certificate import create_from_pem, CertificateException
+from rhsm import _certificate
+from rhsm.certificate import create_from_file, create_from_pem, CertificateException
 from rhsm.certificate2 import (
+    BEGIN_ENTITLEMENT_DATA,
+    END_ENTITLEMENT_DATA,
+    _CertFactory,
     Content,
     EntitlementCertificate,
     IdentityCertificate,
@@ -25,9 +32,21 @@ from rhsm.certificate2 import (
     ProductCertificate,
     CertificateLoadingError,
 )
+from rhsm.pathtree import PathMatcher
 
 from unittest.mock import patch
 
+# Path matchers of certificates are never stored to /var/lib/rhsm
+path_matcher_patcher = patch.object(PathMatcher, "CACHE_DIR", "/not/a/real/path/path_matchers")
+
+
+def setUpModule():
+    path_matcher_patcher.start()
+
+
+def tearDownModule():
+    path_matcher_patcher.stop()
+
 
 class V1ProductCertTests(unittest.TestCase):
     def setUp(self):
@@ -243,6 +262,17 @@ class V3CertTests(unittest.TestCase):
     def test_match_deep_path(self):
         self.assertTrue(self.ent_cert.check_path("/path/to/awesomeos/x86_64/foo/bar"))
 
+    def test_check_paths(self):
+        self.assertEqual(
+            [True, True, False],
+            self.ent_cert.check_paths(
+                ["/path/to/awesomeos/x86_64", "/path/to/awesomeos//x86_64/foo", "/path/to/other"]
+            ),
+        )
+
+    def test_provided_paths(self):
+        self.assertEqual(sorted(self.ent_cert.provided_paths), str(self.ent_cert._path_tree).split("\n"))
+
     def test_missing_pool(self):
         self.assertEqual(None, self.ent_cert.pool)
 
@@ -256,6 +286,71 @@ class V3_2CertTests(unittest.TestCase):
         self.assertTrue(isinstance(self.ent_cert, EntitlementCertificate))
         self.assertEqual("8a8d01f53cda9dd0013cda9ed5100475", self.ent_cert.pool.id)
 
+    @patch("rhsm.certificate2._CertFactory._decompress_payload")
+    def test_payload_not_decoded_without_need(self, mock_decompress):
+        ent_cert = create_from_pem(certdata.ENTITLEMENT_CERT_V3_2)
+        self.assertEqual(self.ent_cert.serial, ent_cert.serial)
+        self.assertEqual(self.ent_cert.end, ent_cert.end)
+        mock_decompress.assert_not_called()
+
+    def test_payload_decoded_once(self):
+        ent_cert = create_from_pem(certdata.ENTITLEMENT_CERT_V3_2)
+        with patch(
+            "rhsm.certificate2._CertFactory._decompress_payload",
+            autospec=True,
+            side_effect=_CertFactory._decompress_payload,
+        ) as mock_decompress:
+            self.assertEqual("8a8d01f53cda9dd0013cda9ed5100475", ent_cert.pool.id)
+            self.assertEqual("awesomeos-x86_64", ent_cert.order.sku)
+            self.assertEqual(4, len(ent_cert.content))
+            self.assertEqual(1, len(ent_cert.products))
+            self.assertEqual(4, len(ent_cert.content))
+        self.assertEqual(1, mock_decompress.call_count)
+
+    def test_set_section(self):
+        content = [Content(content_type="yum", name="mycontent", label="mycontent")]
+        self.ent_cert.content = content
+        self.assertEqual(content, self.ent_cert.content)
+        self.assertEqual("8a8d01f53cda9dd0013cda9ed5100475", self.ent_cert.pool.id)
+
+    def test_create_from_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".pem") as pem_file:
+            pem_file.write(certdata.ENTITLEMENT_CERT_V3_2)
+            pem_file.flush()
+            with patch("rhsm.certificate2._certificate.load", wraps=_certificate.load) as mock_load:
+                ent_cert = create_from_file(pem_file.name)
+        mock_load.assert_called_once_with(pem=certdata.ENTITLEMENT_CERT_V3_2)
+        self.assertEqual(pem_file.name, ent_cert.path)
+        self.assertEqual("8a8d01f53cda9dd0013cda9ed5100475", ent_cert.pool.id)
+
+    @staticmethod
+    def _replace_payload(payload):
+        pem = certdata.ENTITLEMENT_CERT_V3_2
+        begin = pem.index(BEGIN_ENTITLEMENT_DATA) + len(BEGIN_ENTITLEMENT_DATA)
+        end = pem.index(END_ENTITLEMENT_DATA)
+        return pem[:begin] + "\n" + payload + "\n" + pem[end:]
+
+    def test_corrupted_payload(self):
+        pem = certdata.ENTITLEMENT_CERT_V3_2
+        begin = pem.index(BEGIN_ENTITLEMENT_DATA) + len(BEGIN_ENTITLEMENT_DATA)
+        payload = pem[begin : pem.index(END_ENTITLEMENT_DATA)].strip()
+        corrupted_payloads = [
+            # Incorrect padding
+            payload[:-5],
+            # Not base64
+            payload.replace("A", "*", 1),
+            # Not zlib compressed
+            base64.b64encode(b'{"order": {}}').decode("ascii"),
+        ]
+        for corrupted_payload in corrupted_payloads:
+            self.assertRaises(CertificateException, create_from_pem, self._replace_payload(corrupted_payload))
+
+    def test_corrupted_payload_parsed_lazily(self):
+        payload = base64.b64encode(zlib.compress(b'{"products": [{"id": "1"}]}')).decode("ascii")
+        ent_cert = create_from_pem(self._replace_payload(payload))
+        self.assertRaises(CertificateException, getattr, ent_cert, "order")
+        self.assertRaises(CertificateException, getattr, ent_cert, "products")
+
 
 class TestEntCertV1KeyPath(unittest.TestCase):
     cert_data = certdata.ENTITLEMENT_CERT_V1_0
@@ -0,0 +1,103 @@
+# Copyright (c) 2026 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+
+import copy
+import gc
+import tracemalloc
+import unittest
+
+from test.rhsm.unit import certdata
+from rhsm.certificate import create_from_pem, Extensions, OID
+
+# Number of copies of every object measured
+COPIES = 20
+
+
+class Unslotted:
+    """
+    Object keeping attributes in __dict__ like certificate objects did before
+    __slots__ were used
+    """
+
+
+def unslotted(obj):
+    """
+    Return unslotted object with the same attributes as given slotted object
+    """
+    plain = Unslotted()
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            if name != "__weakref__" and hasattr(obj, name):
+                setattr(plain, name, getattr(obj, name))
+    return plain
+
+
+class TestCertificateMemory(unittest.TestCase):
+    def _traced_size(self, obj):
+        """
+        Return number of bytes allocated by creating copies of the object
+        """
+        gc.collect()
+        tracemalloc.start()
+        try:
+            copies = [copy.copy(obj) for _i in range(COPIES)]
+            size, _peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del copies
+        return size
+
+    def test_slotted_objects_smaller(self):
+        cert = create_from_pem(certdata.ENTITLEMENT_CERT_V3_2)
+        objects = [cert, cert.order, cert.pool, cert.content[0], cert.products[0], OID("1.2.3")]
+        for obj in objects:
+            slotted_size = self._traced_size(obj)
+            unslotted_size = self._traced_size(unslotted(obj))
+            self.assertLess(slotted_size, unslotted_size, type(obj).__name__)
+
+    def test_compact_objects(self):
+        cert = create_from_pem(certdata.ENTITLEMENT_CERT_V3_2)
+        objects = [cert, cert.order, cert.pool, cert.content[0], cert.products[0], OID("1.2.3")]
+        for obj in objects:
+            self.assertFalse(hasattr(obj, "__dict__"), type(obj).__name__)
+        self.assertFalse(hasattr(cert.extensions, "__dict__"))
+
+    def test_repeated_strings_shared(self):
+        first = create_from_pem(certdata.ENTITLEMENT_CERT_V3_2)
+        second = create_from_pem(certdata.ENTITLEMENT_CERT_V3_2)
+        self.assertIs(first.content[0].content_type, second.content[0].content_type)
+        self.assertIs(first.content[0].gpg, second.content[0].gpg)
+        self.assertIs(first.products[0].name, second.products[0].name)
+
+
+class TestExtensionsLookup(unittest.TestCase):
+    def setUp(self):
+        self.extensions = Extensions({OID("1.2.3"): "a", OID("1.2.4"): "b", OID("2.1"): "c"})
+
+    def test_oid_hash_equals_string_hash(self):
+        self.assertEqual(hash("1.2.3"), hash(OID("1.2.3")))
+        self.assertEqual(hash(OID("1.2.3")), hash(OID(["1", "2", "3"])))
+        self.assertIn("1.2.3", self.extensions)
+        self.assertEqual("a", self.extensions["1.2.3"])
+
+    def test_find_exact(self):
+        self.assertEqual([(OID("1.2.4"), "b")], self.extensions.find("1.2.4"))
+        self.assertEqual([], self.extensions.find("1.2.5"))
+
+    def test_find_wildcard(self):
+        self.assertEqual(["a", "b"], [value for _oid, value in self.extensions.find("1.2.*")])
+        self.assertEqual("c", self.extensions.get("2."))
+
+    def test_branch(self):
+        branch = self.extensions.branch("1.2")
+        self.assertEqual({"3": "a", "4": "b"}, {str(oid): value for oid, value in branch.items()})
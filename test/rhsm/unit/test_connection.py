@@ -12,11 +12,16 @@
 # in this software or its documentation.
 #
 import datetime
+import gzip
+import http.server
+import io
 import locale
 import unittest
 import os
 import ssl
 import tempfile
+import threading
+import zlib
 
 from rhsm import connection
 from rhsm.connection import (
@@ -899,9 +904,449 @@ class BaseRestLibTests(unittest.TestCase):
         self.assertTrue(isinstance(data["phoneNumbers"][0][0]["type"], type("")))
 
 
+class ConnectionPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.pool = connection.ConnectionPool()
+        pool_patcher = patch("rhsm.connection.connection_pool", self.pool)
+        pool_patcher.start()
+        self.addCleanup(pool_patcher.stop)
+        connect_patcher = patch("http.client.HTTPSConnection.connect", self._connect)
+        connect_patcher.start()
+        self.addCleanup(connect_patcher.stop)
+
+    @staticmethod
+    def _connect(conn):
+        conn.sock = Mock()
+
+    def test_pooled_connection_shared_by_instances(self):
+        first = BaseRestLib("somehost", "8443", "/candlepin", insecure=True)
+        conn = first._create_connection()
+        first._release_connection()
+        self.assertIsNone(first._BaseRestLib__conn)
+
+        second = BaseRestLib("somehost", "8443", "/candlepin", insecure=True)
+        self.assertIs(second._create_connection(), conn)
+        # Connection is checked out and it is not available to other instances
+        self.assertIsNot(first._create_connection(), conn)
+
+    def test_connection_not_shared_with_different_cert(self):
+        first = BaseRestLib("somehost", "8443", "/candlepin", insecure=True)
+        conn = first._create_connection()
+        first._release_connection()
+
+        second = BaseRestLib("somehost", "8443", "/candlepin", insecure=True, cert_file="/nonexistent.pem")
+        self.assertIsNot(second._create_connection(cert_file="/nonexistent.pem"), conn)
+
+    def test_expired_connection_evicted(self):
+        restlib = BaseRestLib("somehost", "8443", "/candlepin", insecure=True)
+        conn = restlib._create_connection()
+        sock = conn.sock
+        conn.last_request_time -= conn.keep_alive_timeout + 1
+        restlib._release_connection()
+
+        self.assertIsNone(self.pool.checkout(conn.pool_key))
+        sock.unwrap.assert_called_once()
+
+    def test_max_requests_reached(self):
+        restlib = BaseRestLib("somehost", "8443", "/candlepin", insecure=True)
+        conn = restlib._create_connection()
+        conn.max_requests_num = 2
+        conn.requests_num = 2
+        self.assertIsNot(restlib._create_connection(), conn)
+
+    def test_no_pooling_when_reuse_forbidden(self):
+        restlib = BaseRestLib("somehost", "8443", "/candlepin", insecure=True)
+        with patch("rhsm.connection.REUSE_CONNECTION", False):
+            conn = restlib._create_connection()
+            restlib._release_connection()
+            self.assertIsNone(self.pool.checkout(conn.pool_key))
+
+    def test_connection_per_thread(self):
+        restlib = BaseRestLib("somehost", "8443", "/candlepin", insecure=True)
+        main_conn = restlib._create_connection()
+        barrier = threading.Barrier(2)
+        thread_conns = []
+
+        def request():
+            conn = restlib._create_connection()
+            thread_conns.append(conn)
+            # Both threads hold their connection at the same time
+            barrier.wait(timeout=5)
+            restlib._release_connection()
+
+        threads = [threading.Thread(target=request) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(thread_conns), 2)
+        self.assertIsNot(thread_conns[0], thread_conns[1])
+        self.assertNotIn(main_conn, thread_conns)
+        # Connection of the main thread was not released by other threads
+        self.assertIs(restlib._BaseRestLib__conn, main_conn)
+        self.assertEqual(self.pool.idle_count(), 2)
+
+        restlib._release_connection()
+        self.assertEqual(self.pool.idle_count(), 3)
+        self.assertIs(restlib._create_connection(), main_conn)
+
+    def test_max_idle_connections(self):
+        restlibs = [BaseRestLib("somehost", "8443", "/candlepin", insecure=True) for _ in range(3)]
+        conns = [restlib._create_connection() for restlib in restlibs]
+        for index, conn in enumerate(conns):
+            conn.last_request_time += index
+        sock = conns[0].sock
+        with patch.object(self.pool, "MAX_IDLE_CONNECTIONS", 2):
+            for restlib in restlibs:
+                restlib._release_connection()
+        self.assertEqual(self.pool.idle_count(), 2)
+        # Connection idle for the longest time was closed
+        sock.unwrap.assert_called_once()
+        self.assertIs(self.pool.checkout(conns[2].pool_key), conns[2])
+        self.assertIs(self.pool.checkout(conns[1].pool_key), conns[1])
+        self.assertIsNone(self.pool.checkout(conns[0].pool_key))
+
+    @staticmethod
+    def _response():
+        response = Mock(status=200)
+        response.read.return_value = b'{"result": "ok"}'
+        response.getheader.side_effect = lambda name, default=None: default
+        response.getheaders.return_value = []
+        return response
+
+    def _request_with_error(self, error, requests_num):
+        restlib = BaseRestLib("somehost", "8443", "/candlepin", insecure=True)
+        conn = restlib._create_connection()
+        conn.requests_num = requests_num
+        requested = []
+
+        def request(connection, *args, **kwargs):
+            requested.append(connection)
+            if connection is conn:
+                raise error
+
+        with patch("http.client.HTTPSConnection.request", autospec=True, side_effect=request):
+            with patch("http.client.HTTPSConnection.getresponse", return_value=self._response()):
+                result = restlib.request_get("/status")
+        return conn, requested, result
+
+    def test_reused_connection_closed_by_server(self):
+        for error in (BrokenPipeError(32, "Broken pipe"), ConnectionResetError(104, "Connection reset")):
+            conn, requested, result = self._request_with_error(error, requests_num=1)
+            self.assertEqual({"result": "ok"}, result)
+            # The request was sent again using new connection
+            self.assertEqual(2, len(requested))
+            self.assertIs(conn, requested[0])
+            self.assertIsNot(conn, requested[1])
+
+    def test_stale_pooled_connections_not_retried(self):
+        # Both idle connections in the pool were closed by the server (e.g. it was restarted)
+        restlibs = [BaseRestLib("somehost", "8443", "/candlepin", insecure=True) for _ in range(2)]
+        stale_conns = [restlib._create_connection() for restlib in restlibs]
+        for restlib, conn in zip(restlibs, stale_conns):
+            conn.requests_num = 1
+            restlib._release_connection()
+        self.assertEqual(2, self.pool.idle_count())
+        requested = []
+
+        def request(connection, *args, **kwargs):
+            requested.append(connection)
+            if connection in stale_conns:
+                raise BrokenPipeError(32, "Broken pipe")
+
+        restlib = BaseRestLib("somehost", "8443", "/candlepin", insecure=True)
+        with patch("http.client.HTTPSConnection.request", autospec=True, side_effect=request):
+            with patch("http.client.HTTPSConnection.getresponse", return_value=self._response()):
+                self.assertEqual({"result": "ok"}, restlib.request_get("/status"))
+        # The request was sent again using new connection and not the other stale connection
+        self.assertEqual(2, len(requested))
+        self.assertIn(requested[0], stale_conns)
+        self.assertNotIn(requested[1], stale_conns)
+
+    def test_new_connection_reset_not_retried(self):
+        self.assertRaises(
+            ConnectionResetError,
+            self._request_with_error,
+            ConnectionResetError(104, "Connection reset"),
+            requests_num=0,
+        )
+
+    def test_ssl_context_cached(self):
+        with tempfile.TemporaryDirectory() as ca_dir:
+            ca_path = os.path.join(ca_dir, "ca.pem")
+            with open(ca_path, "w") as ca_file:
+                ca_file.write("")
+            restlib = BaseRestLib("somehost", "8443", "/candlepin", ca_dir=ca_dir)
+            with patch.object(BaseRestLib, "_load_ca_certificates") as load_ca_certificates:
+                context = restlib._create_ssl_context(None, None)
+                self.assertIs(restlib._create_ssl_context(None, None), context)
+                load_ca_certificates.assert_called_once()
+
+                # New CA certificate requires new SSL context
+                os.utime(ca_path, ns=(0, 0))
+                self.assertIsNot(restlib._create_ssl_context(None, None), context)
+                self.assertEqual(load_ca_certificates.call_count, 2)
+
+    def test_tls_session_offered(self):
+        context = connection._ResumableSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        context.tls_session = Mock()
+        with patch("ssl.SSLContext.wrap_socket") as wrap_socket:
+            context.wrap_socket(Mock(), server_hostname="somehost")
+        self.assertIs(wrap_socket.call_args[1]["session"], context.tls_session)
+
+
+class IterJsonArrayTests(unittest.TestCase):
+    def _iter(self, data, chunk_size=3):
+        return list(connection.iter_json_array(io.BytesIO(data.encode("utf-8")), chunk_size))
+
+    def test_array_items(self):
+        pools = [{"id": str(i), "productName": "Produkt čeština"} for i in range(20)]
+        self.assertEqual(self._iter(json.dumps(pools, ensure_ascii=False)), pools)
+
+    def test_empty(self):
+        self.assertEqual(self._iter(""), [])
+        self.assertEqual(self._iter(" [ ] "), [])
+
+    def test_numbers_split_between_chunks(self):
+        self.assertEqual(
+            self._iter("[12345, -1.5e3, 2.25, true, null]", chunk_size=1), [12345, -1.5e3, 2.25, True, None]
+        )
+
+    def test_not_array(self):
+        self.assertEqual(self._iter('{"status": "ok"}'), [{"status": "ok"}])
+
+    def test_invalid_array(self):
+        for data in ("[1, 2", "[1 2]", "[1,]"):
+            with self.assertRaises(ValueError):
+                self._iter(data)
+
+    def test_large_item_decoded_few_times(self):
+        pools = [{"id": "large", "content": ["content-%d" % i for i in range(1000)]}, {"id": "small"}]
+        raw_decode = json.JSONDecoder.raw_decode
+        with patch.object(
+            json.JSONDecoder, "raw_decode", autospec=True, side_effect=raw_decode
+        ) as mock_decode:
+            self.assertEqual(self._iter(json.dumps(pools), chunk_size=10), pools)
+        # The item is not decoded again for every one of more than 1000 chunks
+        self.assertLess(mock_decode.call_count, 20)
+
+
+class CompressionHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _read_body(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        return body
+
+    def _respond(self, data):
+        body = json.dumps(data).encode("utf-8")
+        accept_encoding = self.headers.get("Accept-Encoding", "")
+        self.send_response(200)
+        if "deflate" in accept_encoding and self.path.endswith("/deflate"):
+            body = zlib.compress(body)
+            self.send_header("Content-Encoding", "deflate")
+        elif "gzip" in accept_encoding:
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.requests.append((dict(self.headers), None))
+        self._respond([{"id": str(i), "name": "pool"} for i in range(100)])
+
+    def do_PUT(self):
+        body = self._read_body()
+        self.server.requests.append((dict(self.headers), json.loads(body)))
+        self._respond({"uuid": "consumer"})
+
+    def log_message(self, *args):
+        pass
+
+
+class CompressionTests(unittest.TestCase):
+    """
+    Test compression of requests and responses against local HTTPS server
+    """
+
+    def setUp(self):
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        # The testing certificate uses weak digest algorithm
+        context.set_ciphers("DEFAULT:@SECLEVEL=0")
+        context.load_cert_chain(os.path.join(os.path.dirname(__file__), "../../ent_cert_to_import.pem"))
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), CompressionHandler)
+        self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        pool_patcher = patch("rhsm.connection.connection_pool", connection.ConnectionPool())
+        pool = pool_patcher.start()
+        self.addCleanup(pool_patcher.stop)
+        self.addCleanup(pool.close_all)
+
+    def _restlib(self, compression):
+        return BaseRestLib(
+            "127.0.0.1", self.server.server_address[1], "", insecure=True, compression=compression
+        )
+
+    def test_compressed_request_and_response(self):
+        facts = {"fact.%d" % i: "value" for i in range(200)}
+        result = self._restlib(compression=True).request_put(
+            "/consumers/1234", {"facts": facts}, compress=True
+        )
+
+        self.assertEqual(result, {"uuid": "consumer"})
+        headers, body = self.server.requests[0]
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(headers["Accept-Encoding"], "gzip, deflate")
+        self.assertEqual(body, {"facts": facts})
+
+    def test_small_request_not_compressed(self):
+        self._restlib(compression=True).request_put("/consumers/1234", {"releaseVer": "9"}, compress=True)
+        headers, body = self.server.requests[0]
+        self.assertNotIn("Content-Encoding", headers)
+        self.assertEqual(body, {"releaseVer": "9"})
+
+    def test_compression_disabled(self):
+        facts = {"fact.%d" % i: "value" for i in range(200)}
+        result = self._restlib(compression=False).request_put(
+            "/consumers/1234", {"facts": facts}, compress=True
+        )
+
+        self.assertEqual(result, {"uuid": "consumer"})
+        headers, body = self.server.requests[0]
+        self.assertNotIn("Content-Encoding", headers)
+        self.assertEqual(headers["Accept-Encoding"], "identity")
+
+    def test_streamed_deflate_response(self):
+        restlib = self._restlib(compression=True)
+        restlib.STREAM_CHUNK_SIZE = 64
+        pools = list(restlib.request_get_stream("/pools/deflate"))
+        self.assertEqual(pools, [{"id": str(i), "name": "pool"} for i in range(100)])
+
+    def test_decode_raw_deflate(self):
+        compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        content = compressor.compress(b'{"status": "ok"}') + compressor.flush()
+        self.assertEqual(connection.decode_content(content, "deflate"), b'{"status": "ok"}')
+        self.assertEqual(connection.decode_content(b"plain", None), b"plain")
+
+
+class ConditionalRequestHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    etag = '"overrides-1"'
+
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.etag)
+            self.end_headers()
+            return
+        body = json.dumps([{"contentLabel": "repo", "name": "enabled", "value": "1"}]).encode("utf-8")
+        self.send_response(200)
+        self.send_header("ETag", self.etag)
+        self.send_header("Last-Modified", "Thu, 01 Dec 2016 21:56:35 GMT")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ConditionalRequestTests(unittest.TestCase):
+    """
+    Test conditional GET requests against local HTTPS server
+    """
+
+    def setUp(self):
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.set_ciphers("DEFAULT:@SECLEVEL=0")
+        context.load_cert_chain(os.path.join(os.path.dirname(__file__), "../../ent_cert_to_import.pem"))
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), ConditionalRequestHandler)
+        self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        pool_patcher = patch("rhsm.connection.connection_pool", connection.ConnectionPool())
+        pool = pool_patcher.start()
+        self.addCleanup(pool_patcher.stop)
+        self.addCleanup(pool.close_all)
+        self.restlib = BaseRestLib("127.0.0.1", self.server.server_address[1], "", insecure=True)
+
+    def test_validators_of_response(self):
+        validators = connection.ResponseValidators()
+        result = self.restlib.request_get("/consumers/1234/content_overrides", validators=validators)
+
+        self.assertEqual(result, [{"contentLabel": "repo", "name": "enabled", "value": "1"}])
+        self.assertFalse(validators.not_modified)
+        self.assertEqual(validators.etag, '"overrides-1"')
+        self.assertEqual(validators.last_modified, "Thu, 01 Dec 2016 21:56:35 GMT")
+        self.assertNotIn("If-None-Match", self.server.requests[0])
+
+    def test_not_modified(self):
+        validators = connection.ResponseValidators(
+            etag='"overrides-1"', last_modified="Thu, 01 Dec 2016 21:56:35 GMT"
+        )
+        result = self.restlib.request_get("/consumers/1234/content_overrides", validators=validators)
+
+        self.assertIsNone(result)
+        self.assertTrue(validators.not_modified)
+        self.assertEqual(validators.etag, '"overrides-1"')
+        self.assertEqual(self.server.requests[0]["If-None-Match"], '"overrides-1"')
+        self.assertEqual(self.server.requests[0]["If-Modified-Since"], "Thu, 01 Dec 2016 21:56:35 GMT")
+
+    def test_modified(self):
+        validators = connection.ResponseValidators(etag='"overrides-0"')
+        result = self.restlib.request_get("/consumers/1234/content_overrides", validators=validators)
+
+        self.assertEqual(len(result), 1)
+        self.assertFalse(validators.not_modified)
+        self.assertEqual(validators.etag, '"overrides-1"')
+
+    def test_streamed_not_modified(self):
+        validators = connection.ResponseValidators(etag='"overrides-1"')
+        result = list(self.restlib.request_get_stream("/consumers/1234/entitlements", validators=validators))
+
+        self.assertEqual(result, [])
+        self.assertTrue(validators.not_modified)
+
+
 # see #830767 and #842885 for examples of why this is
 # a useful test. Aka, sometimes we forget to make
 # str/repr work and that cases weirdness
+class ResponsePagingTests(unittest.TestCase):
+    def test_paging_headers(self):
+        paging = connection.ResponsePaging()
+        paging.update(
+            {
+                "x-total-count": "2500",
+                "Link": '<https://server/pools?page=2&per_page=1000>; rel="next", '
+                '<https://server/pools?page=3&per_page=1000>; rel="last"',
+            }
+        )
+        self.assertTrue(paging.advertised)
+        self.assertTrue(paging.has_next)
+        self.assertEqual(2500, paging.total_count)
+        self.assertEqual("https://server/pools?page=3&per_page=1000", paging.links["last"])
+
+    def test_paging_not_advertised(self):
+        paging = connection.ResponsePaging()
+        paging.update({"X-Total-Count": "unknown", "Content-Type": "application/json"})
+        self.assertFalse(paging.advertised)
+        self.assertFalse(paging.has_next)
+
+
 class ExceptionTest(unittest.TestCase):
     exception = Exception
     parent_exception = Exception
@@ -1070,6 +1515,7 @@ class DatetimeFormattingTests(unittest.TestCase):
         locale.setlocale(category=locale.LC_ALL, locale="")
 
     @patch("subscription_manager.cache.open", MOCK_OPEN_CACHE)
+    @patch("subscription_manager.cache.cache_store.write", Mock())
     def test_date_formatted_properly_with_japanese_locale(self):
         locale.setlocale(locale.LC_ALL, "ja_JP.UTF8")
         cp_provider = Mock()
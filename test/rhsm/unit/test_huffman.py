@@ -13,7 +13,8 @@
 
 import unittest
 
-from rhsm.huffman import HuffmanNode
+from rhsm.bitstream import BitReader
+from rhsm.huffman import HuffmanDecoder, HuffmanNode
 
 
 class TestHuffmanNode(unittest.TestCase):
@@ -74,3 +75,41 @@ class TestHuffmanNode(unittest.TestCase):
             leaves = [HuffmanNode(weight) for weight in range(1, n)]
             tree = HuffmanNode.build_tree(leaves)
             self.assertEqual(tree.weight, sum(leaf.weight for leaf in leaves))
+
+
+class TestHuffmanDecoder(unittest.TestCase):
+    def _encode(self, leaves, values):
+        codes = dict((leaf.value, leaf.code) for leaf in leaves)
+        bits = "".join(codes[value] for value in values)
+        bits += "0" * (-len(bits) % 8)
+        return BitReader(int(bits or "0", 2).to_bytes(len(bits) // 8, "big"))
+
+    def test_decode(self):
+        for count in (2, 5, 100, 3000):
+            leaves = [HuffmanNode(weight, "word%d" % weight) for weight in range(1, count + 1)]
+            decoder = HuffmanDecoder(HuffmanNode.build_tree(leaves))
+            values = [leaf.value for leaf in leaves] + [leaves[0].value, leaves[-1].value]
+            reader = self._encode(leaves, values)
+            self.assertEqual([decoder.decode(reader) for _ in values], values)
+
+    def test_decode_long_codes(self):
+        leaves = [HuffmanNode(weight, weight) for weight in range(1, 3000)]
+        decoder = HuffmanDecoder(HuffmanNode.build_tree(leaves))
+        self.assertGreater(decoder.max_length, decoder.TABLE_BITS)
+        values = [1, 2, 2999, 1500]
+        reader = self._encode(leaves, values)
+        self.assertEqual([decoder.decode(reader) for _ in values], values)
+
+    def test_decode_end_of_stream(self):
+        leaves = [HuffmanNode(weight, weight) for weight in range(1, 20)]
+        decoder = HuffmanDecoder(HuffmanNode.build_tree(leaves))
+        # all codes are longer than the last bit of the stream
+        reader = BitReader(b"\x00")
+        reader.skip(7)
+        self.assertIsNone(decoder.decode(reader))
+        self.assertEqual(reader.remaining, 0)
+        self.assertIsNone(decoder.decode(reader))
+
+    def test_single_leaf(self):
+        decoder = HuffmanDecoder(HuffmanNode.build_tree([HuffmanNode(1, "word")]))
+        self.assertIsNone(decoder.decode(BitReader(b"\x00")))
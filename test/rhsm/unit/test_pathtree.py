@@ -13,11 +13,14 @@
 
 from collections import deque
 import os
+import shutil
+import tempfile
 import unittest
+from unittest import mock
 
 from rhsm.bitstream import GhettoBitStream
 from rhsm.huffman import HuffmanNode
-from rhsm.pathtree import PathTree, PATH_END
+from rhsm.pathtree import PathMatcher, PathTree, PATH_END
 
 DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "entitlement_data.bin")
 
@@ -181,3 +184,123 @@ class TestPathTree(unittest.TestCase):
             self.assertTrue(pt.match_path("/foo/jarjar/binks"))
             self.assertTrue(pt.match_path("/foo/jarjar/bar"))
             self.assertFalse(pt.match_path("/foo/jarjar/notbinks"))
+
+
+class TestPathMatcher(unittest.TestCase):
+    TREES = [
+        {"foo": [{"path": [{"bar": [{PATH_END: None}]}]}]},
+        {"foo": [{"$releasever": [{"bar": [{PATH_END: None}]}], "jarjar": [{"binks": [{PATH_END: None}]}]}]},
+        {
+            "foo": [
+                {"jarjar": [{"binks": [{PATH_END: None}]}]},
+                {"$releasever": [{"bar": [{PATH_END: None}]}]},
+            ]
+        },
+        {"$anything": [{"$releasever": [{"$bar": [{PATH_END: None}]}]}]},
+    ]
+    PATHS = [
+        "/foo/path/bar",
+        "/foo/path/bar/listing",
+        "/foo/path/listing",
+        "/foo/listing",
+        "/foo/path/alfred",
+        "/foo/path/listing/for/alfred",
+        "/foo/path/abc",
+        "/foo/jarjar/binks",
+        "/foo/jarjar/bar",
+        "/foo/jarjar/notbinks",
+        "/boo/path/abc/d",
+        "/foo",
+        "/",
+    ]
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        patcher = mock.patch.object(PathMatcher, "CACHE_DIR", os.path.join(self.cache_dir, "matchers"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.addCleanup(PathMatcher._cache.clear)
+        PathMatcher._cache.clear()
+
+    def test_match_path_same_as_path_tree(self):
+        pt = PathTree(open(DATA, "rb").read())
+        for tree in self.TREES:
+            pt.path_tree = tree
+            matcher = PathMatcher.from_tree(tree)
+            for path in self.PATHS:
+                self.assertEqual(pt.match_path(path), matcher.match_path(path), (tree, path))
+
+    def test_match_path_data(self):
+        matcher = PathMatcher.from_tree(PathTree(open(DATA, "rb").read()).path_tree)
+        self.assertTrue(matcher.match_path("/foo/path"))
+        self.assertTrue(matcher.match_path("/foo/path/always/2"))
+        self.assertTrue(matcher.match_path("/foo/path/bar/a/b/c"))
+        self.assertFalse(matcher.match_path("/foo"))
+        self.assertRaises(ValueError, matcher.match_path, "foo/path")
+
+    def test_match_paths(self):
+        matcher = PathMatcher.from_tree(self.TREES[1])
+        self.assertEqual(
+            [True, False, True, True],
+            matcher.match_paths(["/foo/path/bar", "/foo/path/abc", "/foo/jarjar/binks", "/foo/path/bar"]),
+        )
+
+    def test_build_path_list(self):
+        f = os.path.join(os.path.dirname(os.path.abspath(__file__)), "satellite_generated_data.bin")
+        pt = PathTree(open(f, "rb").read())
+        expected = []
+        pt.build_path_list(expected)
+        paths = []
+        PathMatcher.from_tree(pt.path_tree).build_path_list(paths)
+        self.assertEqual(expected, paths)
+
+    def test_dict_round_trip(self):
+        matcher = PathMatcher.from_tree(self.TREES[2])
+        restored = PathMatcher.from_dict(matcher.to_dict())
+        for path in self.PATHS:
+            self.assertEqual(matcher.match_path(path), restored.match_path(path))
+        self.assertRaises(ValueError, PathMatcher.from_dict, {"version": 0, "nodes": []})
+
+    def test_for_payload_stored(self):
+        os.mkdir(PathMatcher.CACHE_DIR)
+        data = open(DATA, "rb").read()
+        matcher = PathMatcher.for_payload(data, 123)
+        self.assertIs(matcher, PathMatcher.for_payload(data, 123))
+        self.assertEqual(1, len(os.listdir(PathMatcher.CACHE_DIR)))
+
+        # stored matcher is used and the payload is not decoded again
+        PathMatcher._cache.clear()
+        with mock.patch("rhsm.pathtree.PathTree") as mock_tree:
+            restored = PathMatcher.for_payload(data, 123)
+        mock_tree.assert_not_called()
+        self.assertIsNot(matcher, restored)
+        self.assertTrue(restored.match_path("/foo/path/always/2"))
+
+        # matcher of older payload of the same certificate is removed
+        PathMatcher.for_payload(data[:-1] + b"\0", 123)
+        self.assertEqual(1, len(os.listdir(PathMatcher.CACHE_DIR)))
+
+    def test_for_payload_without_cache_dir(self):
+        # the directory is not created, when its parent does not exist
+        with mock.patch.object(PathMatcher, "CACHE_DIR", os.path.join(self.cache_dir, "missing", "matchers")):
+            matcher = PathMatcher.for_payload(open(DATA, "rb").read(), 123)
+            self.assertFalse(os.path.exists(PathMatcher.CACHE_DIR))
+        self.assertTrue(matcher.match_path("/foo/path"))
+
+    def test_remove_unused(self):
+        os.mkdir(PathMatcher.CACHE_DIR)
+        data = open(DATA, "rb").read()
+        for serial in (123, 456, 789):
+            PathMatcher.for_payload(data, serial)
+        PathMatcher.remove_unused([456, 1000])
+        self.assertEqual(["456-"], [filename[:4] for filename in os.listdir(PathMatcher.CACHE_DIR)])
+
+    def test_delete_cache(self):
+        os.mkdir(PathMatcher.CACHE_DIR)
+        PathMatcher.for_payload(open(DATA, "rb").read(), 123)
+        PathMatcher.delete_cache()
+        self.assertFalse(os.path.exists(PathMatcher.CACHE_DIR))
+        self.assertEqual(0, len(PathMatcher._cache))
+        # Missing directory is ignored
+        PathMatcher.delete_cache()
@@ -17,7 +17,16 @@ from unittest.mock import patch
 
 from cloud_what.providers import aws, azure, gcp
 
-from rhsm.profile import ModulesProfile, EnabledReposProfile
+from rhsm.profile import (
+    ModulesProfile,
+    EnabledReposProfile,
+    Package,
+    RPMProfile,
+    get_rpmdb_cookie,
+    profile_delta,
+    profile_digest,
+)
+from rhsm import ourjson as json
 
 
 class TestModulesProfile(unittest.TestCase):
@@ -225,3 +234,89 @@ class TestEnabledReposProfile(unittest.TestCase):
             self.assertEqual(
                 repo_list[0]["baseurl"], ["http://cdn.foo.com/content/dist/snakes/1.0/x86_64/os"]
             )
+
+
+class TestRPMProfile(unittest.TestCase):
+    """
+    Class for testing comparison of RPM profiles and their digests
+    """
+
+    PACKAGES = [
+        Package(name="package1", version="1.0.0", release="1", arch="x86_64", vendor="Red Hat"),
+        Package(name="package2", version="2.0.0", release="2", arch="x86_64", epoch=1),
+        Package(name="package3", version="3.0.0", release="3", arch="noarch"),
+    ]
+
+    @staticmethod
+    def _rpm_profile(packages):
+        mock_file = mock.Mock()
+        mock_file.read = mock.Mock(return_value=json.dumps([pkg.to_dict() for pkg in packages]))
+        return RPMProfile(from_file=mock_file)
+
+    def test_package_key(self):
+        package = Package(name=b"foo", version="1", release="2", arch="noarch", epoch=3, vendor=b"bar")
+        self.assertEqual((b"foo", 3, "1", "2", "noarch", "bar"), package.key)
+        self.assertEqual(hash(package), hash(package.key))
+
+    def test_profile_equality_ignores_order(self):
+        profile = self._rpm_profile(self.PACKAGES)
+        self.assertEqual(profile, self._rpm_profile(list(reversed(self.PACKAGES))))
+        self.assertEqual(3, len(profile.index()))
+
+    def test_profile_inequality(self):
+        profile = self._rpm_profile(self.PACKAGES)
+        other_pkgs = self.PACKAGES[:2] + [
+            Package(name="package3", version="3.0.1", release="3", arch="noarch"),
+        ]
+        self.assertNotEqual(profile, self._rpm_profile(other_pkgs))
+        self.assertNotEqual(profile, self._rpm_profile(self.PACKAGES[:2]))
+
+    def test_profile_digest(self):
+        pkg_dicts = [pkg.to_dict() for pkg in self.PACKAGES]
+        digest = profile_digest(pkg_dicts)
+        self.assertEqual(64, len(digest))
+        self.assertEqual(digest, profile_digest(list(reversed(pkg_dicts))))
+        self.assertNotEqual(digest, profile_digest(pkg_dicts[:2]))
+        self.assertNotEqual(profile_digest([]), profile_digest(pkg_dicts[:1]))
+
+    def test_profile_delta(self):
+        old_pkgs = [pkg.to_dict() for pkg in self.PACKAGES]
+        new_pkgs = [
+            self.PACKAGES[0].to_dict(),
+            Package(name="package3", version="3.0.1", release="1", arch="noarch").to_dict(),
+            Package(name="package4", version="4.0.0", release="1", arch="noarch").to_dict(),
+        ]
+        delta = profile_delta("rpm", old_pkgs, new_pkgs)
+        self.assertEqual([new_pkgs[2]], delta["added"])
+        self.assertEqual([old_pkgs[1]], delta["removed"])
+        self.assertEqual([{"old": old_pkgs[2], "new": new_pkgs[1]}], delta["changed"])
+
+    def test_profile_delta_no_change(self):
+        repos = [
+            {"repositoryid": "repo1", "baseurl": ["https://example.com/repo1"]},
+            {"repositoryid": "repo2", "baseurl": ["https://example.com/repo2"]},
+        ]
+        delta = profile_delta("enabled_repos", repos, list(reversed(repos)))
+        self.assertEqual({"added": [], "removed": [], "changed": []}, delta)
+
+    @patch("rhsm.profile.rpm")
+    def test_rpmdb_cookie(self, rpm_mock):
+        rpm_mock.TransactionSet.return_value.dbCookie.return_value = "abcd"
+        self.assertEqual("cookie:abcd", get_rpmdb_cookie())
+
+    @patch("rhsm.profile.rpm")
+    def test_rpmdb_cookie_stat_fallback(self, rpm_mock):
+        rpm_mock.error = Exception
+        rpm_mock.TransactionSet.return_value.dbCookie.side_effect = AttributeError
+        with tempfile.TemporaryDirectory() as rpmdb_dir:
+            with open(rpmdb_dir + "/rpmdb.sqlite", "w") as rpmdb:
+                rpmdb.write("foo")
+            with patch("rhsm.profile.RPMDB_PATHS", ("/non/existing/dir", rpmdb_dir)):
+                cookie = get_rpmdb_cookie()
+                self.assertTrue(cookie.startswith("stat:"))
+                self.assertEqual(cookie, get_rpmdb_cookie())
+                with open(rpmdb_dir + "/rpmdb.sqlite", "a") as rpmdb:
+                    rpmdb.write("bar")
+                self.assertNotEqual(cookie, get_rpmdb_cookie())
+            with patch("rhsm.profile.RPMDB_PATHS", ("/non/existing/dir",)):
+                self.assertIsNone(get_rpmdb_cookie())
@@ -0,0 +1,93 @@
+# Copyright (c) 2026 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from rhsm import timing
+
+
+class TestTiming(unittest.TestCase):
+    def tearDown(self):
+        timing.stop_recording()
+
+    def test_span_not_recording(self):
+        with timing.span("rest", "GET /status", method="GET") as attributes:
+            attributes["status"] = 200
+        self.assertEqual({"method": "GET", "status": 200}, attributes)
+        self.assertIsNone(timing.stop_recording())
+
+    def test_nested_spans(self):
+        timing.start_recording("test")
+        with timing.span("invoker", "EntCertActionInvoker"):
+            with timing.span("rest", "GET /status", method="GET") as attributes:
+                attributes["status"] = 200
+            with timing.span("cache", "/var/lib/rhsm/cache/x.json", operation="read"):
+                pass
+        recorder = timing.stop_recording()
+
+        record = recorder.to_dict()
+        self.assertEqual("test", record["name"])
+        self.assertEqual(["invoker", "rest", "cache"], [span["kind"] for span in record["spans"]])
+        invoker, rest, cache = record["spans"]
+        self.assertIsNone(invoker["parent"])
+        self.assertEqual(invoker["id"], rest["parent"])
+        self.assertEqual(invoker["id"], cache["parent"])
+        self.assertEqual({"method": "GET", "status": 200}, rest["attributes"])
+        self.assertGreaterEqual(invoker["duration"], rest["duration"] + cache["duration"])
+        self.assertEqual(1, record["totals"]["rest"]["count"])
+        self.assertGreaterEqual(record["duration"], invoker["duration"])
+
+    def test_span_error(self):
+        timing.start_recording("test")
+        with self.assertRaises(ValueError):
+            with timing.span("invoker", "FactsActionInvoker"):
+                raise ValueError()
+        record = timing.stop_recording().to_dict()
+        self.assertEqual("ValueError", record["spans"][0]["error"])
+
+    def test_spans_in_threads(self):
+        timing.start_recording("test")
+
+        def request():
+            with timing.span("rest", "GET /status"):
+                pass
+
+        with timing.span("invoker", "ContentActionClient"):
+            thread = threading.Thread(target=request)
+            thread.start()
+            thread.join()
+        record = timing.stop_recording().to_dict()
+        self.assertEqual([None, None], [span["parent"] for span in record["spans"]])
+
+    def test_write_record(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        path = os.path.join(temp_dir, "timing.log")
+        for _i in range(2):
+            timing.start_recording("test")
+            with timing.span("invoker", "FactsActionInvoker"):
+                pass
+            timing.write_record(timing.stop_recording(), path)
+        with open(path) as record_file:
+            records = [json.loads(line) for line in record_file]
+        self.assertEqual(2, len(records))
+        self.assertEqual("FactsActionInvoker", records[1]["spans"][0]["name"])
+
+    def test_write_record_no_directory(self):
+        timing.start_recording("test")
+        timing.write_record(timing.stop_recording(), "/nonexistent/directory/timing.log")
@@ -0,0 +1,164 @@
+# Copyright (c) 2026 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from rhsmlib.facts import all
+from rhsmlib.facts import cloud_facts
+from rhsmlib.facts import collector
+from rhsmlib.facts import custom
+from rhsmlib.facts import hwprobe
+from rhsmlib.facts import host_collector
+from rhsmlib.facts import pkg_arches
+
+
+class SlowCollector(collector.FactsCollector):
+    """Collector waiting until FastCollector is started"""
+
+    started = threading.Event()
+
+    def get_all(self):
+        self.started.wait(5)
+        return {"slow.fact": "slow", "shared.fact": "slow"}
+
+
+class FastCollector(collector.FactsCollector):
+    def get_all(self):
+        SlowCollector.started.set()
+        return {"fast.fact": "fast", "shared.fact": "fast"}
+
+
+class DependentCollector(collector.FactsCollector):
+    def get_all(self):
+        return {"dependent.fact": self._collected_hw_info.get("slow.fact")}
+
+
+class FailingCollector(collector.FactsCollector):
+    def get_all(self):
+        raise RuntimeError("BOOM!")
+
+
+class HangingCollector(collector.FactsCollector):
+    finish = threading.Event()
+
+    def get_all(self):
+        self.finish.wait(5)
+        return {"hanging.fact": "hanging"}
+
+
+class TestAllFactsCollector(unittest.TestCase):
+    def setUp(self):
+        SlowCollector.started.clear()
+        HangingCollector.finish.clear()
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        cache_patcher = patch.object(
+            collector.FactSourceCache, "CACHE_FILE", os.path.join(temp_dir, "fact_sources.json")
+        )
+        cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+        self.collector = all.AllFactsCollector()
+
+    def test_independent_collectors_run_concurrently(self):
+        self.collector.collectors = [SlowCollector, FastCollector]
+        self.collector.dependencies = {}
+        facts = self.collector.get_all()
+        self.assertTrue(SlowCollector.started.is_set())
+        # Facts are merged in the order of collectors, not in order of finishing
+        self.assertEqual({"slow.fact": "slow", "fast.fact": "fast", "shared.fact": "fast"}, facts)
+
+    def test_dependent_collector_gets_facts(self):
+        self.collector.collectors = [SlowCollector, FastCollector, DependentCollector]
+        self.collector.dependencies = {DependentCollector: [SlowCollector]}
+        facts = self.collector.get_all()
+        self.assertEqual("slow", facts["dependent.fact"])
+
+    def test_custom_facts_override_facts_of_dependencies(self):
+        collected_hw_info = {}
+
+        def fake_collector(facts):
+            def get_all_cached(fact_collector, facts_cache):
+                collected_hw_info[type(fact_collector)] = fact_collector._collected_hw_info
+                return facts
+
+            return get_all_cached
+
+        fake_facts = {
+            host_collector.HostCollector: {"virt.is_guest": False},
+            hwprobe.HardwareCollector: {"dmi.bios.vendor": "Vendor", "distribution.name": "Linux"},
+            custom.CustomFactsCollector: {"virt.is_guest": True, "distribution.name": "Custom Linux"},
+            cloud_facts.CloudFactsCollector: {},
+            pkg_arches.SupportedArchesCollector: {},
+        }
+        self.collector.collectors = list(fake_facts)
+        for fact_collector_cls, facts in fake_facts.items():
+            get_all_patcher = patch.object(
+                fact_collector_cls, "get_all_cached", autospec=True, side_effect=fake_collector(facts)
+            )
+            get_all_patcher.start()
+            self.addCleanup(get_all_patcher.stop)
+
+        self.collector.get_all()
+        self.assertEqual(
+            {"virt.is_guest": True, "dmi.bios.vendor": "Vendor", "distribution.name": "Custom Linux"},
+            collected_hw_info[cloud_facts.CloudFactsCollector],
+        )
+        self.assertEqual(
+            "Custom Linux", collected_hw_info[pkg_arches.SupportedArchesCollector]["distribution.name"]
+        )
+
+    def test_failing_collector(self):
+        self.collector.collectors = [FastCollector, FailingCollector]
+        self.collector.dependencies = {}
+        self.assertRaises(all.FactsCollectionError, self.collector.get_all)
+
+    def test_failing_collector_cached_facts(self):
+        self.collector.collectors = [FastCollector, FailingCollector]
+        self.collector.dependencies = {}
+        # Facts are reused even, when they are not valid anymore
+        self.collector.facts_cache.set("FailingCollector", "old key", {"failing.fact": "cached"})
+        facts = self.collector.get_all()
+        self.assertEqual({"fast.fact": "fast", "shared.fact": "fast", "failing.fact": "cached"}, facts)
+
+    def test_collector_timeout(self):
+        self.collector.collectors = [FastCollector, HangingCollector]
+        self.collector.dependencies = {}
+        self.collector.COLLECTOR_TIMEOUT = 0.1
+        try:
+            self.assertRaises(all.FactsCollectionError, self.collector.get_all)
+        finally:
+            HangingCollector.finish.set()
+
+    def test_collector_timeout_cached_facts(self):
+        self.collector.collectors = [FastCollector, HangingCollector]
+        self.collector.dependencies = {}
+        self.collector.COLLECTOR_TIMEOUT = 0.1
+        self.collector.facts_cache.set("HangingCollector", "old key", {"hanging.fact": "cached"})
+        try:
+            facts = self.collector.get_all()
+        finally:
+            HangingCollector.finish.set()
+        self.assertEqual({"fast.fact": "fast", "shared.fact": "fast", "hanging.fact": "cached"}, facts)
+
+    def test_max_workers(self):
+        self.collector.collectors = [FastCollector, DependentCollector, collector.StaticFactsCollector]
+        self.collector.dependencies = {}
+        self.collector.MAX_WORKERS = 1
+        facts = self.collector.get_all()
+        self.assertEqual("fast", facts["fast.fact"])
+        self.assertIn("system.certificate_version", facts)
@@ -13,10 +13,13 @@
 
 import unittest
 
+import os
 import platform
+import tempfile
 from unittest import mock
 from test.fixture import open_mock
 
+from rhsm import cache_store
 from rhsmlib.facts import collector, firmware_info
 
 
@@ -38,3 +41,84 @@ class GetArchTest(unittest.TestCase):
     def test_get_platform_specific_info_provider(self):
         info_provider = firmware_info.get_firmware_collector(arch=platform.machine())
         self.assertTrue(info_provider is not None)
+
+
+class CachedCollector(collector.FactsCollector):
+    CACHE_TTL = 60
+
+    def __init__(self, key=None, **kwargs):
+        super().__init__(**kwargs)
+        self.key = key
+        self.calls = 0
+
+    def cache_key(self):
+        return self.key
+
+    def get_all(self):
+        self.calls += 1
+        return {"cached.fact": self.calls}
+
+
+class FactSourceCacheTest(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        cache_patcher = mock.patch.object(
+            collector.FactSourceCache, "CACHE_FILE", os.path.join(temp_dir.name, "fact_sources.json")
+        )
+        cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+        self.facts_cache = collector.FactSourceCache()
+
+    def test_facts_are_reused_when_key_is_unchanged(self):
+        fact_collector = CachedCollector(key={"boot_id": "1"})
+        self.assertEqual({"cached.fact": 1}, fact_collector.get_all_cached(self.facts_cache))
+        self.assertEqual({"cached.fact": 1}, fact_collector.get_all_cached(self.facts_cache))
+        self.assertEqual(1, fact_collector.calls)
+
+    def test_facts_are_collected_when_key_changed(self):
+        fact_collector = CachedCollector(key={"boot_id": "1"})
+        fact_collector.get_all_cached(self.facts_cache)
+        fact_collector.key = {"boot_id": "2"}
+        self.assertEqual({"cached.fact": 2}, fact_collector.get_all_cached(self.facts_cache))
+
+    def test_facts_are_collected_when_ttl_expired(self):
+        fact_collector = CachedCollector(key={"boot_id": "1"})
+        fact_collector.get_all_cached(self.facts_cache)
+        with mock.patch("time.time", return_value=fact_collector.CACHE_TTL + 1e10):
+            self.assertEqual({"cached.fact": 2}, fact_collector.get_all_cached(self.facts_cache))
+
+    def test_facts_without_key_are_not_cached(self):
+        fact_collector = CachedCollector(key=None)
+        fact_collector.get_all_cached(self.facts_cache)
+        fact_collector.get_all_cached(self.facts_cache)
+        self.assertEqual(2, fact_collector.calls)
+        self.assertFalse(os.path.exists(self.facts_cache.CACHE_FILE))
+
+    def test_corrupted_cache(self):
+        with open(self.facts_cache.CACHE_FILE, "w") as cache_file:
+            cache_file.write("{not json")
+        fact_collector = CachedCollector(key={"boot_id": "1"})
+        self.assertEqual({"cached.fact": 1}, fact_collector.get_all_cached(self.facts_cache))
+
+    def test_cache_is_written_atomically(self):
+        CachedCollector(key={"boot_id": "1"}).get_all_cached(self.facts_cache)
+        self.assertIsNotNone(cache_store.metadata(self.facts_cache.CACHE_FILE))
+        # Failed writing keeps the previous content of the cache
+        with mock.patch("os.write", side_effect=OSError("No space left on device")):
+            self.facts_cache.set("other", "key", {"other.fact": 1})
+        self.assertEqual(
+            sorted(["fact_sources.json", cache_store.INDEX_FILE_NAME]),
+            sorted(os.listdir(os.path.dirname(self.facts_cache.CACHE_FILE))),
+        )
+        fact_collector = CachedCollector(key={"boot_id": "1"})
+        self.assertEqual({"cached.fact": 1}, fact_collector.get_all_cached(self.facts_cache))
+        self.assertEqual(0, fact_collector.calls)
+
+    def test_delete_cache(self):
+        CachedCollector(key={"boot_id": "1"}).get_all_cached(self.facts_cache)
+        self.assertTrue(os.path.exists(self.facts_cache.CACHE_FILE))
+        collector.FactSourceCache.delete_cache()
+        self.assertFalse(os.path.exists(self.facts_cache.CACHE_FILE))
+        # Missing cache is ignored
+        collector.FactSourceCache.delete_cache()
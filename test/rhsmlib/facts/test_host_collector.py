@@ -45,3 +45,17 @@ class HostCollectorTest(unittest.TestCase):
 
         self.assertTrue(isinstance(facts, dict))
         self.assertEqual(facts["system.default_locale"], "en_US")
+
+    @mock.patch("rhsmlib.facts.collector.get_boot_id")
+    def test_cache_key(self, mock_boot_id):
+        collector = host_collector.HostCollector()
+        mock_boot_id.return_value = "f3b8d2b0-0000-0000-0000-000000000000"
+        cache_key = collector.cache_key()
+        self.assertEqual("f3b8d2b0-0000-0000-0000-000000000000", cache_key["boot_id"])
+
+        mock_boot_id.return_value = None
+        self.assertIsNone(collector.cache_key())
+
+    def test_cache_key_testing(self):
+        collector = host_collector.HostCollector(testing=True)
+        self.assertIsNone(collector.cache_key())
@@ -10,6 +10,7 @@
 # Red Hat trademarks are not licensed under GPLv2. No permission is
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
+import shutil
 import subprocess
 import tempfile
 import time
@@ -183,40 +184,112 @@ class TestFilesystemWatcher(fixture.SubManFixture):
         self.fsw2.loop()
 
     @unittest.skipIf(not HAS_PYINOTIFY, "'pyinotify' is not available")
-    @patch("rhsmlib.file_monitor.DirectoryWatch.notify")
     @patch("pyinotify.Event")
-    def test_handle_event(self, mock_event, mock_notify):
+    def test_handle_event(self, mock_event):
         mock_event.path = self.testpath1
         mock_event.pathname = self.testpath1
         mock_event.mask = self.dw3.IN_MODIFY
         self.fsw2.handle_event(mock_event)
-        self.assertEqual(mock_notify.call_count, 1)
-        mock_notify.call_count = 0
+        self.assertEqual(set(self.fsw2.pending), {self.dw1})
+        self.fsw2.pending.clear()
         mock_event.mask = 0
         self.fsw2.handle_event(mock_event)
-        self.assertEqual(mock_notify.call_count, 0)
-        mock_notify.call_count = 0
+        self.assertEqual(set(self.fsw2.pending), set())
 
         mock_event.path = self.testpath2
         mock_event.pathname = self.testpath2
         mock_event.mask = self.dw3.IN_MODIFY
         self.fsw2.handle_event(mock_event)
-        self.assertGreaterEqual(mock_notify.call_count, 2)
-        mock_notify.call_count = 0
+        self.assertEqual(set(self.fsw2.pending), {self.dw2, self.dw3})
+        self.fsw2.pending.clear()
         mock_event.mask = 0
         self.fsw2.handle_event(mock_event)
-        self.assertEqual(mock_notify.call_count, 0)
-        mock_notify.call_count = 0
+        self.assertEqual(set(self.fsw2.pending), set())
 
         mock_event.path = self.testpath3
         mock_event.pathname = self.testpath3
         mock_event.mask = self.dw3.IN_MODIFY
         self.fsw2.handle_event(mock_event)
-        self.assertEqual(mock_notify.call_count, 0)
-        mock_notify.call_count = 0
-        mock_event.mask = 0
+        self.assertEqual(set(self.fsw2.pending), set())
+
+    @unittest.skipIf(not HAS_PYINOTIFY, "'pyinotify' is not available")
+    @patch("pyinotify.Event")
+    def test_handle_event_temporary_disabled(self, mock_event):
+        mock_event.path = self.testpath2
+        mock_event.pathname = self.testpath2
+        mock_event.mask = self.dw3.IN_MODIFY
+        self.dw3.temporary_disable()
         self.fsw2.handle_event(mock_event)
-        self.assertEqual(mock_notify.call_count, 0)
+        self.assertEqual(set(self.fsw2.pending), {self.dw2})
+
+    @unittest.skipIf(not HAS_PYINOTIFY, "'pyinotify' is not available")
+    def test_notify_pending_debounced(self):
+        fsw = file_monitor.InotifyFilesystemWatcher(self.dir_list, debounce_timeout=60000)
+        fsw.mark_changed(self.dw3)
+        fsw.mark_changed(self.dw3)
+        remaining = fsw.notify_pending()
+        self.assertGreater(remaining, 59.0)
+        self.mock_cb1.assert_not_called()
+
+        fsw.debounce_timeout = 0
+        self.assertIsNone(fsw.notify_pending())
+        self.mock_cb1.assert_called_once()
+        self.mock_cb2.assert_called_once()
+        self.assertEqual(fsw.pending, {})
+
+    @unittest.skipIf(not HAS_PYINOTIFY, "'pyinotify' is not available")
+    def test_notify_pending_callback_called_once(self):
+        # Callback associated with more dir watches is called only once
+        dw4 = file_monitor.DirectoryWatch(self.testpath1, [self.mock_cb1], is_glob=False)
+        fsw = file_monitor.InotifyFilesystemWatcher({"DW3": self.dw3, "DW4": dw4}, debounce_timeout=0)
+        fsw.mark_changed(self.dw3)
+        fsw.mark_changed(dw4)
+        fsw.notify_pending()
+        self.mock_cb1.assert_called_once()
+        self.mock_cb2.assert_called_once()
+
+    @unittest.skipIf(not HAS_PYINOTIFY, "'pyinotify' is not available")
+    def test_read_events(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        dir_watch = file_monitor.DirectoryWatch(temp_dir, [self.mock_cb1])
+        fsw = file_monitor.InotifyFilesystemWatcher({"DW": dir_watch}, debounce_timeout=0)
+        fsw.start()
+        self.addCleanup(fsw.remove_watches)
+        for index in range(10):
+            with open(os.path.join(temp_dir, "%d.pem" % index), "w") as pem_file:
+                pem_file.write("pem")
+        self.assertIsNotNone(fsw.fileno())
+        fsw.read_events()
+        fsw.notify_pending()
+        self.mock_cb1.assert_called_once()
+
+    @unittest.skipIf(not HAS_PYINOTIFY, "'pyinotify' is not available")
+    def test_events_read_while_disabled_ignored(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        dir_watch = file_monitor.DirectoryWatch(temp_dir, [self.mock_cb1])
+        fsw = file_monitor.InotifyFilesystemWatcher({"DW": dir_watch}, debounce_timeout=0)
+        fsw.start()
+        self.addCleanup(fsw.remove_watches)
+        dir_watch.temporary_disable()
+        with open(os.path.join(temp_dir, "rhsm.conf"), "w") as conf_file:
+            conf_file.write("[rhsm]")
+        # Queued events are read before the watcher is enabled again
+        fsw.read_events()
+        dir_watch.enable()
+        fsw.read_events()
+        fsw.notify_pending()
+        self.mock_cb1.assert_not_called()
+
+    @patch("rhsmlib.file_monitor.conf")
+    def test_inotify_debounce_config(self, mock_config):
+        mock_config.__getitem__.return_value.get_int.return_value = 1000
+        self.assertEqual(file_monitor.get_inotify_debounce(), 1000)
+        mock_config.__getitem__.return_value.get_int.return_value = -1
+        self.assertEqual(file_monitor.get_inotify_debounce(), file_monitor.DEFAULT_INOTIFY_DEBOUNCE)
+        mock_config.__getitem__.return_value.get_int.side_effect = ValueError("bees?")
+        self.assertEqual(file_monitor.get_inotify_debounce(), file_monitor.DEFAULT_INOTIFY_DEBOUNCE)
 
 
 class TestDirectoryWatch(fixture.SubManFixture):
@@ -33,6 +33,8 @@ from subscription_manager.cache import (
     SyspurposeValidFieldsCache,
     CurrentOwnerCache,
     CapabilitiesCache,
+    RepoFingerprintCache,
+    ContentModelCache,
 )
 from subscription_manager.facts import Facts
 from rhsm.certificate import GMT
@@ -567,7 +569,7 @@ class StubUEP:
     def updatePackageProfile(self, uuid, pkg_dicts):
         pass
 
-    def getRelease(self, consumerId):
+    def getRelease(self, consumerId, validators=None):
         return {"releaseVer": ""}
 
     def getServiceLevelList(self, owner):
@@ -598,7 +600,7 @@ class StubUEP:
     def setConsumer(self, consumer):
         self.consumer = consumer
 
-    def getConsumer(self, consumerId):
+    def getConsumer(self, consumerId, validators=None):
         if hasattr(self, "consumer") and self.consumer:
             return self.consumer
         if callable(self.registered_consumer_info):
@@ -614,13 +616,13 @@ class StubUEP:
     def setSyspurposeCompliance(self, status):
         self.syspurpose_compliance_status = status
 
-    def getEntitlementList(self, uuid):
+    def getEntitlementList(self, uuid, validators=None):
         return [{"id": "ent1"}, {"id": "ent2"}]
 
     def getPoolsList(self, uuid, listAll, active_on, owner):
         return [{"id": "pool1"}, {"id": "pool2"}]
 
-    def getContentOverrides(self, uuid):
+    def getContentOverrides(self, uuid, validators=None):
         return []
 
     def getOwnerSyspurposeValidFields(self, owner_key):
@@ -813,6 +815,22 @@ class StubReleaseStatusCache(ReleaseStatusCache):
         self.server_status = None
 
 
+class StubRepoFingerprintCache(RepoFingerprintCache):
+    def write_cache(self, debug=False):
+        pass
+
+    def read_cache_only(self):
+        return None
+
+
+class StubContentModelCache(ContentModelCache):
+    def write_cache(self, debug=False):
+        pass
+
+    def read_cache_only(self):
+        return None
+
+
 class StubAvailableEntitlementsCache(AvailableEntitlementsCache):
     def write_cache(self, debug=False):
         pass
@@ -33,12 +33,15 @@ from .stubs import (
 )
 from .fixture import SubManFixture
 
+from rhsm import cache_store
 from rhsm import ourjson as json
 from subscription_manager.cache import (
+    CacheManager,
     ProfileManager,
     InstalledProductsManager,
     PoolTypeCache,
     ReleaseStatusCache,
+    OverrideStatusCache,
     ContentAccessCache,
     PoolStatusCache,
     SupportedResourcesCache,
@@ -46,12 +49,15 @@ from subscription_manager.cache import (
     CurrentOwnerCache,
     CapabilitiesCache,
     CryptographicCapabilitiesCache,
+    RepoFingerprintCache,
+    ContentModelCache,
 )
 
 from rhsm.profile import Package, RPMProfile, EnabledReposProfile, ModulesProfile
 
 from rhsm.connection import (
     UEPConnection,
+    ResponseValidators,
     RestlibException,
     RateLimitExceededException,
 )
@@ -422,6 +428,151 @@ class TestProfileManager(SubManFixture):
         self.assertTrue(self.profile_mgr.has_changed())
         self.profile_mgr._read_cache.assert_called_with()
 
+    def _use_temp_cache_files(self):
+        temp_cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_cache_dir)
+        self.profile_mgr.CACHE_FILE = os.path.join(temp_cache_dir, "profile.json")
+
+    def test_write_cache_writes_index(self):
+        self._use_temp_cache_files()
+        profile = {
+            "rpm": [
+                pkg.to_dict() for pkg in [Package(name="package1", version="1.0.0", release=1, arch="x86_64")]
+            ],
+            "enabled_repos": [],
+            "modulemd": [],
+        }
+        self.profile_mgr.current_profile = profile
+        self.profile_mgr.write_cache()
+
+        index = cache_store.metadata(self.profile_mgr.CACHE_FILE)["validators"]
+        self.assertEqual(ProfileManager._profile_digests(profile), index["digests"])
+        self.assertIsNone(index["rpmdb_cookie"])
+
+    def test_has_changed_uses_index(self):
+        self._use_temp_cache_files()
+        packages = [
+            Package(name="package1", version="1.0.0", release=1, arch="x86_64"),
+            Package(name="package2", version="2.0.0", release=2, arch="x86_64"),
+        ]
+        profile = {"rpm": [pkg.to_dict() for pkg in packages], "enabled_repos": [], "modulemd": []}
+        self.profile_mgr.current_profile = profile
+        self.profile_mgr.write_cache()
+        self.profile_mgr._read_cache = Mock()
+
+        # Order of packages does not matter
+        self.profile_mgr.current_profile = {
+            "rpm": [pkg.to_dict() for pkg in reversed(packages)],
+            "enabled_repos": [],
+            "modulemd": [],
+        }
+        self.assertFalse(self.profile_mgr.has_changed())
+
+        self.profile_mgr.current_profile = {"rpm": profile["rpm"][:1], "enabled_repos": [], "modulemd": []}
+        self.assertTrue(self.profile_mgr.has_changed())
+        self.profile_mgr._read_cache.assert_not_called()
+
+    @patch("subscription_manager.cache.get_profile")
+    @patch("subscription_manager.cache.get_rpmdb_cookie")
+    def test_current_profile_rpmdb_not_changed(self, mock_get_rpmdb_cookie, mock_get_profile):
+        self._use_temp_cache_files()
+        mock_get_rpmdb_cookie.return_value = "cookie:1234"
+        rpm_profile = [Package(name="package1", version="1.0.0", release=1, arch="x86_64").to_dict()]
+        profiles = {"rpm": Mock(), "enabled_repos": Mock(), "modulemd": Mock()}
+        profiles["rpm"].collect = Mock(return_value=rpm_profile)
+        profiles["enabled_repos"].collect = Mock(return_value=[])
+        profiles["modulemd"].collect = Mock(return_value=[])
+        mock_get_profile.side_effect = lambda profile_type: profiles[profile_type]
+
+        profile_mgr = ProfileManager()
+        profile_mgr.CACHE_FILE = self.profile_mgr.CACHE_FILE
+        profile_mgr.write_cache()
+        profiles["rpm"].collect.assert_called_once()
+
+        # rpmdb was not changed; installed packages are not read again
+        profile_mgr = ProfileManager()
+        profile_mgr.CACHE_FILE = self.profile_mgr.CACHE_FILE
+        self.assertFalse(profile_mgr.has_changed())
+        self.assertEqual(rpm_profile, profile_mgr.current_profile["rpm"])
+        profiles["rpm"].collect.assert_called_once()
+
+        # rpmdb was changed
+        mock_get_rpmdb_cookie.return_value = "cookie:5678"
+        profile_mgr = ProfileManager()
+        profile_mgr.CACHE_FILE = self.profile_mgr.CACHE_FILE
+        self.assertFalse(profile_mgr.has_changed())
+        self.assertEqual(2, profiles["rpm"].collect.call_count)
+
+    def _write_cached_profile(self, profile):
+        self._use_temp_cache_files()
+        with open(self.profile_mgr.CACHE_FILE, "w") as cache_file:
+            json.dump(profile, cache_file)
+
+    @patch("subscription_manager.cache.get_supported_resources")
+    def test_combined_profile_update_check_delta(self, mock_get_supported_resources):
+        mock_get_supported_resources.return_value = ["packages"]
+        uuid = "FAKEUUID"
+        pkg1 = Package(name="package1", version="1.0.0", release=1, arch="x86_64").to_dict()
+        pkg2 = Package(name="package2", version="2.0.0", release=2, arch="x86_64").to_dict()
+        pkg2_new = Package(name="package2", version="2.0.1", release=1, arch="x86_64").to_dict()
+        self._write_cached_profile({"rpm": [pkg1, pkg2], "enabled_repos": [], "modulemd": []})
+        self.profile_mgr.current_profile = {"rpm": [pkg1, pkg2_new], "enabled_repos": [], "modulemd": []}
+        uep = Mock()
+        uep.has_capability = Mock(return_value=True)
+
+        self.assertEqual(1, self.profile_mgr.update_check(uep, uuid))
+
+        uep.updateCombinedProfileDelta.assert_called_once_with(
+            uuid,
+            [
+                {
+                    "content_type": "rpm",
+                    "added": [],
+                    "removed": [],
+                    "changed": [{"old": pkg2, "new": pkg2_new}],
+                }
+            ],
+        )
+        uep.updateCombinedProfile.assert_not_called()
+
+    @patch("subscription_manager.cache.get_supported_resources")
+    def test_combined_profile_update_check_delta_not_supported(self, mock_get_supported_resources):
+        mock_get_supported_resources.return_value = ["packages"]
+        uuid = "FAKEUUID"
+        pkg1 = Package(name="package1", version="1.0.0", release=1, arch="x86_64").to_dict()
+        self._write_cached_profile({"rpm": [], "enabled_repos": [], "modulemd": []})
+        self.profile_mgr.current_profile = {"rpm": [pkg1], "enabled_repos": [], "modulemd": []}
+        uep = Mock()
+        uep.has_capability = Mock(side_effect=lambda capability: capability == "combined_reporting")
+
+        self.assertEqual(1, self.profile_mgr.update_check(uep, uuid))
+
+        uep.updateCombinedProfileDelta.assert_not_called()
+        uep.updateCombinedProfile.assert_called_once_with(
+            uuid,
+            [
+                {"content_type": "rpm", "profile": [pkg1]},
+                {"content_type": "enabled_repos", "profile": []},
+                {"content_type": "modulemd", "profile": []},
+            ],
+        )
+
+    @patch("subscription_manager.cache.get_supported_resources")
+    def test_combined_profile_update_check_delta_rejected(self, mock_get_supported_resources):
+        mock_get_supported_resources.return_value = ["packages"]
+        uuid = "FAKEUUID"
+        pkg1 = Package(name="package1", version="1.0.0", release=1, arch="x86_64").to_dict()
+        self._write_cached_profile({"rpm": [], "enabled_repos": [], "modulemd": []})
+        self.profile_mgr.current_profile = {"rpm": [pkg1], "enabled_repos": [], "modulemd": []}
+        uep = Mock()
+        uep.has_capability = Mock(return_value=True)
+        uep.updateCombinedProfileDelta = Mock(side_effect=RestlibException(409, "Conflict"))
+
+        self.assertEqual(1, self.profile_mgr.update_check(uep, uuid))
+
+        uep.updateCombinedProfileDelta.assert_called_once()
+        uep.updateCombinedProfile.assert_called_once_with(uuid, FACT_MATCHER)
+
     @patch("subscription_manager.cache.get_supported_resources")
     def test_update_check_consumer_uuid_none(self, mock_get_supported_resources):
         mock_get_supported_resources.return_value = ["packages"]
@@ -849,6 +1000,124 @@ class TestPoolStatusCache(SubManFixture):
         self.assertEqual(dummy_pools, self.pool_status_cache.server_status)
 
 
+class TestStatusCacheValidators(SubManFixture):
+    """
+    Class for testing conditional requests of status caches
+    """
+
+    OVERRIDES = [{"contentLabel": "repo", "name": "enabled", "value": "1"}]
+
+    def setUp(self):
+        super(TestStatusCacheValidators, self).setUp()
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        cache_file_patcher = patch.object(
+            OverrideStatusCache, "CACHE_FILE", os.path.join(temp_dir, "content_overrides.json")
+        )
+        cache_file_patcher.start()
+        self.addCleanup(cache_file_patcher.stop)
+
+    @staticmethod
+    def _get_overrides(etag, not_modified=False):
+        def get_overrides(uuid, validators):
+            validators.not_modified = not_modified
+            if not not_modified:
+                validators.etag = etag
+                return TestStatusCacheValidators.OVERRIDES
+            return None
+
+        return Mock(side_effect=get_overrides)
+
+    def _write_cache(self):
+        cache = OverrideStatusCache()
+        uep = Mock()
+        uep.getContentOverrides = self._get_overrides('"1"')
+        cache.uuid = "UUID"
+        cache._sync_with_server(uep, "UUID")
+        CacheManager.write_cache(cache)
+        return cache
+
+    def test_validators_written(self):
+        cache = self._write_cache()
+        self.assertEqual('"1"', cache.validators.etag)
+        metadata = cache_store.metadata(OverrideStatusCache.CACHE_FILE)
+        self.assertEqual({"etag": '"1"', "last_modified": None}, metadata["validators"])
+        self.assertEqual("UUID", metadata["uuid"])
+
+    def test_not_modified_uses_cached_status(self):
+        self._write_cache()
+        cache = OverrideStatusCache()
+        cache.write_cache = Mock()
+        uep = Mock()
+        uep.getContentOverrides = self._get_overrides('"1"', not_modified=True)
+
+        status = cache.load_status(uep, "UUID")
+
+        self.assertEqual(self.OVERRIDES, status)
+        validators = uep.getContentOverrides.call_args[1]["validators"]
+        self.assertEqual({"If-None-Match": '"1"'}, validators.to_headers())
+
+    def test_no_validators_without_cache(self):
+        cache = self._write_cache()
+        os.remove(OverrideStatusCache.CACHE_FILE)
+        cache = OverrideStatusCache()
+        uep = Mock()
+        uep.getContentOverrides = self._get_overrides('"2"')
+
+        cache._sync_with_server(uep, "UUID")
+
+        validators = uep.getContentOverrides.call_args[1]["validators"]
+        self.assertEqual('"2"', validators.etag)
+        self.assertEqual(self.OVERRIDES, cache.server_status)
+
+    def test_not_modified_without_cached_status(self):
+        cache = OverrideStatusCache()
+        cache.validators = ResponseValidators(etag='"1"')
+        cache._read_cache = Mock(return_value=None)
+        responses = iter([True, False])
+
+        def get_overrides(uuid, validators):
+            validators.not_modified = next(responses)
+            return None if validators.not_modified else self.OVERRIDES
+
+        uep = Mock()
+        uep.getContentOverrides = Mock(side_effect=get_overrides)
+
+        cache._sync_with_server(uep, "UUID")
+
+        self.assertEqual(2, uep.getContentOverrides.call_count)
+        self.assertEqual(self.OVERRIDES, cache.server_status)
+        self.assertFalse(cache.validators)
+
+    def test_no_validators_with_changed_cache(self):
+        self._write_cache()
+        with open(OverrideStatusCache.CACHE_FILE, "a") as cache_file:
+            cache_file.write(" ")
+        cache = OverrideStatusCache()
+        self.assertFalse(cache._read_validators())
+
+    def test_delete_cache_deletes_validators(self):
+        cache = self._write_cache()
+        cache.delete_cache()
+        self.assertIsNone(cache_store.metadata(OverrideStatusCache.CACHE_FILE))
+        self.assertIsNone(cache.validators)
+
+    def test_cache_of_other_consumer_not_used(self):
+        self._write_cache()
+        cache = OverrideStatusCache()
+        uep = Mock()
+        uep.getContentOverrides = Mock(side_effect=socket.error())
+
+        self.assertIsNone(cache.load_status(uep, "OTHER_UUID"))
+        self.assertEqual(self.OVERRIDES, cache.load_status(uep, "UUID"))
+
+    def test_cache_of_other_schema_not_used(self):
+        self._write_cache()
+        with patch.object(OverrideStatusCache, "SCHEMA_VERSION", 2):
+            self.assertIsNone(OverrideStatusCache().read_cache_only())
+        self.assertEqual(self.OVERRIDES, OverrideStatusCache().read_cache_only())
+
+
 class TestPoolTypeCache(SubManFixture):
     """
     Class for testing PoolTypeCache
@@ -982,6 +1251,9 @@ after
         self.cache.cp_provider.get_consumer_auth_cp = Mock(return_value=self.mock_uep)
         self.cache.identity = Mock()
         self.cert = Mock()
+        store_write_patcher = patch("subscription_manager.cache.cache_store.write")
+        self.mock_store_write = store_write_patcher.start()
+        self.addCleanup(store_write_patcher.stop)
 
     @patch("subscription_manager.cache.open", MOCK_OPEN_EMPTY)
     def test_empty_cache(self):
@@ -1023,8 +1295,9 @@ after
     @patch("subscription_manager.cache.open", MOCK_OPEN_EMPTY)
     def test_writes_to_cache_after_read(self):
         self.cache.check_for_update()
-        self.MOCK_OPEN_EMPTY.assert_any_call(ContentAccessCache.CACHE_FILE, "w")
-        self.MOCK_OPEN_EMPTY().write.assert_any_call(json.dumps(self.MOCK_CONTENT))
+        self.mock_store_write.assert_called_once_with(
+            ContentAccessCache.CACHE_FILE, json.dumps(self.MOCK_CONTENT)
+        )
 
     @patch("subscription_manager.cache.open", MOCK_OPEN_EMPTY)
     def test_cert_updated_after_read(self):
@@ -1443,6 +1716,63 @@ class TestCloudTokenCache(SubManFixture):
         self.assertFalse(os.path.isfile(cache.CloudTokenCache.CACHE_FILE))
 
 
+class TestRepoFingerprintCache(unittest.TestCase):
+    def setUp(self):
+        temp_cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_cache_dir)
+        self.cache = RepoFingerprintCache()
+        self.cache.CACHE_FILE = os.path.join(temp_cache_dir, "repo_fingerprint.json")
+        self.files = {"/etc/yum.repos.d/redhat.repo": [1, 2, 3]}
+
+    def test_not_current_without_cache(self):
+        self.assertIsNone(self.cache.read_cache_only())
+        self.assertFalse(self.cache.is_current("abc", self.files))
+
+    def test_write_and_read(self):
+        self.cache.fingerprint = "abc"
+        self.cache.files = self.files
+        self.cache.write_cache()
+
+        cache = RepoFingerprintCache()
+        cache.CACHE_FILE = self.cache.CACHE_FILE
+        cache.read_cache_only()
+        self.assertTrue(cache.is_current("abc", self.files))
+        self.assertFalse(cache.is_current("abd", self.files))
+        self.assertFalse(cache.is_current("abc", {"/etc/yum.repos.d/redhat.repo": [1, 2, 4]}))
+        self.assertFalse(cache.is_current("abc", {"/etc/yum.repos.d/redhat.repo": None}))
+
+    def test_corrupted_cache(self):
+        with open(self.cache.CACHE_FILE, "w") as cache_file:
+            cache_file.write('/{foo"[(bar])')
+        self.cache.read_cache_only()
+        self.assertFalse(self.cache.is_current("abc", self.files))
+
+
+class TestContentModelCache(unittest.TestCase):
+    def setUp(self):
+        temp_cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_cache_dir)
+        self.cache_file = os.path.join(temp_cache_dir, "content_model.json")
+        self.repos = [{"id": "x", "content_type": "yum", "items": [["name", "x"]]}]
+
+    def _cache(self):
+        cache = ContentModelCache()
+        cache.CACHE_FILE = self.cache_file
+        return cache
+
+    def test_get_repos(self):
+        self.assertIsNone(self._cache().get_repos("abc"))
+        self._cache().set_repos("abc", self.repos, None)
+        self.assertEqual(self.repos, self._cache().get_repos("abc"))
+        self.assertIsNone(self._cache().get_repos("abd"))
+
+    def test_get_repos_expired(self):
+        self._cache().set_repos("abc", self.repos, time.time() + 3600)
+        self.assertEqual(self.repos, self._cache().get_repos("abc"))
+        self._cache().set_repos("abc", self.repos, time.time() - 1)
+        self.assertIsNone(self._cache().get_repos("abc"))
+
+
 class TestCryptographicCapabilitiesCache(SubManFixture):
     def setUp(self):
         super(TestCryptographicCapabilitiesCache, self).setUp()
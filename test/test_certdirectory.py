@@ -19,17 +19,41 @@ import os
 from unittest.mock import patch, MagicMock
 from shutil import rmtree
 
+from . import certdata
 from .stubs import StubProduct, StubEntitlementCertificate, StubProductCertificate
+from rhsm.certificate import Key, create_from_file, create_from_pem
 from subscription_manager.certdirectory import (
     Path,
+    CertificateDirectory,
+    CertificateDirectoryIndex,
+    CertificateWriteError,
     EntitlementDirectory,
     ProductDirectory,
     ProductCertificateDirectory,
     Directory,
+    Writer,
 )
 from subscription_manager.repolib import YumRepoFile
 from subscription_manager.productid import ProductDatabase
 
+# Index of certificate directories is never written to /var/lib/rhsm
+index_dir = None
+index_patcher = None
+
+
+def setUpModule():
+    global index_dir, index_patcher
+    index_dir = tempfile.mkdtemp(prefix="subscription-manager-unit-tests-tmp")
+    index_patcher = patch.object(
+        CertificateDirectoryIndex, "INDEX_FILE", os.path.join(index_dir, "cert_index.json")
+    )
+    index_patcher.start()
+
+
+def tearDownModule():
+    index_patcher.stop()
+    rmtree(index_dir)
+
 
 class PathTests(unittest.TestCase):
     """
@@ -254,6 +278,166 @@ class EntitlementDirectoryWithCertsTest(DirectoryWithCertsTest):
         self.assertTrue(isinstance(res, list))
 
 
+class CertificateDirectoryIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="subscription-manager-unit-tests-tmp")
+        self.addCleanup(rmtree, self.temp_dir)
+        self.cert_dir = os.path.join(self.temp_dir, "entitlement")
+        os.mkdir(self.cert_dir)
+        for serial, pem in (
+            ("1", certdata.ENTITLEMENT_CERT_V1_0),
+            ("2", certdata.ENTITLEMENT_CERT_V3_0),
+            ("3", certdata.ENTITLEMENT_CERT_V3_0_NO_CONTENT),
+        ):
+            with open(os.path.join(self.cert_dir, "%s.pem" % serial), "w") as cert_file:
+                cert_file.write(pem)
+
+        index_patcher = patch.object(
+            CertificateDirectoryIndex, "INDEX_FILE", os.path.join(self.temp_dir, "cert_index.json")
+        )
+        index_patcher.start()
+        self.addCleanup(index_patcher.stop)
+        create_patcher = patch(
+            "subscription_manager.certdirectory.create_from_file", side_effect=create_from_file
+        )
+        self.mock_create = create_patcher.start()
+        self.addCleanup(create_patcher.stop)
+
+    def _parsed_files(self):
+        return [os.path.basename(call[0][0]) for call in self.mock_create.call_args_list]
+
+    def test_find_uses_stored_index(self):
+        cert = CertificateDirectory(self.cert_dir).find(1306183239866671852)
+        self.assertEqual(cert.serial, 1306183239866671852)
+        self.assertEqual(len(self._parsed_files()), 3)
+
+        self.mock_create.reset_mock()
+        cert = CertificateDirectory(self.cert_dir).find(1306183239866671852)
+        self.assertEqual(cert.serial, 1306183239866671852)
+        self.assertEqual(self._parsed_files(), ["2.pem"])
+
+    def test_changed_certificate_parsed_again(self):
+        CertificateDirectory(self.cert_dir).find(1306183239866671852)
+        os.utime(os.path.join(self.cert_dir, "3.pem"), ns=(0, 0))
+
+        self.mock_create.reset_mock()
+        cert_dir = CertificateDirectory(self.cert_dir)
+        self.assertIsNone(cert_dir.find(123))
+        self.assertEqual(self._parsed_files(), ["3.pem"])
+
+    def test_lookups(self):
+        cert_dir = CertificateDirectory(self.cert_dir)
+        self.assertEqual([cert.serial for cert in cert_dir.find_all_by_product("900")], [7171676047375717294])
+        self.assertEqual(cert_dir.find_by_product("37065").serial, 60063758564076674)
+        self.assertIsNone(cert_dir.find_by_product("404"))
+        self.assertEqual(len(cert_dir.list_expired()), 3)
+        self.assertEqual(cert_dir.list_valid(), [])
+
+    @patch("subscription_manager.certdirectory.EntitlementDirectory.productpath")
+    def test_list_for_pool_id(self, mock_productpath):
+        mock_productpath.return_value = self.cert_dir
+        ent_dir = EntitlementDirectory()
+        certs = ent_dir.list_for_pool_id("4028fa7a672c01e101672c06f30803c4")
+        self.assertEqual([cert.serial for cert in certs], [7171676047375717294])
+        self.assertEqual(ent_dir.list_for_product("404"), [])
+
+    def test_removed_directory_pruned(self):
+        other_dir = os.path.join(self.temp_dir, "other")
+        os.mkdir(other_dir)
+        with open(os.path.join(other_dir, "1.pem"), "w") as cert_file:
+            cert_file.write(certdata.ENTITLEMENT_CERT_V1_0)
+        CertificateDirectory(other_dir).find(123)
+        CertificateDirectory(self.cert_dir).find(123)
+        self.assertEqual(
+            sorted(CertificateDirectoryIndex(self.cert_dir)._read()), sorted([other_dir, self.cert_dir])
+        )
+
+        rmtree(other_dir)
+        os.remove(os.path.join(self.cert_dir, "3.pem"))
+        CertificateDirectory(self.cert_dir).find(123)
+        self.assertEqual(list(CertificateDirectoryIndex(self.cert_dir)._read()), [self.cert_dir])
+
+    def test_removed_certificate_forgotten(self):
+        cert_dir = CertificateDirectory(self.cert_dir)
+        self.assertEqual(len(cert_dir.list()), 3)
+        self.assertEqual(sorted(cert_dir._certs), ["1.pem", "2.pem", "3.pem"])
+
+        os.remove(os.path.join(self.cert_dir, "3.pem"))
+        cert_dir.refresh()
+        self.assertEqual(len(cert_dir.list()), 2)
+        self.assertEqual(sorted(cert_dir._certs), ["1.pem", "2.pem"])
+
+
+class WriterTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="subscription-manager-unit-tests-tmp")
+        self.addCleanup(rmtree, self.temp_dir)
+        self.ent_dir_path = os.path.join(self.temp_dir, "entitlement")
+        os.mkdir(self.ent_dir_path)
+        ent_dir = MagicMock()
+        ent_dir.productpath.return_value = self.ent_dir_path
+        require_patcher = patch("subscription_manager.certdirectory.require", return_value=ent_dir)
+        require_patcher.start()
+        self.addCleanup(require_patcher.stop)
+
+    def test_write_all(self):
+        bundles = [
+            (Key("key1"), create_from_pem(certdata.ENTITLEMENT_CERT_V1_0)),
+            (Key("key2"), create_from_pem(certdata.ENTITLEMENT_CERT_V3_0)),
+        ]
+        Writer().write_all(bundles)
+
+        expected = []
+        for key, cert in bundles:
+            expected += ["%s-key.pem" % cert.serial, "%s.pem" % cert.serial]
+            self.assertEqual(os.path.join(self.ent_dir_path, "%s.pem" % cert.serial), cert.path)
+            with open(key.path) as key_file:
+                self.assertEqual(key.content, key_file.read())
+            self.assertEqual(cert.serial, create_from_file(cert.path).serial)
+        self.assertEqual(sorted(expected), sorted(os.listdir(self.ent_dir_path)))
+        # Temporary directory is removed
+        self.assertEqual(["entitlement"], os.listdir(self.temp_dir))
+
+    def test_write_all_error(self):
+        cert = create_from_pem(certdata.ENTITLEMENT_CERT_V1_0)
+        key = Key("key")
+        with patch.object(type(cert), "write", side_effect=OSError("No space left on device")):
+            self.assertRaises(OSError, Writer().write_all, [(key, cert)])
+        # Nothing is written, when some file cannot be written
+        self.assertEqual([], os.listdir(self.ent_dir_path))
+        self.assertEqual(["entitlement"], os.listdir(self.temp_dir))
+
+    def test_write_all_rename_error(self):
+        bundles = [
+            (Key("key1"), create_from_pem(certdata.ENTITLEMENT_CERT_V1_0)),
+            (Key("key2"), create_from_pem(certdata.ENTITLEMENT_CERT_V3_0)),
+        ]
+        rename = os.rename
+
+        def failing_rename(source, destination):
+            if destination.endswith("%s-key.pem" % bundles[1][1].serial):
+                raise OSError("Read-only file system")
+            rename(source, destination)
+
+        with patch("os.rename", side_effect=failing_rename):
+            with self.assertRaises(CertificateWriteError) as context:
+                Writer().write_all(bundles)
+        # Only the first certificate was written
+        self.assertEqual([bundles[0][1]], context.exception.written)
+        self.assertIsInstance(context.exception.error, OSError)
+        self.assertEqual(["entitlement"], os.listdir(self.temp_dir))
+
+    def test_stale_staging_dirs_removed(self):
+        stale_dir = os.path.join(self.temp_dir, ".entitlement-stale")
+        os.mkdir(stale_dir)
+        os.utime(stale_dir, (0, 0))
+        # Directory used by another process writing certificates just now
+        recent_dir = os.path.join(self.temp_dir, ".entitlement-recent")
+        os.mkdir(recent_dir)
+        Writer().write_all([(Key("key"), create_from_pem(certdata.ENTITLEMENT_CERT_V1_0))])
+        self.assertEqual([".entitlement-recent", "entitlement"], sorted(os.listdir(self.temp_dir)))
+
+
 class ProductCertificateDirectoryTest(DirectoryTest):
     klass = ProductCertificateDirectory
 
@@ -13,6 +13,7 @@
 #
 
 from datetime import datetime, timedelta
+import threading
 
 from unittest import mock
 from . import stubs
@@ -199,6 +200,89 @@ class TestActionClient(ActionClientTestBase):
                 return
         self.fail("Did not ExceptionException in the logged exceptions")
 
+    def test_uploads_run_concurrently(self):
+        # Facts and installed products wait for each other, so they have to run at the same time
+        barrier = threading.Barrier(2, timeout=3)
+        threads = {}
+
+        def update(name):
+            def _update():
+                threads[name] = threading.current_thread()
+                if name in ("facts", "installed"):
+                    barrier.wait()
+                return reports[name]
+
+            return _update
+
+        reports = {}
+        actionclient = action_client.ActionClient()
+        libs = [
+            ("entcert", actionclient.entcertlib),
+            ("idcert", actionclient.idcertlib),
+            ("content", actionclient.content_client),
+            ("facts", actionclient.factlib),
+            ("profile", actionclient.profilelib),
+            ("installed", actionclient.installedprodlib),
+            ("syspurpose", actionclient.syspurposelib),
+        ]
+        for name, lib in libs:
+            reports[name] = mock.Mock(name=name)
+            lib.update = update(name)
+        actionclient.update()
+
+        # Reports are in the order of libset
+        self.assertEqual([reports[name] for name, _lib in libs], actionclient.update_reports)
+        self.assertIs(threading.current_thread(), threads["entcert"])
+        self.assertIsNot(threads["facts"], threads["installed"])
+
+    def test_cyclic_dependencies(self):
+        actionclient = action_client.ActionClient()
+        dependencies = actionclient._get_dependencies()
+        dependencies[actionclient.entcertlib] = [actionclient.profilelib]
+        for lib in actionclient._libset:
+            lib.update = mock.Mock()
+        with mock.patch.object(actionclient, "_get_dependencies", return_value=dependencies):
+            self.assertRaises(ValueError, actionclient.update)
+        for lib in actionclient._libset:
+            lib.update.assert_not_called()
+
+    def test_dependency_not_in_libset(self):
+        actionclient = action_client.ActionClient()
+        dependencies = actionclient._get_dependencies()
+        dependencies[actionclient.factlib] = [mock.Mock(name="unknown")]
+        for lib in actionclient._libset:
+            lib.update = mock.Mock()
+        with mock.patch.object(actionclient, "_get_dependencies", return_value=dependencies):
+            self.assertRaises(ValueError, actionclient.update)
+        for lib in actionclient._libset:
+            lib.update.assert_not_called()
+
+    def test_no_invoker_started_after_gone_exception(self):
+        actionclient = action_client.ActionClient()
+        started = []
+
+        def update(name):
+            def _update():
+                started.append(name)
+                if name == "content":
+                    raise GoneException(410, "bye bye", " 234234")
+
+            return _update
+
+        for name, lib in [
+            ("entcert", actionclient.entcertlib),
+            ("idcert", actionclient.idcertlib),
+            ("content", actionclient.content_client),
+            ("facts", actionclient.factlib),
+            ("profile", actionclient.profilelib),
+            ("installed", actionclient.installedprodlib),
+            ("syspurpose", actionclient.syspurposelib),
+        ]:
+            lib.update = update(name)
+        self.assertRaises(GoneException, actionclient.update)
+        # Package profile depends on repositories generated by content client
+        self.assertNotIn("profile", started)
+
     def _stub_certificate_calls(self, stub_ents=None):
         stub_ents = stub_ents or []
         stub_ent_dir = stubs.StubEntitlementDirectory(stub_ents)
@@ -12,6 +12,7 @@
 # in this software or its documentation.
 #
 
+import functools
 from unittest.mock import Mock, patch
 from datetime import timedelta, datetime
 
@@ -19,7 +20,7 @@ from .stubs import StubEntitlementCertificate, StubProduct, StubEntitlementDirec
 
 from . import fixture
 
-from subscription_manager.certdirectory import Writer
+from subscription_manager.certdirectory import CertificateWriteError, Writer
 from subscription_manager import entcertlib
 from subscription_manager import injection as inj
 
@@ -61,7 +62,7 @@ class TestEntCertUpdateReport(fixture.SubManFixture):
 
 class UpdateActionTests(fixture.SubManFixture):
     @patch("subscription_manager.entcertlib.EntitlementCertBundleInstaller.build_cert")
-    @patch.object(Writer, "write")
+    @patch.object(Writer, "write_all")
     def test_expired_are_not_ignored_when_installing_certs(self, write_mock, build_cert_mock):
         valid_ent = StubEntitlementCertificate(StubProduct("PValid"))
         expired_ent = StubEntitlementCertificate(
@@ -101,6 +102,53 @@ class UpdateActionTests(fixture.SubManFixture):
         self.assertTrue(valid_ent.serial in update_report.expected)
         self.assertTrue(expired_ent.serial in update_report.expected)
 
+    @patch("subscription_manager.entcertlib.EntitlementCertBundleInstaller.build_cert")
+    @patch.object(Writer, "write_all")
+    def test_install_in_batches(self, write_all_mock, build_cert_mock):
+        certs = [StubEntitlementCertificate(StubProduct("P%d" % index)) for index in range(5)]
+        build_cert_mock.side_effect = lambda bundle: (bundle["key"], bundle["cert"])
+
+        mock_uep = Mock()
+        mock_uep.getCertificates.side_effect = lambda uuid, serials: [
+            {"key": Mock(), "cert": cert} for cert in certs if str(cert.serial) in serials
+        ]
+        self.set_consumer_auth_cp(mock_uep)
+        inj.provide(inj.ENT_DIR, StubEntitlementDirectory([]))
+        update_action = TestingUpdateAction()
+
+        iter_certificates = functools.partial(update_action.iter_certificates_by_serial_list, batch_size=2)
+        with patch.object(update_action, "iter_certificates_by_serial_list", iter_certificates):
+            update_action.install([cert.serial for cert in certs])
+
+        self.assertEqual(
+            [[str(cert.serial) for cert in certs[index : index + 2]] for index in (0, 2, 4)],
+            [call[1]["serials"] for call in mock_uep.getCertificates.call_args_list],
+        )
+        # All certificates are written at once
+        write_all_mock.assert_called_once()
+        self.assertEqual(certs, [cert for _key, cert in write_all_mock.call_args[0][0]])
+        self.assertEqual(certs, update_action.report.added)
+
+    @patch("subscription_manager.entcertlib.EntitlementCertBundleInstaller.build_cert")
+    @patch.object(Writer, "write_all")
+    def test_install_partially_written(self, write_all_mock, build_cert_mock):
+        certs = [StubEntitlementCertificate(StubProduct("P%d" % index)) for index in range(3)]
+        build_cert_mock.side_effect = lambda bundle: (bundle["key"], bundle["cert"])
+        error = OSError("Read-only file system")
+        write_all_mock.side_effect = CertificateWriteError(error, certs[:1])
+
+        mock_uep = Mock()
+        mock_uep.getCertificates.return_value = [{"key": Mock(), "cert": cert} for cert in certs]
+        self.set_consumer_auth_cp(mock_uep)
+        inj.provide(inj.ENT_DIR, StubEntitlementDirectory([]))
+        update_action = TestingUpdateAction()
+
+        installed_serials = update_action.install([cert.serial for cert in certs])
+        # Only the renamed certificate is reported as installed
+        self.assertEqual([certs[0].serial], installed_serials)
+        self.assertEqual(certs[:1], update_action.report.added)
+        self.assertEqual([error, error], update_action.report.exceptions())
+
     def test_delete(self):
         ent = StubEntitlementCertificate(StubProduct("Prod"))
         ent.delete = Mock(side_effect=OSError("Cert has already been deleted"))
@@ -123,3 +171,23 @@ class UpdateActionTests(fixture.SubManFixture):
 
         exceptions = update_action.report.exceptions()
         self.assertEqual([], exceptions)
+
+    @patch("subscription_manager.entcertlib.PathMatcher.remove_unused")
+    def test_unused_path_matchers_removed(self, remove_unused_mock):
+        kept = StubEntitlementCertificate(StubProduct("Kept"))
+        mock_uep = Mock()
+        mock_uep.getCertificates = Mock(return_value=[])
+        mock_uep.getCertificateSerials = Mock(return_value=[])
+        self.set_consumer_auth_cp(mock_uep)
+        inj.provide(inj.ENT_DIR, StubEntitlementDirectory([kept]))
+        update_action = TestingUpdateAction()
+        with patch.object(update_action, "_get_expected_serials", return_value=[kept.serial]):
+            update_action.perform()
+        remove_unused_mock.assert_not_called()
+
+        rogue = StubEntitlementCertificate(StubProduct("Rogue"))
+        inj.provide(inj.ENT_DIR, StubEntitlementDirectory([kept, rogue]))
+        update_action = TestingUpdateAction()
+        with patch.object(update_action, "_get_expected_serials", return_value=[kept.serial]):
+            update_action.perform()
+        remove_unused_mock.assert_called_once()
@@ -1,6 +1,6 @@
 import tempfile
 import shutil
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 from . import fixture
 from subscription_manager import facts
@@ -198,3 +198,32 @@ class TestFacts(fixture.SubManFixture):
 
         self.assertTrue(isinstance(f, dict))
         self.assertEqual(f["net.interface.lo.ipv4_address"], "127.0.0.1")
+
+    @patch("subscription_manager.facts.AllFactsCollector")
+    def test_collection_session(self, mock_collector):
+        test_facts = json.loads(facts_buf)
+        mock_collector.return_value.get_all.return_value = test_facts
+        self.f.plugin_manager = Mock()
+
+        with self.f.collection_session():
+            self.assertFalse(self.f.has_changed())
+            self.assertFalse(self.f.has_changed())
+            self.assertEqual(test_facts, self.f.get_facts(refresh=True))
+            self.assertEqual(test_facts, self.f.to_dict())
+        mock_collector.return_value.get_all.assert_called_once()
+
+        # facts are refreshed again outside the session
+        self.assertFalse(self.f.has_changed())
+        self.assertEqual(2, mock_collector.return_value.get_all.call_count)
+
+    @patch("subscription_manager.facts.AllFactsCollector")
+    def test_nested_collection_session(self, mock_collector):
+        mock_collector.return_value.get_all.return_value = {"newstuff": True}
+        self.f.plugin_manager = Mock()
+
+        with self.f.collection_session() as session:
+            with self.f.collection_session() as nested_session:
+                self.assertIs(session, nested_session)
+                self.f.get_facts(refresh=True)
+            self.f.get_facts(refresh=True)
+        mock_collector.return_value.get_all.assert_called_once()
@@ -0,0 +1,97 @@
+# Copyright (c) 2026 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+
+import os
+import re
+import subprocess
+import sys
+import unittest
+
+from subscription_manager import injection as inj
+
+# Code run by subscription-manager before arguments are parsed
+COLD_START = """
+from subscription_manager.injectioninit import init_dep_injection
+init_dep_injection()
+from subscription_manager import managercli
+managercli.ManagerCLI()
+"""
+
+# Modules, which must not be imported before arguments are parsed
+LAZY_MODULES = [
+    "subscription_manager.cache",
+    "subscription_manager.cert_sorter",
+    "subscription_manager.entcertlib",
+    "subscription_manager.plugins",
+    "subscription_manager.repolib",
+    "cloud_what.provider",
+]
+
+# Python modules, which are not installed in some environments (e.g. virtualenv)
+OPTIONAL_MODULES = re.compile(r"ModuleNotFoundError: No module named '(dbus|rpm)[.']")
+
+
+class TestImportTime(unittest.TestCase):
+    def _import_times(self):
+        """
+        Run cold start in new interpreter and return dictionary with self time
+        of importing of every module in seconds
+        """
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(path for path in sys.path if path)
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", COLD_START],
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1]
+            if OPTIONAL_MODULES.match(error):
+                self.skipTest("Cold start failed: %s" % error)
+            self.fail("Cold start failed: %s" % result.stderr)
+        import_times = {}
+        for line in result.stderr.splitlines():
+            match = re.match(r"import time:\s+(\d+) \|\s+\d+ \| +(\S+)$", line)
+            if match:
+                import_times[match.group(2)] = int(match.group(1)) / 1000000.0
+        return import_times
+
+    def test_cold_start(self):
+        import_times = self._import_times()
+        self.assertIn("subscription_manager.managercli", import_times)
+        commands = [
+            module for module in import_times if module.startswith("subscription_manager.cli_command")
+        ]
+        self.assertEqual([], commands)
+        self.assertEqual([], [module for module in LAZY_MODULES if module in import_times])
+
+
+class TestLazyClass(unittest.TestCase):
+    def setUp(self):
+        self.features = inj.FEATURES
+        inj.FEATURES = inj.FeatureBroker()
+        self.addCleanup(setattr, inj, "FEATURES", self.features)
+
+    def test_singleton(self):
+        inj.provide("feature", inj.LazyClass("collections.OrderedDict"), singleton=True)
+        ordered_dict = inj.require("feature")
+        self.assertEqual("OrderedDict", type(ordered_dict).__name__)
+        self.assertIs(ordered_dict, inj.require("feature"))
+
+    def test_non_singleton(self):
+        inj.provide("feature", inj.LazyClass("collections.OrderedDict"))
+        ordered_dict = inj.require("feature", a=1)
+        self.assertEqual({"a": 1}, ordered_dict)
+        self.assertIsNot(ordered_dict, inj.require("feature"))
@@ -72,6 +72,19 @@ class TestCli(SubManFixture):
         cli = managercli.ManagerCLI()
         self.assertRaises(SystemExit, cli.main)
 
+    def test_cli_commands_are_lazy(self):
+        cli = managercli.ManagerCLI()
+        version = cli.cli_commands["version"]
+        self.assertIsNone(version._command)
+        self.assertFalse(version.primary)
+        self.assertTrue(version.shortdesc)
+        self.assertIsNotNone(version._command)
+
+    def test_cli_lazy_commands_match_classes(self):
+        cli = managercli.ManagerCLI()
+        for name, cmd in cli.cli_commands.items():
+            self.assertEqual((name, cmd.primary), (cmd.command.name, cmd.command.primary))
+
     def test_cli_find_best_match(self):
         cli = managercli.ManagerCLI()
         best_match = cli._find_best_match(["subscription-manager", "version"])
@@ -27,6 +27,7 @@ from .fixture import SubManFixture
 from subscription_manager.managerlib import (
     merge_pools,
     PoolFilter,
+    PoolIndex,
     MergedPoolsStackingGroupSorter,
     MergedPools,
     PoolStash,
@@ -675,6 +676,36 @@ class PoolFilterTests(SubManFixture):
         # Adds in a stacking_id to be used in testing the partial stacks
         # Assume default type attribute of 'MKT'
 
+    def test_filter_with_pool_index(self):
+        installed = "installed"
+        pd = StubCertificateDirectory([StubProductCertificate(StubProduct(installed))])
+        pools = [
+            create_pool("product%d" % i, "product%d" % i, provided_products=["provided%d" % i, installed])
+            for i in range(3)
+        ] + [create_pool("product%d" % i, "product%d" % i) for i in range(3, 6)]
+        pool_index = PoolIndex(pools)
+        pool_filter = PoolFilter(
+            product_dir=pd, entitlement_dir=StubCertificateDirectory([]), pool_index=pool_index
+        )
+
+        with patch.object(managerlib, "PoolIndex") as mock_index:
+            self.assertEqual(pools[:3], pool_filter.filter_out_uninstalled(pools))
+            self.assertEqual(pools[3:], pool_filter.filter_out_installed(pools))
+            self.assertEqual(
+                [pools[1], pools[4]], pool_filter.filter_product_ids(pools, ["provided1", "product4"])
+            )
+        mock_index.assert_not_called()
+
+    def test_filter_pools_not_in_pool_index(self):
+        pd = StubCertificateDirectory([StubProductCertificate(StubProduct("product1"))])
+        indexed_pools = [create_pool("product1", "product1")]
+        pools = [create_pool("product1", "product1"), create_pool("product2", "product2")]
+        pool_filter = PoolFilter(
+            product_dir=pd, entitlement_dir=StubCertificateDirectory([]), pool_index=PoolIndex(indexed_pools)
+        )
+        self.assertEqual([pools[0]], pool_filter.filter_out_uninstalled(pools))
+        self.assertEqual([pools[1]], pool_filter.filter_out_installed(pools))
+
     def _create_pool(
         self, product_id, product_name, provided_products, start_end_range, stacking_id=None, type="MKT"
     ):
@@ -861,6 +892,123 @@ class PoolStashTest(SubManFixture):
         self.assertTrue(my_stash.all_pools_size() == 0)
 
 
+class IterPoolPagesTest(unittest.TestCase):
+    def setUp(self):
+        patcher = patch("subscription_manager.managerlib._prepare_pools_listing", return_value="owner")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pools = [{"id": str(i)} for i in range(7)]
+        self.uep = Mock()
+        self.uep.getPoolsList.side_effect = self._get_pools_list
+        # Behaviour of the server
+        self.headers = ["X-Total-Count"]
+        self.max_per_page = None
+        self.ignore_paging = False
+
+    def _get_pools_list(self, page=0, items_per_page=0, paging=None, **kwargs):
+        if page == 0 or self.ignore_paging:
+            pools = self.pools
+        else:
+            if self.max_per_page is not None:
+                items_per_page = min(items_per_page, self.max_per_page)
+            pools = self.pools[(page - 1) * items_per_page : page * items_per_page]
+            headers = {}
+            if "X-Total-Count" in self.headers:
+                headers["X-Total-Count"] = str(len(self.pools))
+            if "Link" in self.headers and page * items_per_page < len(self.pools):
+                headers["Link"] = '</pools?page=%d>; rel="next"' % (page + 1)
+            paging.update(headers)
+        return pools
+
+    def _requested_pages(self):
+        return [call_args[1]["page"] for call_args in self.uep.getPoolsList.call_args_list]
+
+    def test_pages(self):
+        pages = list(managerlib.iter_pool_pages(self.uep, "uuid", page_size=3))
+        self.assertEqual([self.pools[0:3], self.pools[3:6], self.pools[6:]], pages)
+        self.assertEqual([1, 2, 3], self._requested_pages())
+        self.assertEqual("owner", self.uep.getPoolsList.call_args[1]["owner"])
+
+    def test_last_page_full(self):
+        self.pools = self.pools[:6]
+        pages = list(managerlib.iter_pool_pages(self.uep, "uuid", page_size=3))
+        self.assertEqual([self.pools[0:3], self.pools[3:6]], pages)
+        self.assertEqual([1, 2], self._requested_pages())
+
+    def test_pages_in_flight(self):
+        pages = list(managerlib.iter_pool_pages(self.uep, "uuid", page_size=2, max_pages_in_flight=3))
+        self.assertEqual([self.pools[0:2], self.pools[2:4], self.pools[4:6], self.pools[6:]], pages)
+        self.assertEqual([1, 2, 3, 4], sorted(self._requested_pages()))
+
+    def test_pool_yielded_once(self):
+        # Pool was moved to the next page between requests
+        self.pools.insert(3, self.pools[2])
+        pages = list(managerlib.iter_pool_pages(self.uep, "uuid", page_size=3))
+        self.assertEqual([self.pools[0:3], self.pools[4:6], self.pools[6:]], pages)
+
+    def test_link_header(self):
+        self.headers = ["Link"]
+        pages = list(managerlib.iter_pool_pages(self.uep, "uuid", page_size=3, max_pages_in_flight=3))
+        self.assertEqual([self.pools[0:3], self.pools[3:6], self.pools[6:]], pages)
+        self.assertEqual([1, 2, 3], self._requested_pages())
+
+    def test_server_caps_items_per_page(self):
+        self.max_per_page = 2
+        for headers in (["X-Total-Count"], ["Link"]):
+            self.headers = headers
+            pages = list(managerlib.iter_pool_pages(self.uep, "uuid", page_size=3))
+            self.assertEqual([self.pools[0:2], self.pools[2:4], self.pools[4:6], self.pools[6:]], pages)
+
+    def test_paging_not_advertised(self):
+        self.headers = []
+        pages = list(managerlib.iter_pool_pages(self.uep, "uuid", page_size=3))
+        self.assertEqual([self.pools], pages)
+        self.assertEqual([1, 0], self._requested_pages())
+
+    def test_server_ignores_page(self):
+        # Server always returns the first full page, but it advertises more pools
+        def get_pools_list(page=0, items_per_page=0, paging=None, **kwargs):
+            paging.update({"X-Total-Count": "100", "Link": '</pools?page=2>; rel="next"'})
+            return self.pools[:3]
+
+        self.uep.getPoolsList.side_effect = get_pools_list
+        pages = list(managerlib.iter_pool_pages(self.uep, "uuid", page_size=3, max_pages_in_flight=2))
+        self.assertEqual([self.pools[0:3]], pages)
+        self.assertLessEqual(self.uep.getPoolsList.call_count, 3)
+
+    def test_server_ignores_page_without_paging(self):
+        self.ignore_paging = True
+        self.headers = []
+        pages = list(managerlib.iter_pool_pages(self.uep, "uuid", page_size=3))
+        self.assertEqual([self.pools], pages)
+        self.assertEqual([1, 0], self._requested_pages())
+
+
+class PoolIndexTest(unittest.TestCase):
+    def test_pool_ids_for_products(self):
+        pools = [
+            create_pool("product1", "product1", provided_products=["provided1", "provided2"]),
+            create_pool("product2", "product2", provided_products=["provided2"]),
+            create_pool("product3", "product3"),
+        ]
+        pool_index = PoolIndex(pools)
+        self.assertEqual({pools[0]["id"]}, pool_index.pool_ids_for_products(["product1"]))
+        self.assertEqual({pools[0]["id"], pools[1]["id"]}, pool_index.pool_ids_for_products(["provided2"]))
+        self.assertEqual(
+            {pools[1]["id"], pools[2]["id"]}, pool_index.pool_ids_for_products(["product2", "product3"])
+        )
+        self.assertEqual(set(), pool_index.pool_ids_for_products(["unknown"]))
+        self.assertEqual(frozenset(["provided1", "provided2"]), pool_index.provided_ids[pools[0]["id"]])
+
+    def test_covers(self):
+        pools = [create_pool("product1", "product1"), create_pool("product2", "product2")]
+        pool_index = PoolIndex(pools[:1])
+        self.assertTrue(pool_index.covers(pools[:1]))
+        self.assertFalse(pool_index.covers(pools))
+        # Pool with the same id, but different content is not covered
+        self.assertFalse(pool_index.covers([dict(pools[0])]))
+
+
 class TestAllowsMutliEntitlement(unittest.TestCase):
     def test_allows_when_yes(self):
         pool = self._create_pool_data_with_multi_entitlement_attribute("yes")
@@ -946,6 +1094,7 @@ class TestGetAvailableEntitlements(SubManFixture):
             future=None,
             page=0,
             items_per_page=0,
+            paging=None,
         ):
             if listAll:
                 return [self.build_pool_dict("1234"), self.build_pool_dict("4321")]
@@ -973,6 +1122,7 @@ class TestGetAvailableEntitlements(SubManFixture):
             future=None,
             page=0,
             items_per_page=0,
+            paging=None,
         ):
             if listAll:
                 return [
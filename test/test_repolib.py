@@ -132,6 +132,30 @@ class TestRepoActionInvoker(fixture.SubManFixture):
         certpath = repo.get("sslclientcert")
         self.assertNotEqual(certpath, self.stub_content_access_cert.path)
 
+    def test_get_repos_cached_content_model(self):
+        self._stub_content(include_content_access=True)
+        ent_dir = inj.require(inj.ENT_DIR)
+        ent_dir.files_state = Mock(return_value=[["/etc/pki/entitlement/1.pem", [1, 2, 3]]])
+        inj.require(inj.PROD_DIR).files_state = Mock(return_value=[])
+        repos = RepoActionInvoker().get_repos()
+        self.assertEqual(2, len(repos))
+
+        # Certificates are not used, when they have not been changed
+        with patch.object(RepoUpdateActionCommand, "matching_content") as mock_matching_content:
+            cached_repos = RepoActionInvoker().get_repos()
+            mock_matching_content.assert_not_called()
+        self.assertEqual(
+            sorted((repo.id, repo.items()) for repo in repos),
+            sorted((repo.id, repo.items()) for repo in cached_repos),
+        )
+
+        ent_dir.files_state.return_value = [["/etc/pki/entitlement/1.pem", [1, 2, 4]]]
+        with patch.object(
+            RepoUpdateActionCommand, "matching_content", return_value=[]
+        ) as mock_matching_content:
+            self.assertEqual(0, len(RepoActionInvoker().get_repos()))
+            mock_matching_content.assert_called_once()
+
 
 PROXY_NO_PROTOCOL = """
 [server]
@@ -433,6 +457,64 @@ class RepoUpdateActionTests(fixture.SubManFixture):
         self.assertEqual("new", written_repo["gpgcheck"])
         self.assertEqual(None, written_repo["gpgkey"])
 
+    @patch("subscription_manager.repolib.get_repo_file_classes")
+    def test_update_skipped_when_nothing_changed(self, mock_get_repo_file_classes):
+        mock_file = MagicMock()
+        mock_file.CONTENT_TYPES = [None]
+        mock_file.fix_content = lambda x: x
+        mock_file.section.return_value = None
+        mock_file.path = "/etc/yum.repos.d/redhat.repo"
+        mock_file.stat.return_value = [1, 2, 3]
+        mock_class = MagicMock(return_value=mock_file)
+        mock_get_repo_file_classes.return_value = [(mock_class, mock_class)]
+
+        def stub_content():
+            return [Repo("x", [("gpgcheck", "original"), ("gpgkey", "some_key")])]
+
+        update_action = RepoUpdateActionCommand()
+        update_action.get_unique_content = stub_content
+        self.assertEqual(1, update_action.perform().updates())
+        self.assertEqual(2, mock_file.write.call_count)
+
+        mock_file.reset_mock()
+        update_action = RepoUpdateActionCommand()
+        update_action.get_unique_content = stub_content
+        self.assertEqual(0, update_action.perform().updates())
+        mock_file.read.assert_not_called()
+        mock_file.write.assert_not_called()
+
+    @patch("subscription_manager.repolib.get_repo_file_classes")
+    def test_update_when_repo_file_modified(self, mock_get_repo_file_classes):
+        mock_file = MagicMock()
+        mock_file.CONTENT_TYPES = [None]
+        mock_file.fix_content = lambda x: x
+        mock_file.section.return_value = None
+        mock_file.path = "/etc/yum.repos.d/redhat.repo"
+        mock_file.stat.return_value = [1, 2, 3]
+        mock_class = MagicMock(return_value=mock_file)
+        mock_get_repo_file_classes.return_value = [(mock_class, mock_class)]
+
+        def stub_content():
+            return [Repo("x", [("gpgcheck", "original"), ("gpgkey", "some_key")])]
+
+        update_action = RepoUpdateActionCommand()
+        update_action.get_unique_content = stub_content
+        update_action.perform()
+
+        # File was edited or content was changed
+        mock_file.stat.return_value = [4, 5, 3]
+        mock_file.reset_mock()
+        update_action = RepoUpdateActionCommand()
+        update_action.get_unique_content = stub_content
+        update_action.perform()
+        self.assertEqual(2, mock_file.write.call_count)
+
+        mock_file.reset_mock()
+        update_action = RepoUpdateActionCommand()
+        update_action.get_unique_content = lambda: [Repo("x", [("gpgcheck", "new")])]
+        update_action.perform()
+        self.assertEqual(2, mock_file.write.call_count)
+
     def test_no_gpg_key(self):
         update_action = RepoUpdateActionCommand()
         content = update_action.get_all_content(baseurl="http://example.com", ca_cert=None)